@@ -83,9 +83,70 @@ class Config(object):
         cls.CELERY_ONCE_DEFAULT_TIMEOUT = ENV.get("CELERY_ONCE_DEFAULT_TIMEOUT", fallback=60 * 60)
         cls.CELERY_CONFIG = CeleryConfig
 
+        # remote petition fetch settings (engine: futures/asyncio, json backend: auto/orjson/json)
+        cls.REMOTE_BASE_URL = ENV.get("REMOTE_BASE_URL", fallback="https://petition.parliament.uk")
+        cls.REMOTE_FETCH_ENGINE = ENV.get("REMOTE_FETCH_ENGINE", fallback="futures")
+        cls.REMOTE_MAX_CONCURRENCY = ENV.get("REMOTE_MAX_CONCURRENCY", type=int, fallback=200)
+        cls.REMOTE_TIMEOUT = ENV.get("REMOTE_TIMEOUT", type=float, fallback=5)
+        cls.REMOTE_KEEPALIVE_TIMEOUT = ENV.get("REMOTE_KEEPALIVE_TIMEOUT", type=float, fallback=30)
+        cls.REMOTE_MAX_BACKOFF = ENV.get("REMOTE_MAX_BACKOFF", type=float, fallback=30)
+        cls.REMOTE_RETRY_BUDGET_RATIO = ENV.get("REMOTE_RETRY_BUDGET_RATIO", type=float, fallback=0.25)
+        cls.REMOTE_RETRY_BUDGET_MIN = ENV.get("REMOTE_RETRY_BUDGET_MIN", type=int, fallback=10)
+        cls.REMOTE_JSON_BACKEND = ENV.get("REMOTE_JSON_BACKEND", fallback="auto")
+
+        # remote rate limit (requests/s + burst) and circuit breaker, shared by all sessions via redis
+        cls.REMOTE_THROTTLE_ENABLED = ENV.get("REMOTE_THROTTLE_ENABLED", type=ENV.to_bool, fallback=True)
+        cls.REMOTE_RATE_LIMIT = ENV.get("REMOTE_RATE_LIMIT", type=float, fallback=25)
+        cls.REMOTE_RATE_BURST = ENV.get("REMOTE_RATE_BURST", type=int, fallback=50)
+        cls.REMOTE_THROTTLE_MAX_WAIT = ENV.get("REMOTE_THROTTLE_MAX_WAIT", type=float, fallback=30)
+        cls.REMOTE_BREAKER_THRESHOLD = ENV.get("REMOTE_BREAKER_THRESHOLD", type=int, fallback=25)
+        cls.REMOTE_BREAKER_WINDOW = ENV.get("REMOTE_BREAKER_WINDOW", type=int, fallback=60)
+        cls.REMOTE_BREAKER_RESET = ENV.get("REMOTE_BREAKER_RESET", type=float, fallback=60)
+
+        # petition discovery settings (known IDs cache is rebuilt from the table once expired)
+        cls.PETITION_KNOWN_IDS_TTL = ENV.get("PETITION_KNOWN_IDS_TTL", type=int, fallback=60 * 60 * 24)
+
+        # unchanged petitions are recorded once per heartbeat (seconds, 0 records every poll)
+        cls.POLL_HEARTBEAT = ENV.get("POLL_HEARTBEAT", type=int, fallback=60 * 60)
+
+        # geographic snapshot storage (rows: signatures_by_* tables, packed: count arrays on record,
+        # delta: packed keyframes + changed counts) and row writer (copy: COPY, orm: bulk_save_objects)
+        cls.GEO_STORAGE = ENV.get("GEO_STORAGE", fallback="rows")
+        cls.GEO_WRITE_METHOD = ENV.get("GEO_WRITE_METHOD", fallback="copy")
+
+        # delta storage: deltas written per keyframe, and per keyframe once compacted
+        cls.GEO_KEYFRAME_INTERVAL = ENV.get("GEO_KEYFRAME_INTERVAL", type=int, fallback=24)
+        cls.GEO_COMPACT_INTERVAL = ENV.get("GEO_COMPACT_INTERVAL", type=int, fallback=168)
+
+        # open petitions in trending order are served from a redis sorted set scored at poll time
+        cls.TRENDING_CACHE_ENABLED = ENV.get("TRENDING_CACHE_ENABLED", type=ENV.to_bool, fallback=True)
+
+        # monthly record partitions created ahead of time, retired after retention (months, 0 keeps all)
+        cls.PARTITION_MONTHS_AHEAD = ENV.get("PARTITION_MONTHS_AHEAD", type=int, fallback=2)
+        cls.PARTITION_RETENTION_MONTHS = ENV.get("PARTITION_RETENTION_MONTHS", type=int, fallback=0)
+
+        # adaptive poll scheduling (seconds), see Petition.poll_interval
+        cls.POLL_MIN_INTERVAL = ENV.get("POLL_MIN_INTERVAL", type=float, fallback=60)
+        cls.POLL_MAX_INTERVAL = ENV.get("POLL_MAX_INTERVAL", type=float, fallback=60 * 60)
+        cls.POLL_HOT_INTERVAL = ENV.get("POLL_HOT_INTERVAL", type=float, fallback=60 * 5)
+        cls.POLL_HOT_TREND_INDEX = ENV.get("POLL_HOT_TREND_INDEX", type=int, fallback=50)
+        cls.POLL_TARGET_SIGNATURES = ENV.get("POLL_TARGET_SIGNATURES", type=float, fallback=50)
+
+        # petition action typeahead (trigram index needs at least 3 characters to narrow results)
+        cls.AUTOCOMPLETE_MIN_LENGTH = ENV.get("AUTOCOMPLETE_MIN_LENGTH", type=int, fallback=3)
+        cls.AUTOCOMPLETE_MAX_LIMIT = ENV.get("AUTOCOMPLETE_MAX_LIMIT", type=int, fallback=25)
+
         # view and response settings
         cls.JSONIFY_PRETTYPRINT_REGULAR = True
 
+        # signatures payloads: compiled (Core select rows, see SignaturesSerializer) or schema (marshmallow)
+        cls.SIGNATURES_SERIALIZER = ENV.get("SIGNATURES_SERIALIZER", fallback="compiled")
+        cls.RESPONSE_JSON_BACKEND = ENV.get("RESPONSE_JSON_BACKEND", fallback="auto")
+
+        # serialized signatures responses cached in redis until the petition is next recorded
+        cls.RESPONSE_CACHE_ENABLED = ENV.get("RESPONSE_CACHE_ENABLED", type=ENV.to_bool, fallback=True)
+        cls.RESPONSE_CACHE_TTL = ENV.get("RESPONSE_CACHE_TTL", type=int, fallback=60 * 60)
+
         # log files and settings
         cls.LOG_FILE = ENV.get("LOG_FILE")
         cls.LOG_LEVEL = ENV.get("LOG_LEVEL", else_raise=True)
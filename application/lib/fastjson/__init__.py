@@ -0,0 +1,51 @@
+import json, time, logging
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+
+# pluggable json codec for remote payloads and api responses, orjson is optional (it has no PyPy
+# build). auto uses orjson when installed, else the stdlib codec which the PyPy JIT handles well
+class JSONCodec():
+
+    backends = ["auto", "orjson", "json"]
+
+    def __init__(self, backend="auto"):
+        self.backend = self.resolve(backend)
+        self.loads = orjson.loads if self.backend == "orjson" else json.loads
+
+    def __repr__(self):
+        return f"<JSONCodec backend: {self.backend}>"
+
+    @classmethod
+    def resolve(cls, backend):
+        if not backend in cls.backends:
+            raise ValueError(f"Invalid json backend: '{backend}', valid: {cls.backends}")
+        if backend == "auto":
+            return "orjson" if orjson else "json"
+        if backend == "orjson" and not orjson:
+            logger.warning("orjson json backend requested but not installed, using json")
+            return "json"
+
+        return backend
+
+    # returns the decoded data and seconds spent decoding, accepts bytes or str
+    def decode(self, content):
+        started_at = time.perf_counter()
+        data = self.loads(content)
+        return data, time.perf_counter() - started_at
+
+    # sorted keys and a trailing newline as flask's jsonify, the stdlib output matches it byte for
+    # byte. orjson differs only in whitespace and writes non-ascii characters as utf-8
+    def encode(self, data, pretty=False):
+        if self.backend == "orjson":
+            option = orjson.OPT_SORT_KEYS | (orjson.OPT_INDENT_2 if pretty else 0)
+            return orjson.dumps(data, option=option) + b"\n"
+
+        separators = (", ", ": ") if pretty else (",", ":")
+        encoded = json.dumps(data, indent=2 if pretty else None, separators=separators, sort_keys=True)
+        return (encoded + "\n").encode()
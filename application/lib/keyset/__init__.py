@@ -0,0 +1,125 @@
+import sqlalchemy
+import base64, json, logging
+from datetime import datetime as dt
+
+logger = logging.getLogger(__name__)
+
+
+# keyset (cursor) pagination: a page continues from the key of the last row seen instead of an
+# OFFSET, so deep pages cost the same as the first. keys are (name, column, direction) tuples
+# ending with a unique column, ex: [("timestamp", Record.timestamp, "DESC"), ("id", Record.id, "DESC")]
+# NULLs are compared the way postgres orders them by default (after every value ascending)
+class CursorError(ValueError):
+    pass
+
+
+class KeysetPage():
+
+    def __init__(self, items, per_page, next=None, prev=None, total=None):
+        self.items = items
+        self.per_page = per_page
+        self.next = next
+        self.prev = prev
+        self.total = total
+
+    def __repr__(self):
+        template = "<KeysetPage items: {}, per_page: {}, next: {}, prev: {}>"
+        return template.format(len(self.items), self.per_page, bool(self.next), bool(self.prev))
+
+
+# cursors are opaque to clients: urlsafe base64 json of the paging direction and key values
+# datetimes always carry microseconds (isoformat drops them when 0) and are parsed with strptime
+CURSOR_DT_FORMAT = "%Y-%m-%dT%H:%M:%S.%f"
+
+def encode_cursor(direction, values):
+    values = [{"dt": v.strftime(CURSOR_DT_FORMAT)} if isinstance(v, dt) else v for v in values]
+    payload = json.dumps({"d": direction, "v": values}).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        direction, values = payload["d"], payload["v"]
+        if direction not in ["next", "prev"]:
+            raise ValueError(direction)
+        values = [dt.strptime(v["dt"], CURSOR_DT_FORMAT) if isinstance(v, dict) else v for v in values]
+    except (ValueError, KeyError, TypeError, AttributeError):
+        raise CursorError(f"Invalid cursor: '{cursor}'")
+
+    return direction, values
+
+def key_values(item, keys):
+    return [getattr(item, name) for name, column, direction in keys]
+
+
+def follows_filter(column, value, descending):
+    if descending:
+        return column.isnot(None) if value is None else column < value
+    return sqlalchemy.false() if value is None else sqlalchemy.or_(column > value, column.is_(None))
+
+def equals_filter(column, value):
+    return column.is_(None) if value is None else column == value
+
+# rows after position in the order of keys (reversed for a previous page)
+def keyset_filter(keys, position, reverse=False):
+    clauses = []
+    for i, (name, column, direction) in enumerate(keys):
+        descending = (direction.upper() == "DESC") != reverse
+        equal = [equals_filter(c, v) for (n, c, d), v in zip(keys[:i], position[:i])]
+        clauses.append(sqlalchemy.and_(*equal, follows_filter(column, position[i], descending)))
+    return sqlalchemy.or_(*clauses)
+
+def compare(a, b):
+    if a == b:
+        return 0
+    if a is None or b is None:
+        return 1 if a is None else -1
+    return -1 if a < b else 1
+
+def follows(values, position, keys, reverse=False):
+    for value, at, (name, column, direction) in zip(values, position, keys):
+        descending = (direction.upper() == "DESC") != reverse
+        result = compare(value, at) * (-1 if descending else 1)
+        if result:
+            return result > 0
+    return False
+
+
+def build_page(rows, keys, per_page, backwards, position, total=None):
+    more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backwards:
+        rows.reverse()
+
+    has_next = backwards or more
+    has_prev = more if backwards else position is not None
+    next = encode_cursor("next", key_values(rows[-1], keys)) if rows and has_next else None
+    prev = encode_cursor("prev", key_values(rows[0], keys)) if rows and has_prev else None
+    return KeysetPage(rows, per_page, next=next, prev=prev, total=total)
+
+# page a query in the order of keys (replacing any order it has), total is only counted on request
+def paginate(query, keys, cursor=None, per_page=20, count=False):
+    direction, position = decode_cursor(cursor) if cursor else ("next", None)
+    backwards = direction == "prev"
+    total = query.order_by(None).count() if count else None
+
+    if position is not None:
+        query = query.filter(keyset_filter(keys, position, reverse=backwards))
+
+    descending = lambda d: (d.upper() == "DESC") != backwards
+    ordering = [column.desc() if descending(d) else column.asc() for name, column, d in keys]
+    rows = query.order_by(None).order_by(*ordering).limit(per_page + 1).all()
+    return build_page(rows, keys, per_page, backwards, position, total)
+
+# page items already in the order of keys (for results merged in python)
+def paginate_items(items, keys, cursor=None, per_page=20, count=False):
+    direction, position = decode_cursor(cursor) if cursor else ("next", None)
+    backwards = direction == "prev"
+
+    ordered = list(reversed(items)) if backwards else list(items)
+    if position is not None:
+        ordered = [i for i in ordered if follows(key_values(i, keys), position, keys, reverse=backwards)]
+
+    total = len(items) if count else None
+    return build_page(ordered[:per_page + 1], keys, per_page, backwards, position, total)
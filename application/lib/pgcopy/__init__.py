@@ -0,0 +1,61 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# file-like reader over row tuples in COPY text format, rows are encoded as they are
+# read so a full payload is never held in memory (psycopg2 copy_expert only calls read)
+class CopyReader():
+
+    def __init__(self, rows, encoding="utf-8"):
+        self.rows = iter(rows)
+        self.encoding = encoding
+        self.buffer = bytearray()
+        self.count = 0
+
+    def __repr__(self):
+        return f"<CopyReader rows read: {self.count}>"
+
+    @classmethod
+    def escape(cls, value):
+        if value is None:
+            return "\\N"
+        if type(value) is int:
+            return str(value)
+
+        value = str(value)
+        for char, escaped in [("\\", "\\\\"), ("\t", "\\t"), ("\n", "\\n"), ("\r", "\\r")]:
+            value = value.replace(char, escaped)
+        return value
+
+    @classmethod
+    def format(cls, row):
+        return "\t".join([cls.escape(value) for value in row]) + "\n"
+
+    def read(self, size=-1):
+        while size < 0 or len(self.buffer) < size:
+            row = next(self.rows, None)
+            if row is None:
+                break
+            self.buffer += self.format(row).encode(self.encoding)
+            self.count += 1
+
+        size = len(self.buffer) if size < 0 else size
+        chunk = bytes(self.buffer[:size])
+        del self.buffer[:size]
+        return chunk
+
+
+# stream rows into table with COPY ... FROM STDIN on a DBAPI connection
+# runs inside the connection's current transaction, returns the number of rows copied
+def copy_rows(connection, table, columns, rows, size=64 * 1024):
+    statement = f"COPY {table} ({', '.join(columns)}) FROM STDIN"
+    reader = CopyReader(rows)
+    cursor = connection.cursor()
+    try:
+        cursor.copy_expert(statement, reader, size=size)
+    finally:
+        cursor.close()
+
+    logger.debug(f"copied {reader.count} rows into {table}")
+    return reader.count
@@ -0,0 +1,64 @@
+import re, logging
+from sqlalchemy import text
+from datetime import datetime as dt
+
+logger = logging.getLogger(__name__)
+
+
+# helpers for monthly range partitions on a timestamp column, partitions are named
+# <table>_yYYYYmMM and rows outside every month fall through to <table>_default
+def month_start(date):
+    return dt(date.year, date.month, 1)
+
+def add_months(date, months):
+    index = (date.year * 12) + (date.month - 1) + months
+    return dt(index // 12, (index % 12) + 1, 1)
+
+def partition_name(table, start):
+    return f"{table}_y{start.year}m{start.month:02d}"
+
+def default_partition_ddl(table):
+    return f"CREATE TABLE IF NOT EXISTS {table}_default PARTITION OF {table} DEFAULT"
+
+
+# monthly partitions of table as {name: month start}, oldest first
+def list_partitions(connection, table):
+    statement = text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE parent.relname = :table"
+    )
+    pattern = re.compile(rf"^{table}_y(\d{{4}})m(\d{{2}})$")
+    matches = [pattern.match(name) for name, in connection.execute(statement, table=table)]
+    months = {m.group(0): dt(int(m.group(1)), int(m.group(2)), 1) for m in matches if m}
+    return dict(sorted(months.items(), key=lambda item: item[1]))
+
+# rows already in the default partition block creating a partition for their month
+def default_has_rows(connection, table, start, column="timestamp"):
+    statement = text(
+        f"SELECT EXISTS (SELECT 1 FROM {table}_default "
+        f"WHERE {column} >= :start AND {column} < :end)"
+    )
+    return connection.execute(statement, start=start, end=add_months(start, 1)).scalar()
+
+def create_partition(connection, table, start):
+    name, end = partition_name(table, start), add_months(start, 1)
+    connection.execute(
+        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} "
+        f"FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')"
+    )
+    logger.info(f"created partition: {name}")
+    return name
+
+# detached partitions are left as standalone tables (to be archived), drop removes them
+def retire_partition(connection, table, name, action="detach"):
+    if action not in ["detach", "drop"]:
+        raise ValueError(f"Invalid partition action: '{action}', valid: ['detach', 'drop']")
+
+    connection.execute(f"ALTER TABLE {table} DETACH PARTITION {name}")
+    if action == "drop":
+        connection.execute(f"DROP TABLE {name}")
+
+    logger.info(f"retired partition: {name}, action: {action}")
+    return name
@@ -0,0 +1,106 @@
+from application.lib.throttle.bucket import TokenBucket
+from application.lib.throttle.breaker import CircuitBreaker
+import redis, time, asyncio, logging
+
+logger = logging.getLogger(__name__)
+
+
+class ThrottleError(Exception):
+    pass
+
+class CircuitOpen(ThrottleError):
+    pass
+
+class RateLimitExceeded(ThrottleError):
+    pass
+
+
+# rate limiter + circuit breaker for a remote host, state is shared via redis
+# redis errors fail open, so an unavailable redis never stops requests being made
+class Throttle():
+
+    # status codes treated as the remote being overloaded/unavailable
+    failure_codes = [429, 500, 502, 503, 504]
+
+    def __init__(self, name, bucket, breaker, enabled=True):
+        self.name = name
+        self.bucket = bucket
+        self.breaker = breaker
+        self.enabled = enabled
+
+    def __repr__(self):
+        return f"<Throttle name: {self.name}, enabled: {self.enabled}>"
+
+    @classmethod
+    def make(cls, name, config, client=None):
+        client = client or redis.Redis(host=config.REDIS_HOST, port=config.REDIS_PORT, db=0)
+        bucket = TokenBucket(
+            key=f"throttle:{name}:bucket",
+            rate=config.REMOTE_RATE_LIMIT,
+            capacity=config.REMOTE_RATE_BURST,
+            max_wait=config.REMOTE_THROTTLE_MAX_WAIT,
+            client=client
+        )
+        breaker = CircuitBreaker(
+            key=f"throttle:{name}:breaker",
+            threshold=config.REMOTE_BREAKER_THRESHOLD,
+            window=config.REMOTE_BREAKER_WINDOW,
+            reset_timeout=config.REMOTE_BREAKER_RESET,
+            client=client
+        )
+        return cls(name, bucket, breaker, enabled=config.REMOTE_THROTTLE_ENABLED)
+
+    # returns the seconds to wait before sending, raises if the request should be shed
+    def reserve(self):
+        if not self.enabled:
+            return 0
+
+        try:
+            if not self.breaker.allow():
+                raise CircuitOpen(f"circuit open for: {self.name}, request shed")
+
+            wait = self.bucket.reserve()
+        except redis.RedisError as e:
+            logger.warning(f"throttle unavailable for: {self.name}, error: {e}")
+            return 0
+
+        if wait is None:
+            raise RateLimitExceeded(f"rate limit wait exceeds {self.bucket.max_wait}s for: {self.name}")
+        return wait
+
+    def acquire(self):
+        wait = self.reserve()
+        if wait:
+            time.sleep(wait)
+
+    # redis-py blocks, so the event loop hands the redis calls to its executor
+    async def async_acquire(self):
+        wait = await asyncio.get_event_loop().run_in_executor(None, self.reserve)
+        if wait:
+            await asyncio.sleep(wait)
+
+    # status_code of None is a request that never got a response (timeout/connection error)
+    def record(self, status_code=None):
+        if not self.enabled:
+            return
+
+        success = status_code is not None and status_code not in self.failure_codes
+        try:
+            self.breaker.record(success)
+        except redis.RedisError as e:
+            logger.warning(f"throttle unavailable for: {self.name}, error: {e}")
+
+    async def async_record(self, status_code=None):
+        await asyncio.get_event_loop().run_in_executor(None, self.record, status_code)
+
+    def metrics(self):
+        metrics = {"name": self.name, "enabled": self.enabled}
+        try:
+            metrics["tokens"] = self.bucket.tokens()
+            metrics["capacity"] = self.bucket.capacity
+            metrics["breaker"] = self.breaker.state()
+            metrics["failures"] = self.breaker.failures()
+        except redis.RedisError as e:
+            metrics["error"] = str(e)
+
+        return metrics
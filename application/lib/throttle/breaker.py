@@ -0,0 +1,132 @@
+from math import ceil
+import redis, logging
+
+logger = logging.getLogger(__name__)
+
+
+# circuit breaker state shared via redis: closed -> open after threshold failures within window
+# once reset_timeout has passed a single trial request is let through (half open),
+# success closes the circuit and failure re-opens it. state is read and moved on atomically (lua)
+# against the redis clock, so processes sharing a breaker always agree on each transition
+class CircuitBreaker():
+
+    states = ["closed", "open", "half_open"]
+
+    # KEYS: breaker, failures, trial. ARGV: reset_timeout, trial_timeout
+    # returns {allowed, state}, a half open breaker hands out a single trial
+    ALLOW_SCRIPT = """
+        redis.replicate_commands()
+        local time = redis.call("TIME")
+        local now = tonumber(time[1]) + (tonumber(time[2]) / 1000000)
+        local breaker = redis.call("HMGET", KEYS[1], "state", "opened_at")
+        local state = breaker[1] or "closed"
+
+        if state == "closed" then
+            return {1, state}
+        end
+        if (now - (tonumber(breaker[2]) or 0)) < tonumber(ARGV[1]) then
+            return {0, "open"}
+        end
+
+        local trial = redis.call("SET", KEYS[3], 1, "NX", "EX", tonumber(ARGV[2]))
+        return {trial and 1 or 0, "half_open"}
+    """
+
+    # KEYS: breaker, failures, trial. ARGV: success, threshold, window, reset_timeout
+    # returns {transition, failures}, transition is "opened", "closed" or ""
+    RECORD_SCRIPT = """
+        redis.replicate_commands()
+        local time = redis.call("TIME")
+        local now = tonumber(time[1]) + (tonumber(time[2]) / 1000000)
+        local breaker = redis.call("HMGET", KEYS[1], "state", "opened_at")
+        local state = breaker[1] or "closed"
+        local half_open = state == "open" and (now - (tonumber(breaker[2]) or 0)) >= tonumber(ARGV[4])
+
+        if ARGV[1] == "1" then
+            if state == "closed" then
+                return {"", 0}
+            end
+            redis.call("HMSET", KEYS[1], "state", "closed", "opened_at", 0)
+            redis.call("DEL", KEYS[2], KEYS[3])
+            return {"closed", 0}
+        end
+
+        local failures = redis.call("INCR", KEYS[2])
+        if failures == 1 then
+            redis.call("EXPIRE", KEYS[2], tonumber(ARGV[3]))
+        end
+        if half_open or (state == "closed" and failures >= tonumber(ARGV[2])) then
+            redis.call("HMSET", KEYS[1], "state", "open", "opened_at", tostring(now))
+            redis.call("DEL", KEYS[3])
+            return {"opened", failures}
+        end
+        return {"", failures}
+    """
+
+    def __init__(self, key, threshold, window, reset_timeout, client):
+        self.key = key
+        self.threshold = threshold
+        self.window = window
+        self.reset_timeout = reset_timeout
+        self.client = client
+        self.allow_script = client.register_script(self.ALLOW_SCRIPT)
+        self.record_script = client.register_script(self.RECORD_SCRIPT)
+
+    def __repr__(self):
+        return f"<CircuitBreaker key: {self.key}, threshold: {self.threshold}/{self.window}s>"
+
+    @property
+    def failures_key(self):
+        return f"{self.key}:failures"
+
+    @property
+    def trial_key(self):
+        return f"{self.key}:trial"
+
+    @property
+    def keys(self):
+        return [self.key, self.failures_key, self.trial_key]
+
+    def now(self):
+        seconds, microseconds = self.client.time()
+        return seconds + (microseconds / 1_000_000)
+
+    def state(self):
+        state, opened_at = self.client.hmget(self.key, "state", "opened_at")
+        state = state.decode() if state else "closed"
+        if state == "open" and (self.now() - float(opened_at)) >= self.reset_timeout:
+            state = "half_open"
+        return state
+
+    def failures(self):
+        return int(self.client.get(self.failures_key) or 0)
+
+    def allow(self):
+        trial_timeout = max(1, ceil(self.reset_timeout))
+        allowed, state = self.allow_script(keys=self.keys, args=[self.reset_timeout, trial_timeout])
+        return bool(allowed)
+
+    def record(self, success):
+        args = [1 if success else 0, self.threshold, self.window, self.reset_timeout]
+        transition, failures = self.record_script(keys=self.keys, args=args)
+        transition = transition.decode() if isinstance(transition, bytes) else transition
+
+        if transition == "opened":
+            logger.warning(f"circuit breaker opened: {self.key}, failures: {failures}")
+        elif transition == "closed":
+            logger.info(f"circuit breaker closed: {self.key}")
+        return transition or None
+
+    def open(self):
+        logger.warning(f"circuit breaker opened: {self.key}")
+        pipe = self.client.pipeline()
+        pipe.hset(self.key, mapping={"state": "open", "opened_at": self.now()})
+        pipe.delete(self.trial_key)
+        pipe.execute()
+
+    def close(self):
+        logger.info(f"circuit breaker closed: {self.key}")
+        pipe = self.client.pipeline()
+        pipe.hset(self.key, mapping={"state": "closed", "opened_at": 0})
+        pipe.delete(self.failures_key, self.trial_key)
+        pipe.execute()
@@ -0,0 +1,59 @@
+import redis, logging
+
+logger = logging.getLogger(__name__)
+
+
+# token bucket held in redis so every process/session shares the same allowance
+# tokens are reserved atomically (lua), callers sleep for the returned wait instead of polling
+class TokenBucket():
+
+    RESERVE_SCRIPT = """
+        redis.replicate_commands()
+        local rate = tonumber(ARGV[1])
+        local capacity = tonumber(ARGV[2])
+        local requested = tonumber(ARGV[3])
+        local max_wait = tonumber(ARGV[4])
+
+        local time = redis.call("TIME")
+        local now = tonumber(time[1]) + (tonumber(time[2]) / 1000000)
+        local bucket = redis.call("HMGET", KEYS[1], "tokens", "updated_at")
+        local tokens = tonumber(bucket[1]) or capacity
+        local updated_at = tonumber(bucket[2]) or now
+
+        tokens = math.min(capacity, tokens + (math.max(0, now - updated_at) * rate))
+        local wait = math.max(0, (requested - tokens) / rate)
+        if wait > max_wait then
+            return {tostring(tokens), "-1"}
+        end
+
+        tokens = tokens - requested
+        redis.call("HMSET", KEYS[1], "tokens", tostring(tokens), "updated_at", tostring(now))
+        redis.call("EXPIRE", KEYS[1], math.ceil((capacity / rate) + max_wait) + 1)
+        return {tostring(tokens), tostring(wait)}
+    """
+
+    def __init__(self, key, rate, capacity, max_wait, client):
+        self.key = key
+        self.rate = rate
+        self.capacity = capacity
+        self.max_wait = max_wait
+        self.client = client
+        self.script = client.register_script(self.RESERVE_SCRIPT)
+
+    def __repr__(self):
+        return f"<TokenBucket key: {self.key}, rate: {self.rate}/s, capacity: {self.capacity}>"
+
+    # returns seconds to wait before the reserved tokens may be spent, None if over max_wait
+    def reserve(self, tokens=1):
+        remaining, wait = self.run(tokens)
+        return wait if wait >= 0 else None
+
+    # current (refilled) token count, reserving nothing
+    def tokens(self):
+        remaining, wait = self.run(0)
+        return remaining
+
+    def run(self, tokens):
+        args = [self.rate, self.capacity, tokens, self.max_wait]
+        remaining, wait = self.script(keys=[self.key], args=args)
+        return float(remaining), float(wait)
@@ -7,6 +7,7 @@ from alembic.config import Config
 from faker import Faker
 from faker.providers import lorem
 from functools import wraps
+from concurrent.futures import Future
 import os, logging, json
 
 from application.tests.utils import Compose
@@ -24,6 +25,11 @@ ALEMBIC_CONFIG = "../../migrations/alembic.ini"
 def rkwargs(request):
     return getattr(request, "param", {})
 
+def completed_future(result):
+    future = Future()
+    future.set_result(result)
+    return future
+
 def init_faker():
     faker = Faker()
     faker.add_provider(lorem)
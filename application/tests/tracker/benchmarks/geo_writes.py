@@ -0,0 +1,75 @@
+from application import create_app, db
+from application.tests.tracker.remote_server import FakeCatalogue
+from application.tracker.models import Petition, Record
+from datetime import datetime as dt
+import argparse, json, time, logging
+
+logger = logging.getLogger(__name__)
+
+
+
+# compare the signatures_by write paths (rows/sec) for a geo poll of the catalogue
+# methods: orm/copy write signatures_by_* rows, packed writes count arrays on the record
+# petitions are inserted, recorded and rolled back each round, only save_geo_data is timed
+# python -m application.tests.tracker.benchmarks.geo_writes --size 200 --rounds 3
+def run(catalogue, methods=None, rounds=3):
+    results = []
+    for method in (methods or ["orm", "copy", "packed"]):
+        timings = [run_round(catalogue, method) for i in range(rounds)]
+        rows, seconds = timings[0][0], min(t[1] for t in timings)
+        results.append({
+            "method": method,
+            "petitions": catalogue.size,
+            "rows": rows,
+            "best_secs": round(seconds, 3),
+            "rows_per_sec": round(rows / seconds, 1),
+        })
+
+    for result in results:
+        logger.info(f"benchmark completed: {result}")
+    return results
+
+def run_round(catalogue, method):
+    try:
+        records = seed_records(catalogue)
+        rows = sum(len(list(Record.signature_rows(r, geo))) for r in records for geo in Record.GEOGRAPHIES)
+
+        started_at = time.perf_counter()
+        Petition.save_geo_data(records, **write_kwargs(method))
+        return rows, time.perf_counter() - started_at
+    finally:
+        db.session.rollback()
+
+def write_kwargs(method):
+    return {"storage": "packed"} if method == "packed" else {"storage": "rows", "method": method}
+
+def seed_records(catalogue):
+    petitions = []
+    for id in catalogue.petitions:
+        data = catalogue.detail(id, {"self": f"https://petition.parliament.uk/petitions/{id}.json"})
+        petition = Petition(id=id, initial_data=data)
+        petitions.append(petition.sync(data, dt.now()))
+
+    db.session.add_all(petitions)
+    db.session.flush()
+    return Petition.save_base_data(petitions)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="signatures_by write path benchmark")
+    parser.add_argument("--size", type=int, default=100, help="number of geographic petitions")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--methods", type=lambda v: v.split(","), default=None)
+    parser.add_argument("--seed", type=int, default=1)
+    return parser.parse_args()
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    args = parse_args()
+    app = create_app(__name__)
+    with app.app_context():
+        catalogue = FakeCatalogue(size=args.size, geographic=True, seed=args.seed)
+        results = run(catalogue, args.methods, args.rounds)
+    print(json.dumps({"results": results}, indent=2))
+
+if __name__ == "__main__":
+    main()
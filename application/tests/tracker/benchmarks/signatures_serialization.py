@@ -0,0 +1,99 @@
+from application import create_app, db
+from application.lib.fastjson import JSONCodec
+from application.tests.tracker.remote_server import FakeCatalogue
+from application.tracker.models import Petition, Record, RecordSchema
+from application.tracker.serializers import SignaturesSerializer
+from datetime import datetime as dt
+from datetime import timedelta
+import argparse, json, time, logging
+
+logger = logging.getLogger(__name__)
+
+
+
+# compare the signatures_by/<geography> payload paths (records/sec) for a petition's history
+# schema: records joined with their signatures_by rows, dumped by RecordSchema.dump_query, encoded as jsonify
+# compiled: records with one Core select of their rows, dumped by SignaturesSerializer, encoded by JSONCodec
+# history is inserted, read back and rolled back, the query, dump and encode are timed
+# python -m application.tests.tracker.benchmarks.signatures_serialization --records 500 --rounds 3
+def run(petition, geographies=None, rounds=3, storage="rows"):
+    results = []
+    for geography in (geographies or Record.GEOGRAPHIES):
+        timings = {path: min(run_round(petition, geography, path) for i in range(rounds)) for path in PATHS}
+        records = petition.records.filter_by(geographic=True).count()
+        results.append({
+            "geography": geography,
+            "storage": storage,
+            "records": records,
+            **{f"{path}_secs": round(seconds, 3) for path, seconds in timings.items()},
+            **{f"{path}_per_sec": round(records / seconds, 1) for path, seconds in timings.items()},
+            "speedup": round(timings["schema"] / timings["compiled"], 2),
+        })
+
+    for result in results:
+        logger.info(f"benchmark completed: {result}")
+    return results
+
+def schema_payload(petition, geography):
+    query = petition.record_query(geographic=True, join_on=geography)
+    signatures = RecordSchema.dump_query(query.all(), geography, exclude=["id", "record", "timestamp"])
+    return signatures, json.dumps(signatures, indent=2, separators=(", ", ": "), sort_keys=True)
+
+def compiled_payload(petition, geography):
+    query = petition.record_query(geographic=True, join_on=geography, load_rows=False)
+    signatures = SignaturesSerializer(geography).dump_many(query.all())
+    return signatures, JSONCodec().encode(signatures, pretty=True)
+
+PATHS = {"schema": schema_payload, "compiled": compiled_payload}
+
+def run_round(petition, geography, path):
+    db.session.expire_all()
+    started_at = time.perf_counter()
+    PATHS[path](petition, geography)
+    return time.perf_counter() - started_at
+
+# payloads must be identical before either is timed
+def validate(petition, geographies=None):
+    for geography in (geographies or Record.GEOGRAPHIES):
+        schema, compiled = schema_payload(petition, geography)[0], compiled_payload(petition, geography)[0]
+        if schema != compiled:
+            raise AssertionError(f"compiled payload differs from schema payload for: {geography}")
+
+def seed_history(catalogue, records, storage):
+    id = next(iter(catalogue.petitions))
+    links = {"self": f"https://petition.parliament.uk/petitions/{id}.json"}
+    petition = Petition(id=id, initial_data=catalogue.detail(id, links))
+    started_at = dt.now() - timedelta(hours=records)
+    db.session.add(petition.sync(catalogue.detail(id, links), started_at))
+    db.session.flush()
+
+    for i in range(records):
+        petition.sync(catalogue.detail(id, links), started_at + timedelta(hours=i))
+        Petition.save_geo_data(Petition.save_base_data([petition]), storage=storage)
+    return petition
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="signatures payload serialization benchmark")
+    parser.add_argument("--records", type=int, default=200, help="number of geographic records")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--geographies", type=lambda v: v.split(","), default=None)
+    parser.add_argument("--storage", default="rows", choices=["rows", "packed", "delta"])
+    parser.add_argument("--seed", type=int, default=1)
+    return parser.parse_args()
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    args = parse_args()
+    app = create_app(__name__)
+    with app.app_context():
+        try:
+            catalogue = FakeCatalogue(size=1, geographic=True, time_scale=3600, seed=args.seed)
+            petition = seed_history(catalogue, args.records, args.storage)
+            validate(petition, args.geographies)
+            results = run(petition, args.geographies, args.rounds, args.storage)
+        finally:
+            db.session.rollback()
+    print(json.dumps({"results": results}, indent=2))
+
+if __name__ == "__main__":
+    main()
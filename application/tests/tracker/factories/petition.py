@@ -257,6 +257,7 @@ class PetitionFactoryManager():
             entry.records.base = Record(**dict(**params, **base))
             session.add(entry.records.base)
             session.flush()
+            self.petition.track_latest(entry.records.base)
         if geo.pop("save", False):
             entry.records.geo = Record(**dict(**params, **base))
             session.add(entry.records.geo)
@@ -264,6 +265,7 @@ class PetitionFactoryManager():
             attributes = self.petition.latest_data["data"]["attributes"]
             signatures_by = entry.records.geo.build(attributes)
             session.bulk_save_objects(signatures_by)
+            self.petition.track_latest(entry.records.geo)
 
         session.commit()
 
@@ -121,7 +121,7 @@ class QueryFactory():
         response = requests.Response()
         response.status_code = 200
         response.url = url
-        response.json = MagicMock(return_value=deepcopy(data))
+        response._content = json.dumps(data).encode()
         response.result = MagicMock(return_value=response)
         return response
 
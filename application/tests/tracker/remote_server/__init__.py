@@ -0,0 +1,2 @@
+from application.tests.tracker.remote_server.catalogue import FakeCatalogue
+from application.tests.tracker.remote_server.server import RemoteServer, Latency
@@ -0,0 +1,60 @@
+from application.tests.tracker.remote_server import FakeCatalogue, RemoteServer, Latency
+from application.tests.tracker.remote_server import benchmark
+import argparse, json, logging
+
+logger = logging.getLogger(__name__)
+
+# python -m application.tests.tracker.remote_server --size 10000 --latency lognormal:0.05:0.5 --bench
+def parse_args():
+    parser = argparse.ArgumentParser(description="stand-in petitions API for load tests/benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--size", type=int, default=1000, help="number of petitions in the catalogue")
+    parser.add_argument("--state", default="open")
+    parser.add_argument("--geographic", action="store_true", help="include signatures_by data")
+    parser.add_argument("--growth-median", type=float, default=0.05, help="median signatures/second")
+    parser.add_argument("--growth-sigma", type=float, default=2.0)
+    parser.add_argument("--time-scale", type=float, default=1, help="simulated seconds per second")
+    parser.add_argument("--latency", default="fixed:0", help="fixed:s, uniform:min:max, lognormal:median:sigma")
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--error-codes", type=lambda v: [int(c) for c in v.split(",")], default=None)
+    parser.add_argument("--per-page", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--gzip", action="store_true", help="gzip bodies for clients that accept it")
+    parser.add_argument("--bench", action="store_true", help="run the RemotePetition benchmark and exit")
+    parser.add_argument("--engines", type=lambda v: v.split(","), default=None)
+    parser.add_argument("--max-retries", type=int, default=3)
+    return parser.parse_args()
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    args = parse_args()
+    catalogue = FakeCatalogue(
+        size=args.size,
+        state=args.state,
+        geographic=args.geographic,
+        growth={"median": args.growth_median, "sigma": args.growth_sigma},
+        time_scale=args.time_scale,
+        seed=args.seed
+    )
+    server = RemoteServer(
+        catalogue,
+        host=args.host,
+        port=args.port,
+        latency=Latency.parse(args.latency),
+        error_rate=args.error_rate,
+        error_codes=args.error_codes,
+        per_page=args.per_page,
+        seed=args.seed,
+        compress=args.gzip
+    )
+
+    if not args.bench:
+        return server.serve_forever()
+
+    with server:
+        results = benchmark.run(server, args.engines, args.state, args.max_retries)
+    print(json.dumps({"results": results, "server": dict(server.stats)}, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+from unittest import mock
+from application.tracker.remote import RemotePetition
+import time, logging
+
+logger = logging.getLogger(__name__)
+
+
+
+# time a full listing query then a detail fetch of every listed petition, per engine
+# the shared rate limiter is disabled unless throttle=True, the stand-in is the only target
+def run(server, engines=None, state="open", max_retries=3, backoff=0.1, throttle=False):
+    results = []
+    with mock.patch.object(RemotePetition, "base_url", server.base_url), \
+            mock.patch.object(RemotePetition.throttle, "enabled", throttle):
+        for engine in (engines or RemotePetition.engines):
+            with mock.patch.object(RemotePetition, "engine", engine):
+                results.append(run_engine(engine, state, max_retries, backoff))
+
+    for result in results:
+        logger.info(f"benchmark completed: {result}")
+    return results
+
+def run_engine(engine, state, max_retries, backoff):
+    started_at = time.monotonic()
+    query = RemotePetition.async_query(state=state, max_retries=max_retries, backoff=backoff)
+    ids = [item["id"] for item in RemotePetition.unpack_query(query)]
+    queried_at = time.monotonic()
+
+    fetched = RemotePetition.async_get(ids, max_retries=max_retries, backoff=backoff)
+    completed_at = time.monotonic()
+
+    requests = len(query["success"]) + len(query["failed"]) + len(ids)
+    return {
+        "engine": engine,
+        "pages": len(query["success"]),
+        "petitions": len(fetched["success"]),
+        "failed": len(query["failed"]) + len(fetched["failed"]),
+        "query_secs": round(queried_at - started_at, 3),
+        "fetch_secs": round(completed_at - queried_at, 3),
+        "requests_per_sec": round(requests / (completed_at - started_at), 1),
+        "fetch_stats": fetched["stats"],
+    }
@@ -0,0 +1,123 @@
+import numpy
+from munch import Munch as ObjDict
+from datetime import datetime as dt
+from copy import deepcopy
+import time, math, random, logging
+from application.tests.tracker.factories.petition import PetitionFactory
+from application.tests.tracker.conftest import geography_keys, iso_if_dt
+
+logger = logging.getLogger(__name__)
+
+
+
+# remote petitions served by the stand-in server, built with the test factories
+# each petition has its own signature growth rate (signatures/second, log-normally distributed)
+# geographic breakdowns are stored compactly (shared locale templates + counts) and scaled
+# to the current signature count when served
+class FakeCatalogue():
+
+    def __init__(self, size=1000, state="open", geographic=False, growth=None, time_scale=1, seed=None):
+        self.size = size
+        self.state = state
+        self.geographic = geographic
+        self.growth = {"median": 0.05, "sigma": 2.0, **(growth or {})}
+        self.time_scale = time_scale
+        self.random = random.Random(seed)
+        self.templates = {}
+        self.seed_factories(seed)
+        self.petitions = self.build()
+        self.started_at = time.monotonic()
+
+    def __repr__(self):
+        return f"<FakeCatalogue size: {self.size}, state: {self.state}, geographic: {self.geographic}>"
+
+    def seed_factories(self, seed):
+        if seed is not None:
+            random.seed(seed)
+            numpy.random.seed(seed)
+            PetitionFactory.fake.seed_instance(seed)
+
+    def build(self):
+        logger.info(f"building stand-in catalogue of {self.size} petitions")
+        defaults = {"signature_count": range(100, 250_000), "state": self.state}
+        if self.geographic:
+            defaults["signatures_by"] = {"locales": "auto"}
+
+        petitions = {}
+        for petition in PetitionFactory.build(generic=self.size, defaults=defaults):
+            petitions[petition.data.id] = self.compact(petition)
+        return petitions
+
+    def compact(self, petition):
+        data = deepcopy(petition.as_dict["data"])
+        attributes = data.pop("attributes")
+        signatures_by = {k: self.intern(attributes.pop(k, [])) for k in geography_keys()}
+        return ObjDict(
+            data=data,
+            attributes=attributes,
+            signatures_by=signatures_by,
+            signature_count=attributes["signature_count"],
+            rate=self.random.lognormvariate(math.log(self.growth["median"]), self.growth["sigma"])
+        )
+
+    # locale dicts without their counts are shared between petitions
+    def intern(self, locales):
+        interned = []
+        for locale in locales:
+            key = tuple((k, v) for k, v in sorted(locale.items()) if k != "signature_count")
+            interned.append((self.templates.setdefault(key, dict(key)), locale["signature_count"]))
+        return interned
+
+    @property
+    def elapsed(self):
+        return (time.monotonic() - self.started_at) * self.time_scale
+
+    def ids(self, state="all"):
+        listed = "open" if state == "recent" else state
+        return [id for id, p in self.petitions.items() if state == "all" or p.attributes["state"] == listed]
+
+    def signature_count(self, id):
+        petition = self.petitions[id]
+        return petition.signature_count + int(petition.rate * self.elapsed)
+
+    # listing order: recent is newest first, everything else by signature count (as remote)
+    def listing(self, state):
+        ids = self.ids(state)
+        if state == "recent":
+            return sorted(ids, reverse=True)
+        return sorted(ids, key=self.signature_count, reverse=True)
+
+    def item(self, id, links):
+        petition = self.petitions[id]
+        attributes = dict(petition.attributes, signature_count=self.signature_count(id))
+        return {**petition.data, "links": links, "attributes": attributes}
+
+    def detail(self, id, links):
+        petition = self.petitions[id]
+        signature_count = self.signature_count(id)
+        item = self.item(id, links)
+        item["attributes"].update(self.signatures_by(petition, signature_count))
+        return {"links": links, "data": item}
+
+    # country counts sum to the total, region/constituency counts sum to the UK count
+    def signatures_by(self, petition, signature_count):
+        countries = self.scale(petition.signatures_by["signatures_by_country"], signature_count)
+        uk_count = next((c for t, c in countries if t.get("code") == "GB"), 0)
+        scaled = {
+            "signatures_by_country": countries,
+            "signatures_by_region": self.scale(petition.signatures_by["signatures_by_region"], uk_count),
+            "signatures_by_constituency": self.scale(petition.signatures_by["signatures_by_constituency"], uk_count),
+        }
+        return {k: [dict(t, signature_count=c) for t, c in v] for k, v in scaled.items()}
+
+    def scale(self, locales, total):
+        base = sum(count for template, count in locales)
+        if not base:
+            return locales
+
+        scaled = [(template, (count * total) // base) for template, count in locales]
+        remainder = total - sum(count for template, count in scaled)
+        if remainder:
+            largest = max(range(len(scaled)), key=lambda i: scaled[i][1])
+            scaled[largest] = (scaled[largest][0], scaled[largest][1] + remainder)
+        return scaled
@@ -0,0 +1,186 @@
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from socketserver import ThreadingMixIn
+from urllib.parse import urlparse, parse_qs
+from collections import Counter
+import re, json, gzip, math, time, random, threading, logging
+
+logger = logging.getLogger(__name__)
+
+
+
+# request latency in seconds, sampled per request
+# spec: {"distribution": "fixed", "value": s} | "uniform" min/max | "lognormal" median/sigma
+class Latency():
+
+    def __init__(self, distribution="fixed", rng=None, **params):
+        self.distribution = distribution
+        self.params = params
+        self.random = rng or random.Random()
+        self.samplers = {
+            "fixed": lambda value=0: value,
+            "uniform": lambda min=0, max=0: self.random.uniform(min, max),
+            "lognormal": lambda median=0.05, sigma=0.5: self.random.lognormvariate(math.log(median), sigma)
+        }
+        if distribution not in self.samplers:
+            raise ValueError(f"Invalid latency distribution: '{distribution}', valid: {list(self.samplers)}")
+
+    def __repr__(self):
+        return f"<Latency {self.distribution}: {self.params}>"
+
+    # parse a cli spec, eg: "fixed:0.05", "uniform:0.01:0.2", "lognormal:0.05:0.5"
+    @classmethod
+    def parse(cls, spec, rng=None):
+        names = {"fixed": ["value"], "uniform": ["min", "max"], "lognormal": ["median", "sigma"]}
+        distribution, *values = spec.split(":")
+        params = dict(zip(names.get(distribution, []), map(float, values)))
+        return cls(distribution, rng=rng, **params)
+
+    def sample(self):
+        return max(0, self.samplers[self.distribution](**self.params))
+
+
+class ThreadedHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+# local stand-in for the petition.parliament.uk json endpoints used by RemotePetition:
+#   /petitions.json?page=&state=  and  /petitions/<id>.json (etag/if-none-match supported)
+# a share of requests (error_rate) fail with one of error_codes, 429s include Retry-After
+# bodies are gzipped for clients that accept it when compress=True
+class RemoteServer():
+
+    detail_path = re.compile(r"^/petitions/(?P<id>\d+)\.json$")
+    listing_path = "/petitions.json"
+
+    def __init__(self, catalogue, host="127.0.0.1", port=0, latency=None, error_rate=0,
+                 error_codes=None, per_page=50, seed=None, compress=False):
+        self.catalogue = catalogue
+        self.random = random.Random(seed)
+        self.latency = latency or Latency("fixed", value=0)
+        self.error_rate = error_rate
+        self.error_codes = error_codes or [500, 502, 503, 429]
+        self.per_page = per_page
+        self.compress = compress
+        self.stats = Counter()
+        self.lock = threading.Lock()
+        self.httpd = ThreadedHTTPServer((host, port), self.make_handler())
+        self.thread = None
+
+    def __repr__(self):
+        return f"<RemoteServer {self.base_url}, {self.catalogue}, latency: {self.latency}>"
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        logger.info(f"stand-in remote started: {self}")
+        return self
+
+    def serve_forever(self):
+        logger.info(f"stand-in remote serving: {self}")
+        try:
+            self.httpd.serve_forever()
+        finally:
+            self.httpd.server_close()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        logger.info(f"stand-in remote stopped, stats: {dict(self.stats)}")
+
+    def make_handler(self):
+        server = self
+        class Handler(RequestHandler):
+            remote = server
+        return Handler
+
+    def count(self, route, status):
+        with self.lock:
+            self.stats[f"{route}:{status}"] += 1
+
+    # returns (status, headers, body)
+    def respond(self, path, headers):
+        url = urlparse(path)
+        detail = self.detail_path.match(url.path)
+        route = "detail" if detail else "listing" if url.path == self.listing_path else "unknown"
+        time.sleep(self.latency.sample())
+
+        if route != "unknown" and self.random.random() < self.error_rate:
+            status = self.random.choice(self.error_codes)
+            response = (status, {"Retry-After": "1"} if status == 429 else {}, b"")
+        elif route == "detail":
+            response = self.detail(int(detail.group("id")), headers)
+        elif route == "listing":
+            response = self.listing(parse_qs(url.query))
+        else:
+            response = (404, {}, b"")
+
+        self.count(route, response[0])
+        return response
+
+    def detail(self, id, headers):
+        if id not in self.catalogue.petitions:
+            return (404, {}, b"")
+
+        etag = f'"{id}-{self.catalogue.signature_count(id)}"'
+        if headers.get("If-None-Match") == etag:
+            return (304, {"ETag": etag}, b"")
+
+        links = {"self": f"{self.base_url}/petitions/{id}.json"}
+        body = json.dumps(self.catalogue.detail(id, links)).encode()
+        return (200, {"ETag": etag}, body)
+
+    def listing(self, params):
+        state = (params.get("state") or ["all"])[0]
+        index = int((params.get("page") or [1])[0])
+        ids = self.catalogue.listing(state)
+        last = max(1, math.ceil(len(ids) / self.per_page))
+        page_ids = ids[(index - 1) * self.per_page:index * self.per_page]
+
+        page_url = lambda num: f"{self.base_url}{self.listing_path}?page={num}&state={state}"
+        links = {
+            "self": page_url(index),
+            "first": f"{self.base_url}{self.listing_path}?state={state}",
+            "last": page_url(last),
+            "next": page_url(index + 1) if index < last else None,
+            "prev": page_url(index - 1) if index > 1 else None,
+        }
+
+        item_links = lambda id: {"self": f"{self.base_url}/petitions/{id}.json"}
+        data = [self.catalogue.item(id, item_links(id)) for id in page_ids]
+        body = json.dumps({"links": links, "data": data}).encode()
+        return (200, {}, body)
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+
+    protocol_version = "HTTP/1.1"
+    remote = None
+
+    def do_GET(self):
+        status, headers, body = self.remote.respond(self.path, self.headers)
+        self.send_response(status)
+        if body:
+            self.send_header("Content-Type", "application/json")
+        if body and self.remote.compress and "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body, compresslevel=6)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
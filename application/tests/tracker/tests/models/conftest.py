@@ -6,7 +6,7 @@ from unittest.mock import MagicMock, PropertyMock, create_autospec
 from application.tests import FROZEN_DATETIME, FROZEN_TIME_STR
 from freezegun.api import FakeDate, FakeDatetime
 
-from application.tests.conftest import rkwargs
+from application.tests.conftest import rkwargs, completed_future
 from application.tracker.models import Petition, Record
 from application.tracker.models import (
     SignaturesByCountry,
@@ -222,16 +222,15 @@ class TestPetitionModelRequests(TestPetitionModel):
         self.patches.async_get = mock.patch(import_path, wraps=RemotePetition.async_get)
         self.mocks.async_get = self.patches.async_get.start()
 
-    def mock_future_get(self, url, hooks):
+    def mock_future_get(self, url, hooks, headers=None):
         callback = hooks["response"]
         response = requests.Response()
         response.url = url
         response.status_code = 200
         petition_data = self.remote_data[int(self.id_from_url(url))]
-        response.json = MagicMock(return_value=petition_data.as_dict)
-        response.result = MagicMock(return_value=response)
+        response._content = json.dumps(petition_data.as_dict).encode()
         callback(response=response)
-        return response
+        return completed_future(response)
 
     def patch_future_session(self):
         import_path = f"{self.base_import_path}.RemotePetition.future_session"
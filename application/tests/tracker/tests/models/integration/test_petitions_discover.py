@@ -2,7 +2,7 @@ import pytest
 from munch import Munch as ObjDict
 from unittest.mock import MagicMock, PropertyMock, create_autospec
 from application.tests import FROZEN_DATETIME, FROZEN_TIME_STR
-from application.tests.conftest import rkwargs
+from application.tests.conftest import rkwargs, completed_future
 from application.tests.tracker.tests.models.conftest import TestPetitionModelRequests
 from application.tests.tracker.factories.query import QueryFactory
 from application.tests.tracker.factories.petition import PetitionFactory
@@ -30,38 +30,34 @@ class TestPetitionDiscover(TestPetitionModelRequests):
     @pytest.fixture(autouse=True, scope="function")
     def context(self):
         self.configure()
-        self.patch_async_query()
-        self.patch_session_get("standard_session")
+        self.patch_async_stream()
         self.patch_session_get("future_session")
 
         yield
 
         for p in self.patches.values(): p.stop()
 
-    def patch_async_query(self):
-        import_path =  f"{self.base_import_path}.Petition.remote.async_query"
-        self.patches.async_query = mock.patch(import_path, wraps=Petition.remote.async_query)
-        self.mocks.async_query = self.patches.async_query.start()
+    def patch_async_stream(self):
+        import_path =  f"{self.base_import_path}.Petition.remote.async_stream"
+        self.patches.async_stream = mock.patch(import_path, wraps=Petition.remote.async_stream)
+        self.mocks.async_stream = self.patches.async_stream.start()
 
-    def mock_standard_get(self, url):
-        return self.query.get(url)
-
-    def mock_future_get(self, url, hooks):
+    def mock_future_get(self, url, hooks, headers=None):
         callback = hooks["response"]
         response = self.query.get(url)
         callback(response=response)
-        response.result = MagicMock(return_value=response)
-        return response
+        return completed_future(response)
 
     def test_unpopulated_petitions_are_discovered(self, app):
         self.query = QueryFactory(imports=self.to_be_discovered, items_per_page=self.counts["page"])
         results = Petition.discover(state="open")
-        assert Petition.remote.async_query.call_count == 1
+        assert Petition.remote.async_stream.call_count == 1
+        assert Petition.remote.future_session.get.call_count == self.query.num_pages
         assert len(results) == self.counts["discovered"]
         assert len(results - {p.data.id for p in self.to_be_discovered}) == 0
 
     def test_existing_petitions_are_not_discovered(self, app):
         self.query = QueryFactory(imports=self.petition_data, items_per_page=self.counts["page"])
         results = Petition.discover(state="open")
-        assert Petition.remote.async_query.call_count == 1
+        assert Petition.remote.async_stream.call_count == 1
         assert len(results) == 0
\ No newline at end of file
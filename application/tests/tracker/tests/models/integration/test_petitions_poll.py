@@ -3,16 +3,19 @@ from munch import Munch as ObjDict
 from freezegun import freeze_time
 from unittest.mock import MagicMock, PropertyMock, create_autospec
 from application.tests import FROZEN_DATETIME, FROZEN_TIME_STR
-from application.tests.conftest import rkwargs
+from application.tests.conftest import rkwargs, completed_future
 from application.tests.tracker.tests.models.conftest import TestPetitionModelRequests
 from application.tests.tracker.factories.petition import PetitionFactory, PetitionFactoryManager
 from application.tracker.remote import RemotePetition
-from application.tracker.models import Petition, Record
+from application.tracker.models import Petition, Record, RecordSchema
+from application.tracker.serializers import SignaturesSerializer
 from application.models import Setting
+from flask import current_app
 from unittest import mock
 from copy import deepcopy
 from random import randrange
 from datetime import datetime as dt
+from datetime import timedelta
 import os, json, logging, random, requests
 
 logger = logging.getLogger(__name__)
@@ -30,6 +33,14 @@ class TestPetitionPoll(TestPetitionModelRequests):
 
     polled_at = FROZEN_DATETIME
 
+    @pytest.fixture(autouse=True)
+    def clear_last_recorded(self, app):
+        keys = [Petition.last_recorded_key(geographic) for geographic in (False, True)]
+        keys.append(Petition.TRENDING_KEY)
+        current_app.redis.delete(*keys)
+        yield
+        current_app.redis.delete(*keys)
+
     @classmethod
     def configure_poll(cls, session):
         cls.initialize_data()
@@ -54,18 +65,19 @@ class TestPetitionPoll(TestPetitionModelRequests):
 
             cls.petition_managers[manager.petition_id] = manager
 
-    def mock_future_get(self, url, hooks):
+    def mock_future_get(self, url, hooks, headers=None):
         callback = hooks["response"]
         response = requests.Response()
         response.url = url
-        response.status_code = 200
         petition_manager = self.petition_managers[int(self.id_from_url(url))]
         petition_data = petition_manager.current.petition.as_dict
-        response.json = MagicMock(return_value=petition_data)
-        response.result = MagicMock(return_value=response)
+        etag = f'"{petition_manager.petition_id}-{petition_manager.current_index}"'
+        response.status_code = 304 if (headers or {}).get("If-None-Match") == etag else 200
+        response.headers["ETag"] = etag
+        response._content = json.dumps(petition_data).encode()
         callback(response=response)
 
-        return response
+        return completed_future(response)
 
     def test_base_poll(self, session):
         self.configure_poll(session)
@@ -116,3 +128,382 @@ class TestPetitionPoll(TestPetitionModelRequests):
                     signature_count=expected_petition.signature_count
                 )
 
+    def test_base_poll_skips_unmodified(self, session):
+        self.configure_poll(session)
+        for manager in self.petition_managers.values():
+            manager.current_index = 0
+
+        first_poll = Petition.poll(geographic=False)
+        assert len(first_poll) == len(self.petition_managers)
+        for record in first_poll:
+            assert record.petition.etag == f'"{record.petition_id}-0"'
+
+        record_count = Record.query.count()
+        assert Petition.poll(geographic=False) == []
+        assert Record.query.count() == record_count
+
+        modified_manager = list(self.petition_managers.values())[0]
+        modified_manager.current_index = 1
+        second_poll = Petition.poll(geographic=False)
+        assert [r.petition_id for r in second_poll] == [modified_manager.petition_id]
+        assert second_poll[0].signatures == modified_manager.current.petition.signature_count
+
+    def test_geo_poll_after_base_poll_is_unconditional(self, session):
+        self.configure_poll(session)
+        for manager in self.petition_managers.values():
+            manager.current_index = 0
+
+        assert len(Petition.poll(geographic=False)) == len(self.petition_managers)
+        result = Petition.poll(geographic=True, heartbeat=0)
+        assert len(result) == len(self.petition_managers)
+        assert all(record.geographic for record in result)
+
+    def test_unrecorded_poll_moves_response_versions(self, session):
+        self.configure_poll(session)
+        for manager in self.petition_managers.values():
+            manager.current_index = 0
+
+        Petition.poll(geographic=False)
+        versions = {id: Petition.response_version(id) for id in self.petition_managers}
+        with freeze_time(FROZEN_DATETIME + timedelta(minutes=5)):
+            assert Petition.poll(geographic=False) == []
+        assert all(Petition.response_version(id) != version for id, version in versions.items())
+
+    def forget_etags(self):
+        for petition in Petition.query.all():
+            petition.etag = None
+        Petition.query.session.commit()
+
+    def test_base_poll_skips_unchanged_signatures(self, session):
+        self.configure_poll(session)
+        for manager in self.petition_managers.values():
+            manager.current_index = 0
+
+        first_poll = Petition.poll(geographic=False, heartbeat=3600)
+        assert len(first_poll) == len(self.petition_managers)
+        record_count = Record.query.count()
+
+        self.forget_etags()
+        assert Petition.poll(geographic=False, heartbeat=3600) == []
+        assert Record.query.count() == record_count
+
+        self.forget_etags()
+        assert len(Petition.poll(geographic=False, heartbeat=0)) == len(self.petition_managers)
+
+    def test_poll_records_unchanged_signatures_after_heartbeat(self, session):
+        self.configure_poll(session)
+        for manager in self.petition_managers.values():
+            manager.current_index = 0
+
+        Petition.poll(geographic=True, heartbeat=3600)
+        self.forget_etags()
+        with freeze_time(FROZEN_DATETIME + timedelta(minutes=30)):
+            assert Petition.poll(geographic=True, heartbeat=3600) == []
+
+        self.forget_etags()
+        with freeze_time(FROZEN_DATETIME + timedelta(hours=1)):
+            result = Petition.poll(geographic=True, heartbeat=3600)
+
+        assert len(result) == len(self.petition_managers)
+        assert all(record.geographic for record in result)
+
+    def test_unmodified_poll_records_after_heartbeat(self, session):
+        self.configure_poll(session)
+        for manager in self.petition_managers.values():
+            manager.current_index = 0
+
+        Petition.poll(geographic=False, heartbeat=3600)
+        with freeze_time(FROZEN_DATETIME + timedelta(minutes=30)):
+            assert Petition.poll(geographic=False, heartbeat=3600) == []
+
+        heartbeat_at = FROZEN_DATETIME + timedelta(hours=1)
+        with freeze_time(heartbeat_at):
+            result = Petition.poll(geographic=False, heartbeat=3600)
+
+        assert len(result) == len(self.petition_managers)
+        for record in result:
+            manager = self.petition_managers[record.petition_id]
+            assert record.signatures == manager.current.petition.signature_count
+            assert record.timestamp == heartbeat_at
+            assert record.petition.polled_at == heartbeat_at
+            assert record.petition.etag == f'"{record.petition_id}-0"'
+
+    def test_poll_pushes_trending_scores(self, session):
+        self.configure_poll(session)
+        growth_rates = {}
+        for i, petition in enumerate(Petition.query.all()):
+            petition.growth_rate = growth_rates[petition.id] = float(i + 1)
+        Petition.query.session.commit()
+        for manager in self.petition_managers.values():
+            manager.current_index = 1
+
+        with freeze_time(FROZEN_DATETIME + timedelta(minutes=10)):
+            Petition.poll(geographic=False)
+
+        scores = current_app.redis.zrevrange(Petition.TRENDING_KEY, 0, -1, withscores=True)
+        scores = [(int(id), score) for id, score in scores]
+        assert dict(scores) == growth_rates
+        assert scores == sorted(scores, key=lambda s: s[1], reverse=True)
+
+        trending = Petition.where(state="open", order_by=Petition.TRENDING_ORDER)
+        assert [p.id for p in trending.all()] == [id for id, score in scores]
+        assert [p.id for p in trending.paginate(1, 2, False).items] == [id for id, score in scores[:2]]
+
+    def test_due_poll_only_polls_scheduled_petitions(self, session):
+        self.configure_poll(session)
+        for manager in self.petition_managers.values():
+            manager.current_index = 1
+
+        petitions = Petition.query.order_by(Petition.id).all()
+        not_due, due = petitions[:2], petitions[2:]
+        for petition in not_due:
+            petition.next_poll_at = FROZEN_DATETIME + timedelta(minutes=10)
+        session.commit()
+
+        result = Petition.poll(geographic=False, due=True, heartbeat=0)
+        assert sorted(r.petition_id for r in result) == sorted(p.id for p in due)
+        for petition in due:
+            assert FROZEN_DATETIME + timedelta(minutes=1) <= petition.next_poll_at
+            assert petition.next_poll_at <= FROZEN_DATETIME + timedelta(hours=1)
+        for petition in not_due:
+            assert petition.next_poll_at == FROZEN_DATETIME + timedelta(minutes=10)
+
+    def test_poll_interval_follows_growth(self, app):
+        config = app.config
+        hot = Petition(growth_rate=6000, trend_index=1, poll_volatility=0)
+        trending = Petition(growth_rate=1, trend_index=10, poll_volatility=0)
+        dormant = Petition(growth_rate=0, trend_index=500, poll_volatility=0)
+
+        assert hot.poll_interval(config) == config["POLL_MIN_INTERVAL"]
+        assert config["POLL_HOT_INTERVAL"] * 0.9 <= trending.poll_interval(config) <= config["POLL_HOT_INTERVAL"]
+        assert config["POLL_MAX_INTERVAL"] * 0.9 <= dormant.poll_interval(config) <= config["POLL_MAX_INTERVAL"]
+
+        dormant.poll_volatility = 1
+        assert dormant.poll_interval(config) <= config["POLL_MAX_INTERVAL"] / 2
+
+    def test_observe_growth_tracks_volatility(self, app):
+        petition = Petition(signatures=1600, growth_rate=10, poll_volatility=0)
+        steady = petition.observe_growth(signatures=1500, polled_at=FROZEN_DATETIME - timedelta(minutes=10))
+        assert steady == 0
+
+        petition.signatures = 3500
+        bursting = petition.observe_growth(signatures=1600, polled_at=FROZEN_DATETIME - timedelta(minutes=10))
+        assert 0 < bursting <= Petition.VOLATILITY_SMOOTHING
+
+    def test_signature_rows_lookup_codes_case_insensitively(self, session):
+        self.configure_poll(session)
+        record = Petition.save_base_data(Petition.query.all())[0]
+        attributes = record.petition.latest_data["data"]["attributes"]
+        expected = [l["code"] for l in attributes["signatures_by_country"]]
+        for locale in attributes["signatures_by_country"]:
+            locale["code"] = locale["code"].lower()
+
+        assert [row[2] for row in Record.signature_rows(record, "country")] == expected
+
+        attributes["signatures_by_country"][0]["code"] = "XX-UNKNOWN"
+        with pytest.raises(ValueError, match="country locale: 'XX-UNKNOWN'"):
+            list(Record.signature_rows(record, "country"))
+
+    @pytest.mark.parametrize("method", ["copy", "orm"])
+    def test_geo_write_methods(self, session, method):
+        self.configure_poll(session)
+        records = Petition.save_base_data(Petition.query.all())
+        Petition.save_geo_data(records, method=method)
+
+        for record in records:
+            attributes = record.petition.latest_data["data"]["attributes"]
+            assert record.geographic
+            assert self.validate_geo_record(
+                record=record,
+                expected=attributes,
+                signature_count=record.petition.signatures
+            )
+            for geo in Record.GEOGRAPHIES:
+                saved = sum(s.count for s in record.signatures_by(geo))
+                assert saved == sum(l["signature_count"] for l in attributes[f"signatures_by_{geo}"])
+
+    def test_packed_geo_storage(self, session):
+        self.configure_poll(session)
+        records = Petition.save_base_data(Petition.query.all())
+        Petition.save_geo_data(records, storage="packed")
+
+        for record in records:
+            attributes = record.petition.latest_data["data"]["attributes"]
+            assert self.validate_geo_record(
+                record=record,
+                expected=attributes,
+                signature_count=record.petition.signatures
+            )
+            for geo in Record.GEOGRAPHIES:
+                assert record.is_packed(geo)
+                assert len(getattr(record, f"{geo}_counts")) == len(Record.model_for(geo).CODE_CHOICES)
+                assert not getattr(record, f"signatures_by_{geo}")
+
+        record = records[0]
+        locale = record.petition.latest_data["data"]["attributes"]["signatures_by_constituency"][0]
+        result = Record.signatures_query([record], "constituency", locale["ons_code"]).first()
+        assert result.record_id == record.id
+        assert result.code.code == locale["ons_code"]
+        assert result.count == locale["signature_count"]
+
+    def save_geo_snapshot(self, index, storage):
+        for petition in Petition.query.all():
+            manager = self.petition_managers[petition.id]
+            manager.current_index = index
+            petition.sync(manager.current.petition.as_dict, dt.now())
+
+        records = Petition.save_base_data(Petition.query.all())
+        return Petition.save_geo_data(records, storage=storage)
+
+    def validate_snapshot(self, record):
+        attributes = record.petition.latest_data["data"]["attributes"]
+        return self.validate_geo_record(record=record, expected=attributes, signature_count=record.signatures)
+
+    def test_delta_geo_storage(self, session):
+        self.configure_poll(session)
+        keyframes = {r.petition_id: r for r in self.save_geo_snapshot(0, storage="delta")}
+        assert all(r.keyframe_id is None for r in keyframes.values())
+
+        for record in self.save_geo_snapshot(1, storage="delta"):
+            keyframe = keyframes[record.petition_id]
+            assert record.keyframe_id == keyframe.id
+            assert self.validate_snapshot(record)
+            for geo in Record.GEOGRAPHIES:
+                stored = [c for c in getattr(record, f"{geo}_counts") if c is not None]
+                changed = [c for c, k in zip(record.counts_for(geo), keyframe.counts_for(geo)) if c != k]
+                assert stored == changed
+
+    def test_delta_geo_storage_writes_keyframe_after_interval(self, session, app):
+        self.configure_poll(session)
+        with mock.patch.dict(app.config, {"GEO_KEYFRAME_INTERVAL": 1}):
+            first = self.save_geo_snapshot(0, storage="delta")
+            second = self.save_geo_snapshot(1, storage="delta")
+            third = self.save_geo_snapshot(2, storage="delta")
+
+        assert all(r.keyframe_id is None for r in first + third)
+        assert all(r.keyframe_id is not None for r in second)
+
+    def test_delta_geo_storage_writes_keyframe_when_locale_dropped(self, session):
+        self.configure_poll(session)
+        self.save_geo_snapshot(0, storage="delta")
+        for petition in Petition.query.all():
+            manager = self.petition_managers[petition.id]
+            manager.current_index = 1
+            data = deepcopy(manager.current.petition.as_dict)
+            data["data"]["attributes"]["signatures_by_country"].pop(0)
+            petition.sync(data, dt.now())
+
+        records = Petition.save_geo_data(Petition.save_base_data(Petition.query.all()), storage="delta")
+        for record in records:
+            assert record.keyframe_id is None
+            assert self.validate_snapshot(record)
+
+    def test_compact_geo_rekeyframes_row_records(self, session):
+        self.configure_poll(session)
+        records = self.save_geo_snapshot(0, storage="rows") + self.save_geo_snapshot(1, storage="rows")
+        expected = {r.id: {geo: r.counts_for(geo) for geo in Record.GEOGRAPHIES} for r in records}
+
+        with freeze_time(FROZEN_DATETIME + timedelta(days=8)):
+            compacted = Record.compact_geo(older_than={"days": 7}, interval=4)
+
+        assert sorted(compacted) == sorted(self.petition_managers)
+        for record in Record.query.filter(Record.id.in_(expected)).all():
+            assert record.is_packed("constituency")
+            assert not record.signatures_by_constituency
+            for geo in Record.GEOGRAPHIES:
+                assert record.counts_for(geo) == expected[record.id][geo]
+
+    def partitions_for(self, session, table, records):
+        statement = f"SELECT DISTINCT tableoid::regclass::text FROM {table} WHERE timestamp >= :start"
+        start = min(r.timestamp for r in records)
+        return sorted(name for name, in session.execute(statement, {"start": start}))
+
+    def test_create_partitions_routes_records_by_month(self, session):
+        self.configure_poll(session)
+        created = Record.create_partitions(months_ahead=1, start=dt(2100, 1, 15))
+        assert "record_y2100m01" in created
+        assert "signatures_by_constituency_y2100m02" in created
+        assert Record.create_partitions(months_ahead=1, start=dt(2100, 1, 1)) == []
+
+        with freeze_time(dt(2100, 2, 14)):
+            records = self.save_geo_snapshot(0, storage="rows")
+
+        assert self.partitions_for(session, "record", records) == ["record_y2100m02"]
+        assert self.partitions_for(session, "signatures_by_region", records) == ["signatures_by_region_y2100m02"]
+        for record in records:
+            assert self.validate_snapshot(record)
+
+    def test_retire_partitions_promotes_dependent_deltas(self, session):
+        self.configure_poll(session)
+        Record.create_partitions(months_ahead=1, start=dt(2100, 1, 1))
+        with freeze_time(dt(2100, 1, 14)):
+            keyframes = self.save_geo_snapshot(0, storage="delta")
+        with freeze_time(dt(2100, 2, 14)):
+            deltas = self.save_geo_snapshot(1, storage="delta")
+            expected = {r.id: {geo: r.counts_for(geo) for geo in Record.GEOGRAPHIES} for r in deltas}
+
+        with freeze_time(dt(2100, 3, 14)):
+            retired = Record.retire_partitions(older_than=1, action="drop")
+
+        assert "record_y2100m01" in retired
+        assert "record_y2100m02" not in retired
+        assert not Record.query.filter(Record.id.in_([r.id for r in keyframes])).all()
+        session.expire_all()
+        for record in Record.query.filter(Record.id.in_(expected)).all():
+            assert record.keyframe_id is None
+            for geo in Record.GEOGRAPHIES:
+                assert record.counts_for(geo) == expected[record.id][geo]
+
+    @pytest.mark.parametrize("storage", ["rows", "packed", "delta"])
+    def test_compiled_serializer_matches_schemas(self, session, storage):
+        self.configure_poll(session)
+        records = self.save_geo_snapshot(0, storage=storage) + self.save_geo_snapshot(1, storage=storage)
+        session.commit()
+
+        exclude = ["id", "record", "timestamp"]
+        assert SignaturesSerializer().dump_many(records) == RecordSchema(many=True, exclude=["id"]).dump(records)
+        for geo in Record.GEOGRAPHIES:
+            assert SignaturesSerializer(geo).dump_many(records) == RecordSchema.dump_query(records, geo, exclude=exclude)
+
+            record = records[-1]
+            code = record.signatures_by(geo)[0].code.code
+            signature = Record.signatures_query([record], geo, code).first()
+            expected = RecordSchema.dump_query(signature, geo, code, exclude=exclude)
+            assert SignaturesSerializer(geo, code).dump_one(signature) == expected
+
+    def test_polls_across_commits_track_latest_records(self, session):
+        self.configure_poll(session)
+        for manager in self.petition_managers.values():
+            manager.current_index = 0
+        first_poll = {r.petition_id: r.timestamp for r in Petition.poll(geographic=False, heartbeat=0)}
+        session.expire_all()
+
+        for manager in self.petition_managers.values():
+            manager.current_index = 1
+        with freeze_time(FROZEN_DATETIME + timedelta(minutes=5)):
+            second_poll = {r.petition_id: r for r in Petition.poll(geographic=False, heartbeat=0)}
+
+        assert set(second_poll) == set(first_poll)
+        for petition in Petition.query.all():
+            record = second_poll[petition.id]
+            assert record.timestamp > first_poll[petition.id]
+            assert (petition.latest_record_id, petition.latest_record_at) == (record.id, record.timestamp)
+            assert petition.latest_record_signatures == record.signatures
+
+    def test_save_tracks_latest_records(self, session):
+        self.configure_poll(session)
+        geo_records = {r.petition_id: r for r in self.save_geo_snapshot(0, storage="rows")}
+        with freeze_time(FROZEN_DATETIME + timedelta(minutes=5)):
+            for petition in Petition.query.all():
+                petition.sync(self.petition_managers[petition.id].timeline[1].petition.as_dict, dt.now())
+            base_records = {r.petition_id: r for r in Petition.save_base_data(Petition.query.all())}
+
+        for petition in Petition.query.all():
+            base, geo = base_records[petition.id], geo_records[petition.id]
+            assert (petition.latest_record_id, petition.latest_record_at) == (base.id, base.timestamp)
+            assert (petition.latest_geo_record_id, petition.latest_geo_record_at) == (geo.id, geo.timestamp)
+            assert petition.latest_geo_record_signatures == geo.signatures
+            assert petition.latest_record_for(geographic=True) is geo
+
+        latest = Record.distinct_on(opts={"geographic": True}).all()
+        assert sorted(r.id for r in latest) == sorted(r.id for r in geo_records.values())
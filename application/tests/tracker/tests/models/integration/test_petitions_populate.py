@@ -3,9 +3,10 @@ from munch import Munch as ObjDict
 from freezegun import freeze_time
 from unittest.mock import MagicMock, PropertyMock, create_autospec
 from application.tests import FROZEN_DATETIME, FROZEN_TIME_STR
-from application.tests.conftest import rkwargs
+from application.tests.conftest import rkwargs, completed_future
 from application.tests.tracker.tests.models.conftest import TestPetitionModelRequests
 from application.tests.tracker.factories.petition import PetitionFactory
+from application.tests.tracker.factories.query import QueryFactory
 from application.tracker.remote import RemotePetition
 from application.tracker.models import Petition, Record
 from application.models import Setting
@@ -40,3 +41,78 @@ class TestPetitionPopulate(TestPetitionModelRequests):
         for petition in self.populated:
             expected.update(petition=petition, expected=self.remote_data[petition.id])
             assert self.validate_petition(**expected)
+
+
+def configure_populate_pipeline(cls, **kwargs):
+    defaults = dict(signature_count=range(1000, 100_000), signatures_by={"locales": "auto"})
+    cls.counts = {"page": 5, "seeded": 5, "discovered": 12, "batch": 5}
+    cls.seeded = cls.build(generic=cls.counts["seeded"], defaults=defaults)
+    cls.to_be_discovered = cls.build(generic=cls.counts["discovered"], starting_id=5, defaults=defaults)
+    cls.remote_data = {p.data.id: p for p in cls.seeded + cls.to_be_discovered}
+    cls.populated = cls.seed(data=cls.seeded, session=cls.session)
+
+class TestPetitionPopulateQuery(TestPetitionModelRequests):
+
+    def mock_future_get(self, url, hooks, headers=None):
+        if "/petitions.json" not in url:
+            return super().mock_future_get(url, hooks, headers)
+
+        response = self.query.get(url)
+        hooks["response"](response=response)
+        return completed_future(response)
+
+@pytest.mark.parametrize("class_session", [{"func": configure_populate_pipeline}], indirect=True)
+@pytest.mark.usefixtures("class_session")
+class TestPetitionPopulatePipeline(TestPetitionPopulateQuery):
+
+    def test_discovered_petitions_are_onboarded_in_batches(self):
+        self.query = QueryFactory(imports=self.seeded + self.to_be_discovered, items_per_page=self.counts["page"])
+        with mock.patch.object(Petition, "onboard", wraps=Petition.onboard) as onboard:
+            self.populated = Petition.populate(state="open", batch_size=self.counts["batch"])
+
+        assert self.sorted_ids(self.populated) == sorted(p.data.id for p in self.to_be_discovered)
+        assert [len(c[0][0]) for c in onboard.call_args_list] == [5, 5, 2]
+        requests_made = self.query.num_pages + self.counts["discovered"]
+        assert self.mocks.future_session.get.call_count == requests_made
+
+
+def configure_populate_incremental(cls, **kwargs):
+    defaults = dict(signature_count=range(1000, 100_000), signatures_by={"locales": "auto"})
+    cls.counts = {"page": 5, "seeded": 15, "discovered": 7}
+    cls.seeded = cls.build(generic=cls.counts["seeded"], defaults=defaults)
+    cls.to_be_discovered = cls.build(generic=cls.counts["discovered"], starting_id=15, defaults=defaults)
+    cls.remote_data = {p.data.id: p for p in cls.seeded + cls.to_be_discovered}
+    cls.populated = cls.seed(data=cls.seeded, session=cls.session)
+
+@pytest.mark.parametrize("class_session", [{"func": configure_populate_incremental}], indirect=True)
+@pytest.mark.usefixtures("class_session")
+class TestPetitionPopulateIncremental(TestPetitionPopulateQuery):
+
+    @pytest.fixture(autouse=True, scope="function")
+    def known_ids(self, app):
+        app.redis.delete(Petition.KNOWN_IDS_KEY)
+
+        yield
+
+        app.redis.delete(Petition.KNOWN_IDS_KEY)
+
+    def newest_first(self, petitions):
+        return sorted(petitions, key=lambda p: p.data.id, reverse=True)
+
+    def test_paging_stops_at_first_known_page(self, app):
+        imports = self.newest_first(self.seeded + self.to_be_discovered)
+        self.query = QueryFactory(imports=imports, items_per_page=self.counts["page"])
+        with mock.patch.object(RemotePetition, "newest_first_state", "open"):
+            self.populated = Petition.populate(state="open", incremental=True)
+
+        assert self.sorted_ids(self.populated) == sorted(p.data.id for p in self.to_be_discovered)
+        pages_fetched = 3
+        assert self.query.num_pages > pages_fetched
+        assert self.mocks.future_session.get.call_count == pages_fetched + self.counts["discovered"]
+
+        known_ids = {int(id) for id in app.redis.smembers(Petition.KNOWN_IDS_KEY)}
+        assert known_ids == {0, *self.remote_data.keys()}
+
+    def test_incremental_requires_open_state(self):
+        with pytest.raises(ValueError):
+            Petition.populate(state="closed", incremental=True)
@@ -8,6 +8,7 @@ from application.tests.tracker.factories.petition import PetitionFactory, Petiti
 from application.tests.tracker.factories.signatures import SignaturesByFactory
 from application.tracker.models import Record, Petition
 from application.tracker.exceptions import PetitionsNotFound, RecordsNotFound
+from flask import current_app
 
 from unittest import mock
 from copy import deepcopy
@@ -24,6 +25,7 @@ def configure_trend_indexes(cls, **kwargs):
     cls.initialize_petitions(kwargs["total"])
     cls.initialize_managers(kwargs["missing"])
     cls.dummy_poll(cls.petition_managers, cls.poll_increments["before"])
+    cls.dummy_poll(cls.managers["found"], cls.poll_increments["recent"])
     cls.dummy_poll(cls.managers["found"], cls.poll_increments["distinct"])
     cls.mock_previous_update()
     cls.dummy_poll(cls.petition_managers, cls.poll_increments["after"])
@@ -31,18 +33,13 @@ def configure_trend_indexes(cls, **kwargs):
     cls.set_distinct_growth()
     cls.expected_managers_by_id()
 
-@pytest.mark.parametrize(
-    "class_session",
-    [{"func": configure_trend_indexes, "missing": 5, "total": 15}],
-    indirect=True
-)
-@pytest.mark.usefixtures("class_session")
-@freeze_time(FROZEN_TIME_STR)
-class TestPetitionUpdateTrendIndexes(TestPetitionModel):
+class TrendIndexFixtures(TestPetitionModel):
 
     time_now = FROZEN_DATETIME
     time_epoch = (FROZEN_DATETIME - timedelta(hours=3))
-    poll_increments = {"before": [0, 30, 60, 90], "distinct": [120], "after": [150]}
+    # a record within POLL_HEARTBEAT before the window carries its count into it, so
+    # missing petitions are left without records from the hour before the window on
+    poll_increments = {"before": [0, 30], "recent": [60, 90], "distinct": [120], "after": [150]}
     distinct_index = 5
 
     @classmethod
@@ -103,6 +100,16 @@ class TestPetitionUpdateTrendIndexes(TestPetitionModel):
         cls.expected_missing_ids = [m.petition_id for m in cls.managers["missing"]]
         cls.expected_found_ids = [m.petition_id for m in cls.managers["found"]]
 
+
+@pytest.mark.parametrize(
+    "class_session",
+    [{"func": configure_trend_indexes, "missing": 5, "total": 15}],
+    indirect=True
+)
+@pytest.mark.usefixtures("class_session")
+@freeze_time(FROZEN_TIME_STR)
+class TestPetitionUpdateTrendIndexes(TrendIndexFixtures):
+
     @classmethod
     def manage_expectations(cls, handler, missing=False):
         sort_growth = lambda managers: sorted(managers, key=lambda x: x.growth_rate, reverse=True)
@@ -167,6 +174,38 @@ class TestPetitionUpdateTrendIndexes(TestPetitionModel):
         assert self.expected_found_ids == [p.id for p in result["found"]]
         assert self.validate_updates(result["found"], self.managers["found"])
 
+    @pytest.mark.parametrize("update", [("update_trend_indexes"), ("update_growth_metrics")])
+    def test_updates_move_response_versions(self, update):
+        ids = self.expected_found_ids + self.expected_missing_ids
+        versions = {id: Petition.response_version(id) for id in ids}
+        with freeze_time(FROZEN_DATETIME + timedelta(minutes=5)):
+            getattr(Petition, update)()
+
+        moved = [id for id in ids if Petition.response_version(id) != versions[id]]
+        expected = ids if update == "update_trend_indexes" else self.expected_found_ids
+        assert set(expected) <= set(moved)
+
+    def expected_growth(self, manager, window):
+        cutoff = self.time_now - timedelta(**window)
+        records = [e.records.base for e in manager.timeline if e.get("records") and e.records.get("base")]
+        before = [r for r in records if r.timestamp <= cutoff]
+        start = max(before, key=lambda r: r.timestamp) if before else min(records, key=lambda r: r.timestamp)
+        return start.avg_growth_since(cutoff)
+
+    def test_update_growth_metrics(self):
+        updated = Petition.update_growth_metrics()
+        managers = self.managers["found"]
+        assert set(m.petition_id for m in managers) <= set(updated)
+
+        for manager in managers:
+            petition = Petition.query.get(manager.petition_id)
+            for column, window in Petition.GROWTH_WINDOWS.items():
+                expected = self.expected_growth(manager, window)
+                assert getattr(petition, column) == pytest.approx(expected, abs=0.002)
+
+        ordered = Petition.where(state="open", order_by={"growth_24h": "DESC"}).all()
+        assert [p.growth_24h for p in ordered] == sorted([p.growth_24h for p in ordered], reverse=True)
+
     def test_raises_without_found(self, handler=False):
         self.delete_disinct_records()
         expected_message = "Record(s) not found, for growth rate update."
@@ -176,3 +215,80 @@ class TestPetitionUpdateTrendIndexes(TestPetitionModel):
         with pytest.raises(RecordsNotFound) as error:
             result = Petition.update_trend_indexes(handle_missing=handler)
         assert str(error.value) == expected_message
+
+
+# the set based (row_number) update against the python update it replaced, on the same records
+@pytest.mark.parametrize(
+    "class_session",
+    [{"func": configure_trend_indexes, "missing": 5, "total": 15}],
+    indirect=True
+)
+@pytest.mark.usefixtures("class_session")
+@freeze_time(FROZEN_TIME_STR)
+class TestPetitionTrendIndexesMatchPython(TrendIndexFixtures):
+
+    # growth rates and trend indexes by the previous python implementation, ties keep id order
+    def python_trend_indexes(self, handle_missing, since={"hours": 1}, margin={"minutes": 5}):
+        since, margin = dt.now() - timedelta(**since), timedelta(**margin)
+        lookback = timedelta(seconds=current_app.config["POLL_HEARTBEAT"])
+        timestamp = {"lt": since + margin, "gt": since - margin - lookback}
+        opts = {"state": "open", "archived": False, "geographic": False}
+        records = Record.distinct_on(timestamp=timestamp, opts=opts, order_by="DESC").all()
+        growth = {r.petition_id: r.avg_growth_since(since) for r in records}
+
+        petitions = Petition.where(state="open", archived=False).order_by(None).order_by(Petition.id).all()
+        found = [p for p in petitions if p.id in growth]
+        missing = [p for p in petitions if p.id not in growth]
+        sort_growth = lambda items: sorted(items, key=lambda p: growth.get(p.id, p.growth_rate), reverse=True)
+
+        if not missing:
+            ranked = sort_growth(found)
+        elif handle_missing == "concat":
+            ranked = sort_growth(found) + sort_growth(missing)
+        elif handle_missing == "reindex":
+            ranked = sort_growth(found + missing)
+        else:
+            raise PetitionsNotFound("trend index update", missing=missing, found=found)
+
+        return growth, {p.id: index + 1 for index, p in enumerate(ranked)}
+
+    def validate_against_python(self, handler):
+        growth, expected = self.python_trend_indexes(handler)
+        Petition.update_trend_indexes(handle_missing=handler)
+
+        petitions = Petition.where(state="open", archived=False).all()
+        assert {p.id: p.trend_index for p in petitions} == expected
+        for petition in petitions:
+            if petition.id in growth:
+                assert petition.growth_rate == pytest.approx(growth[petition.id], abs=0.001)
+        return True
+
+    @pytest.mark.parametrize("handler", [("concat"), ("reindex")])
+    def test_with_missing(self, handler):
+        assert self.validate_against_python(handler)
+
+    def test_with_missing_and_raise(self, handler=False):
+        with pytest.raises(PetitionsNotFound) as expected:
+            self.python_trend_indexes(handler)
+        with pytest.raises(PetitionsNotFound) as error:
+            Petition.update_trend_indexes(handle_missing=handler)
+        assert str(error.value) == str(expected.value)
+
+    # missing petitions tied with each other and with the first found petition
+    @pytest.mark.parametrize("handler", [("concat"), ("reindex")])
+    def test_ties(self, handler):
+        growth, expected = self.python_trend_indexes(handler)
+        tied = growth[self.expected_found_ids[0]]
+        for petition in Petition.query.filter(Petition.id.in_(self.expected_missing_ids)):
+            petition.growth_rate = tied
+        self.session.commit()
+
+        assert self.validate_against_python(handler)
+
+    @pytest.mark.parametrize("handler", [("concat"), ("reindex"), (False)])
+    def test_without_missing(self, handler):
+        query = Petition.query.filter(Petition.id.in_(self.expected_missing_ids))
+        query.delete(synchronize_session=False)
+        self.session.commit()
+
+        assert self.validate_against_python(handler)
@@ -3,11 +3,11 @@ from munch import Munch as ObjDict
 from unittest.mock import MagicMock, PropertyMock, create_autospec
 from application.tests import FROZEN_DATETIME, FROZEN_TIME_STR
 from application.tracker.remote import RemotePetition
-from application.tests.conftest import rkwargs
+from application.tests.conftest import rkwargs, completed_future
 from unittest import mock
 from copy import deepcopy
 from datetime import datetime as dt
-import os, json, logging, requests
+import os, json, asyncio, logging, requests
 
 logger = logging.getLogger(__name__)
 
@@ -89,7 +89,7 @@ class TestRemotePetitionRequests(TestRemotePetition):
         self.response.status_code  = kwargs.get("status_code")
         if self.response.status_code  == 200:
             self.response_data = kwargs.get("response_data") or getattr(self, "response_data", None)
-            self.response.json = MagicMock(return_value=self.response_data)
+            self.response._content = json.dumps(self.response_data).encode()
         elif self.response.status_code  == 404:
             self.response.reason = "Not Found"
 
@@ -98,35 +98,69 @@ class TestRemotePetitionFutureRequests(TestRemotePetition):
 
     base_import_path = "application.tracker.remote"
 
+    def patch_retry_budget(self, ratio=None, minimum=0):
+        import_path = f"{self.base_import_path}.RetryScheduler"
+        self.patches.budget_ratio = mock.patch(f"{import_path}.budget_ratio", ratio)
+        self.patches.budget_minimum = mock.patch(f"{import_path}.budget_minimum", minimum)
+        self.mocks.budget_ratio = self.patches.budget_ratio.start()
+        self.mocks.budget_minimum = self.patches.budget_minimum.start()
+
     def patch_future_session(self):
         import_path = f"{self.base_import_path}.RemotePetition.future_session"
         self.patches.future_session = mock.patch(import_path)
         self.mocks.future_session = self.patches.future_session.start()
         self.mocks.future_session.get = MagicMock(wraps=self.mock_future_get)
 
-    def mock_future_get(self, url, hooks):
+    def mock_future_get(self, url, hooks, headers=None):
         callback = hooks["response"]
         response = requests.Response()
         response.url = url
         response.closure_args = [c.cell_contents for c in callback.__closure__]
         response.expected_object = response.closure_args[1]
-        response.json = MagicMock(return_value=deepcopy(self.response_json))
-        response.result = MagicMock(return_value=response)
+        response._content = json.dumps(self.response_json).encode()
         if self.request_failures:
             self.request_failures -= 1
             response.status_code = 500
         else:
             response.status_code = 200
         callback(response=response)
-        return response
+        return completed_future(response)
 
     def validate_responses(self, success, failed):
         assert len(self.results["success"]) == success
         assert len(self.results["failed"]) == failed
         for response in self.results["success"]:
             assert response.timestamp == FROZEN_DATETIME.isoformat()
-            assert response.json.call_count == 1
+            assert response.data == self.response_json
         for response in self.results["failed"]:
-            assert response.json.call_count == 0
+            assert not hasattr(response, "data")
+
+        return True
+
+class TestRemotePetitionAsyncioRequests(TestRemotePetition):
+
+    base_import_path = "application.tracker.remote"
+
+    def patch_asyncio_engine(self, max_concurrency):
+        from application.tracker.remote import AsyncSession
+        session = AsyncSession(max_concurrency=max_concurrency, timeout=1)
+        self.patches.engine = mock.patch.object(RemotePetition, "engine", "asyncio")
+        self.patches.asyncio_session = mock.patch.object(RemotePetition, "asyncio_session", session)
+        self.patches.request = mock.patch.object(AsyncSession, "request", self.mock_asyncio_request)
+        for name in ["engine", "asyncio_session", "request"]:
+            self.mocks[name] = self.patches[name].start()
+
+    async def mock_asyncio_request(self, client, url, headers=None):
+        from application.tracker.remote import AsyncResponse
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        for i in range(3): await asyncio.sleep(0)
+        self.in_flight -= 1
+
+        status_code = 200
+        if self.request_failures:
+            self.request_failures -= 1
+            status_code = 500
 
-        return True
\ No newline at end of file
+        content = json.dumps(self.response_json).encode()
+        return AsyncResponse(url=url, status_code=status_code, content=content)
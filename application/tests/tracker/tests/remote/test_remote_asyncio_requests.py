@@ -0,0 +1,78 @@
+import pytest
+from munch import Munch as ObjDict
+from unittest.mock import MagicMock
+from application.tests.tracker.tests.remote.conftest import TestRemotePetitionAsyncioRequests
+from application.tracker.remote import RemotePetition
+from unittest import mock
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+
+class TestRemotePetitionAsyncioGet(TestRemotePetitionAsyncioRequests):
+
+    max_concurrency = 5
+
+    def configure(self):
+        super().configure()
+        self.in_flight, self.max_in_flight = 0, 0
+        self.response_json = {"links": {"self": self.base_url}, "data": {}}
+
+    @pytest.fixture(autouse=True, scope="function")
+    def context(self):
+        self.configure()
+        self.patch_asyncio_engine(self.max_concurrency)
+
+        yield
+
+        for p in self.patches.values(): p.stop()
+
+    @pytest.fixture(scope="function")
+    def petitions(self, count=20):
+        return [ObjDict(id=id, url=RemotePetition.url_addr(id)) for id in range(count)]
+
+    def validate_responses(self, success, failed):
+        assert len(self.results["success"]) == success
+        assert len(self.results["failed"]) == failed
+        for response in self.results["success"]:
+            assert response.data == self.response_json
+            assert response.func == "async_get"
+            assert type(response.timestamp) is str
+        for response in self.results["failed"]:
+            assert not hasattr(response, "data")
+
+        return True
+
+    def test_when_none_fail(self, petitions):
+        self.request_failures = 0
+        self.results = RemotePetition.async_get(petitions=petitions)
+        assert self.validate_responses(success=20, failed=0)
+        assert sorted(r.petition.id for r in self.results["success"]) == list(range(20))
+
+    def test_when_some_fail(self, petitions):
+        self.request_failures = 5
+        self.results = RemotePetition.async_get(petitions=petitions)
+        assert self.validate_responses(success=15, failed=5)
+
+    def test_concurrency_is_bounded(self, petitions):
+        self.request_failures = 0
+        self.results = RemotePetition.async_get(petitions=petitions)
+        assert self.max_in_flight == self.max_concurrency
+
+    def test_stream_accepts_calls_while_consumed(self, petitions):
+        self.request_failures = 0
+        stream = RemotePetition.async_stream(RemotePetition.get_calls(petitions[:5]))
+        responses = []
+        for response in stream:
+            if not responses:
+                stream.submit(*RemotePetition.get_calls(petitions[5:]))
+            responses.append(response)
+
+        assert sorted(r.petition.id for r in responses) == list(range(20))
+        assert stream.loop.is_closed()
+
+    def test_invalid_engine_raises(self, petitions):
+        with mock.patch.object(RemotePetition, "engine", "unknown"):
+            with pytest.raises(ValueError):
+                RemotePetition.async_get(petitions=petitions)
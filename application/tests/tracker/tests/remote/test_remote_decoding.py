@@ -0,0 +1,84 @@
+import pytest
+from munch import Munch as ObjDict
+from unittest.mock import MagicMock
+from unittest import mock
+from application.lib.fastjson import JSONCodec
+from application.tracker.remote import RemotePetition, SessionMaker, FetchStats
+import json, requests, logging
+
+logger = logging.getLogger(__name__)
+
+
+class TestRemoteDecoding():
+
+    @pytest.fixture(autouse=True, scope="function")
+    def context(self, app):
+        self.client = app.redis
+        self.patches = ObjDict()
+        self.patches.key = mock.patch.object(FetchStats, "key", "testing:remote:fetch_stats")
+        for p in self.patches.values(): p.start()
+        self.client.delete(FetchStats.key)
+
+        yield
+
+        self.client.delete(FetchStats.key)
+        for p in self.patches.values(): p.stop()
+
+    def make_response(self, data, headers=None):
+        response = requests.Response()
+        response.status_code = 200
+        response._content = json.dumps(data).encode()
+        response.headers.update(headers or {})
+        return response
+
+    def test_codec_resolves_backends(self):
+        assert JSONCodec("json").backend == "json"
+        assert JSONCodec("auto").backend in ["orjson", "json"]
+        with pytest.raises(ValueError):
+            JSONCodec("simplejson")
+
+    def test_codec_falls_back_without_orjson(self):
+        with mock.patch("application.lib.fastjson.orjson", None):
+            assert JSONCodec("orjson").backend == "json"
+            assert JSONCodec("auto").backend == "json"
+
+    def test_codec_decodes_bytes_and_str(self):
+        codec = JSONCodec()
+        data, seconds = codec.decode(b'{"signature_count": 10}')
+        assert data == {"signature_count": 10}
+        assert seconds >= 0
+        assert codec.decode('[1, 2]')[0] == [1, 2]
+
+    def test_sessions_negotiate_compression(self):
+        session = SessionMaker.make(future=False)
+        assert "gzip" in session.headers["Accept-Encoding"]
+        assert SessionMaker.accept_encoding().startswith("gzip, deflate")
+
+    def test_decode_records_counters(self):
+        response = self.make_response({"data": {"id": 1}}, headers={"Content-Length": "12"})
+        hook = RemotePetition.async_callback(func="async_get", obj={"petition": 1})
+        hook(response)
+
+        assert response.data == {"data": {"id": 1}}
+        assert response.content_bytes == len(response.content)
+        assert response.wire_bytes == 12
+        assert response.decode_time >= 0
+
+    def test_fetch_stats_summarise_and_publish(self):
+        stats = FetchStats()
+        for size in [100, 200]:
+            response = self.make_response({"size": size})
+            response.data = RemotePetition.decode(response)
+            stats.add(response)
+        stats.add(requests.Response())
+
+        summary = stats.summary()
+        assert summary["responses"] == 3
+        assert summary["decoded"] == 2
+        assert summary["wire_bytes"] == summary["content_bytes"]
+
+        stats.publish(self.client)
+        stats.publish(self.client)
+        totals = FetchStats.totals(self.client)
+        assert totals["responses"] == 6
+        assert totals["content_bytes"] == summary["content_bytes"] * 2
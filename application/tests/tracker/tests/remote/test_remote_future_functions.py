@@ -5,7 +5,7 @@ from unittest.mock import MagicMock, PropertyMock, create_autospec
 from application.tests.conftest import rkwargs
 from application.tests import FROZEN_DATETIME, FROZEN_TIME_STR
 from application.tests.tracker.tests.remote.conftest import TestRemotePetition
-from application.tracker.remote import RemotePetition
+from application.tracker.remote import RemotePetition, RetryScheduler
 import logging, requests
 
 remote_petition_path = "application.tracker.remote"
@@ -13,54 +13,70 @@ logger = logging.getLogger(__name__)
 
 
 
-class TestRemotePetitionHandleAsyncResponses(TestRemotePetition):
+class TestRemotePetitionSortResponses(TestRemotePetition):
 
     @pytest.mark.parametrize('futures', [{"success": 10, "failed": 5}], indirect=True)
-    def test_handle(self, futures):
-        responses = self.futures["success"] + self.futures["failed"]
-        result = RemotePetition.handle_async_responses(responses)
+    def test_sort(self, futures):
+        responses = [f.result() for f in self.futures["success"] + self.futures["failed"]]
+        result = RemotePetition.sort_responses(responses)
 
         assert (len(result["success"]) + len(result["failed"])) == len(responses)
         assert len(result["success"]) == len(self.futures["success"])
         assert len(result["failed"]) == len(self.futures["failed"])
+        assert "attempts" not in result
 
-class TestRemotePetitionEvalAsyncRetry(TestRemotePetition):
-
-    @pytest.fixture(scope="function")
-    def configure(self, request):
-        self.kwargs = rkwargs(request)
-        self.kwargs.update(results=self.futures, retries=0)
-        self.attempts = range(self.kwargs.pop("attempts"))
-
-    def validate(self, i):
-        assert self.result["retries"] == i + 1
-        assert self.result["backoff"] == self.kwargs["backoff"] ** self.result["retries"]
-        assert self.result.pop("completed") == self.kwargs["results"]["success"]
-
-    @pytest.mark.parametrize('futures', [{"success": 5, "failed": 20}], indirect=True)
-    @pytest.mark.parametrize('configure', [{"backoff": 10, "max_retries": 3, "attempts": 5}], indirect=True)
-    def test_will_retry_untill_max_retries_exceeded(self, futures, configure):
-        for i in self.attempts:
-            self.result = RemotePetition.eval_async_retry(**self.kwargs)
-            if i < self.kwargs["max_retries"]:
-                self.validate(i)
-                self.kwargs = {**self.kwargs, **self.result}
-                continue
-
-            assert any(self.kwargs["results"]["failed"])
-            assert self.result is False
-
-    @pytest.mark.parametrize('futures', [{"success": 5, "failed": 20}], indirect=True)
-    @pytest.mark.parametrize('configure', [{"backoff": 10, "max_retries": 10, "attempts": 5}], indirect=True)
-    def test_will_not_retry_without_failures(self, futures, configure):
-        for i in self.attempts:
-            self.result = RemotePetition.eval_async_retry(**self.kwargs)
-            if any(self.kwargs["results"]["failed"]):
-                self.validate(i)
-                succeeded = [self.kwargs["results"]["failed"].pop(0) for i in range(10)]
-                self.kwargs["results"]["success"].append(succeeded)
-                self.kwargs = {**self.kwargs, **self.result}
-                continue
-
-            assert i < self.kwargs["max_retries"]
-            assert self.result is False
\ No newline at end of file
+    @pytest.mark.parametrize('futures', [{"success": 10, "failed": 5}], indirect=True)
+    def test_sort_with_attempts(self, futures):
+        scheduler = RetryScheduler(max_retries=3)
+        responses = [f.result() for f in self.futures["success"] + self.futures["failed"]]
+        for i, response in enumerate(responses):
+            response.attempts = (i % 2) + 1
+            scheduler.complete(response)
+
+        result = RemotePetition.sort_responses(responses, scheduler)
+        assert result["attempts"] == {1: 8, 2: 7}
+
+class TestRetryScheduler(TestRemotePetition):
+
+    make_response = lambda self, success, attempts: MagicMock(success=success, attempts=attempts, shed=False)
+
+    @pytest.mark.parametrize("backoff,max_backoff", [(1, 30), (2, 5), (0, 30)])
+    def test_delay_is_jittered_within_exponential_ceiling(self, backoff, max_backoff):
+        with mock.patch.object(RetryScheduler, "max_backoff", max_backoff):
+            scheduler = RetryScheduler(max_retries=5, backoff=backoff)
+            for attempt in range(1, 6):
+                ceiling = min(max_backoff, backoff * (2 ** (attempt - 1)))
+                delays = [scheduler.delay(attempt) for i in range(50)]
+                assert all((ceiling / 2) <= d <= ceiling for d in delays)
+
+    def test_will_retry_untill_max_retries_exceeded(self, max_retries=3):
+        scheduler = RetryScheduler(max_retries=max_retries)
+        for attempt in range(1, max_retries + 1):
+            assert scheduler.will_retry(self.make_response(False, attempt)) is True
+        assert scheduler.will_retry(self.make_response(False, max_retries + 1)) is False
+
+    def test_will_not_retry_successful_responses(self):
+        scheduler = RetryScheduler(max_retries=3)
+        assert scheduler.will_retry(self.make_response(True, 1)) is False
+
+    def test_will_not_retry_shed_responses(self):
+        scheduler = RetryScheduler(max_retries=3)
+        response = self.make_response(False, 1)
+        response.shed = True
+        assert scheduler.will_retry(response) is False
+
+    def test_will_not_retry_once_budget_spent(self, budget=5):
+        scheduler = RetryScheduler(max_retries=3, budget=budget)
+        retried = [scheduler.will_retry(self.make_response(False, 1)) for i in range(budget * 2)]
+        assert retried.count(True) == budget
+        assert scheduler.budget == 0
+
+    @pytest.mark.parametrize("size,ratio,minimum,expected", [
+        (100, 0.25, 10, 25),
+        (10, 0.25, 10, 10),
+        (100, None, 10, None),
+    ])
+    def test_make_sizes_budget_from_batch(self, size, ratio, minimum, expected):
+        with mock.patch.object(RetryScheduler, "budget_ratio", ratio):
+            with mock.patch.object(RetryScheduler, "budget_minimum", minimum):
+                assert RetryScheduler.make(size, max_retries=3).budget == expected
@@ -8,12 +8,12 @@ from application.tests.tracker.tests.remote.conftest import (
     TestRemotePetitionRequests,
     TestRemotePetitionFutureRequests
 )
-from application.tracker.remote import RemotePetition
+from application.tracker.remote import RemotePetition, RetryScheduler
 from urllib.parse import urlparse, parse_qs
 from requests import HTTPError
 from unittest import mock
 from copy import deepcopy
-import logging, requests
+import json, logging, requests
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +29,7 @@ class TestRemotePetitionAsyncGet(TestRemotePetitionFutureRequests):
     @pytest.fixture(autouse=True, scope="function")
     def context(self):
         self.configure()
+        self.patch_retry_budget()
         self.patch_future_session()
         self.patch_async_get()
 
@@ -45,8 +46,10 @@ class TestRemotePetitionAsyncGet(TestRemotePetitionFutureRequests):
     def petitions(self, count=10):
         return [ObjDict(id=id, url=RemotePetition.url_addr(id)) for id in range(count)]
 
-    def validate_function(self, call_count):
-        assert RemotePetition.async_get.call_count == call_count
+    def validate_function(self, attempts):
+        assert RemotePetition.async_get.call_count == 1
+        assert self.results["attempts"] == attempts
+        assert self.mocks.future_session.get.call_count == sum(k * v for k, v in attempts.items())
         for response in self.results["success"] + self.results["failed"]:
             assert response.petition == response.expected_object["petition"]
 
@@ -56,40 +59,54 @@ class TestRemotePetitionAsyncGet(TestRemotePetitionFutureRequests):
         self.request_failures = 0
         self.results = RemotePetition.async_get(petitions=petitions, **kwargs)
         assert self.validate_responses(success=10, failed=0)
-        assert self.validate_function(call_count=1)
+        assert self.validate_function(attempts={1: 10})
 
     def test_when_poll_and_some_fail(self, petitions, kwargs={"max_retries": 3, "backoff": 0}):
         self.request_failures = (kwargs["max_retries"] * len(petitions)) + 5
         self.results = RemotePetition.async_get(petitions=petitions, **kwargs)
         assert self.validate_responses(success=5, failed=5)
-        assert self.validate_function(call_count=4)
+        assert self.validate_function(attempts={4: 10})
 
     def test_when_poll_and_all_fail(self, petitions, kwargs={"max_retries": 3, "backoff": 0}):
         self.request_failures = (kwargs["max_retries"] * len(petitions)) + len(petitions)
         self.results = RemotePetition.async_get(petitions=petitions, **kwargs)
         assert self.validate_responses(success=0, failed=10)
-        assert self.validate_function(call_count=4)
+        assert self.validate_function(attempts={4: 10})
+
+    def test_stream_accepts_calls_while_consumed(self, petitions, kwargs={"max_retries": 3, "backoff": 0}):
+        self.request_failures = 2
+        stream = RemotePetition.async_stream(RemotePetition.get_calls(petitions[:5]), **kwargs)
+        responses = []
+        for response in stream:
+            if not responses:
+                stream.submit(*RemotePetition.get_calls(petitions[5:]))
+            responses.append(response)
+
+        assert len(responses) == len(petitions)
+        assert all(r.success for r in responses)
+        assert stream.scheduler.size == len(petitions)
+        assert self.mocks.future_session.get.call_count == len(petitions) + 2
 
     def test_when_populate_and_none_fail(self, kwargs={"max_retries": 3, "backoff": 0}):
         petitions = range(0, 10)
         self.request_failures = 0
         self.results = RemotePetition.async_get(petitions, **kwargs)
         assert self.validate_responses(success=10, failed=0)
-        assert self.validate_function(call_count=1)
+        assert self.validate_function(attempts={1: 10})
 
     def test_when_populate_and_some_fail(self, kwargs={"max_retries": 3, "backoff": 0}):
         petitions = range(0, 10)
         self.request_failures = (kwargs["max_retries"] * len(petitions)) + 5
         self.results = RemotePetition.async_get(petitions=petitions, **kwargs)
         assert self.validate_responses(success=5, failed=5)
-        assert self.validate_function(call_count=4)
+        assert self.validate_function(attempts={4: 10})
 
     def test_when_populate_and_all_fail(self, kwargs={"max_retries": 3, "backoff": 0}):
         petitions = range(0, 10)
         self.request_failures =  (kwargs["max_retries"] * len(petitions)) + len(petitions)
         self.results = RemotePetition.async_get(petitions=petitions, **kwargs)
         assert self.validate_responses(success=0, failed=10)
-        assert self.validate_function(call_count=4)
+        assert self.validate_function(attempts={4: 10})
 
 
 @freeze_time(FROZEN_TIME_STR)
@@ -106,6 +123,7 @@ class TestRemotePetitionAsyncQuery(TestRemotePetitionFutureRequests):
     @pytest.fixture(autouse=True, scope="function")
     def context(self):
         self.configure()
+        self.patch_retry_budget()
         self.patch_future_session()
         self.patch_standard_session()
         self.patch_async_query()
@@ -120,7 +138,7 @@ class TestRemotePetitionAsyncQuery(TestRemotePetitionFutureRequests):
         response = requests.Response()
         response.status_code = 200
         links = self.make_links(next_num=int(first_num) + 1, last_num=self.num_pages)
-        response.json = MagicMock(return_value={"links": links, "data": self.response_data.copy()})
+        response._content = json.dumps({"links": links, "data": self.response_data}).encode()
         return response
 
     def patch_standard_session(self):
@@ -134,8 +152,10 @@ class TestRemotePetitionAsyncQuery(TestRemotePetitionFutureRequests):
         self.patches.async_query = mock.patch(import_path, wraps=RemotePetition.async_query)
         self.mocks.async_query = self.patches.async_query.start()
 
-    def validate_function(self, success, call_count):
-        assert RemotePetition.async_query.call_count == call_count
+    def validate_function(self, success, attempts):
+        assert RemotePetition.async_query.call_count == 1
+        assert self.results["attempts"] == attempts
+        assert self.mocks.future_session.get.call_count == sum(k * v for k, v in attempts.items())
         assert len(self.unpacked_results) == (success * self.items_per_page)
         for response in self.results["success"] + self.results["failed"]:
             assert response.index == response.expected_object["index"]
@@ -147,19 +167,26 @@ class TestRemotePetitionAsyncQuery(TestRemotePetitionFutureRequests):
         self.results = RemotePetition.async_query(**kwargs)
         self.unpacked_results = RemotePetition.unpack_query(self.results)
         assert self.validate_responses(success=10, failed=0)
-        assert self.validate_function(success=10, call_count=1)
+        assert self.validate_function(success=10, attempts={1: 10})
 
     def test_when_some_fail(self, kwargs={"max_retries": 3, "backoff": 0}):
         self.request_failures = (kwargs["max_retries"] * self.num_pages) + 5
         self.results = RemotePetition.async_query(**kwargs)
         self.unpacked_results = RemotePetition.unpack_query(self.results)
         assert self.validate_responses(success=5, failed=5)
-        assert self.validate_function(success=5, call_count=4)
+        assert self.validate_function(success=5, attempts={4: 10})
 
     def test_when_all_fail(self, kwargs={"max_retries": 3, "backoff": 0}):
         self.request_failures = (kwargs["max_retries"] * self.num_pages) + self.num_pages
         self.results = RemotePetition.async_query(**kwargs)
         self.unpacked_results = RemotePetition.unpack_query(self.results)
         assert self.validate_responses(success=0, failed=10)
-        assert self.validate_function(success=0, call_count=4)
+        assert self.validate_function(success=0, attempts={4: 10})
 
+    def test_retry_budget_limits_retries(self, kwargs={"max_retries": 3, "backoff": 0}):
+        self.request_failures = self.num_pages + 5
+        with mock.patch.object(RetryScheduler, "budget_ratio", 0.5):
+            self.results = RemotePetition.async_query(**kwargs)
+        self.unpacked_results = RemotePetition.unpack_query(self.results)
+        assert self.validate_responses(success=0, failed=10)
+        assert self.results["attempts"] == {1: 5, 2: 5}
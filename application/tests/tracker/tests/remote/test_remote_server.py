@@ -0,0 +1,98 @@
+import pytest
+from munch import Munch as ObjDict
+from application.tests.tracker.remote_server import FakeCatalogue, RemoteServer, Latency
+from application.tracker.remote import RemotePetition
+from unittest import mock
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+
+class TestRemotePetitionStandIn():
+
+    size = 30
+    per_page = 10
+
+    @pytest.fixture(scope="class")
+    def catalogue(self):
+        return FakeCatalogue(size=self.size, geographic=True, seed=1)
+
+    @pytest.fixture(autouse=True, scope="function")
+    def context(self, catalogue):
+        self.catalogue = catalogue
+        self.server = RemoteServer(catalogue, per_page=self.per_page, seed=1).start()
+        self.patches = ObjDict()
+        self.patches.base_url = mock.patch.object(RemotePetition, "base_url", self.server.base_url)
+        self.patches.throttle = mock.patch.object(RemotePetition.throttle, "enabled", False)
+        for p in self.patches.values(): p.start()
+
+        yield
+
+        for p in self.patches.values(): p.stop()
+        self.server.stop()
+
+    def fetch_all(self):
+        query = RemotePetition.async_query(state="open", max_retries=3, backoff=0)
+        return [item["id"] for item in RemotePetition.unpack_query(query)]
+
+    def test_listing_pages_cover_catalogue(self):
+        ids = self.fetch_all()
+        assert sorted(ids) == sorted(self.catalogue.petitions)
+        assert self.server.stats["listing:200"] == (self.size // self.per_page) + 1
+
+    def test_recent_listing_is_newest_first(self):
+        query = RemotePetition.async_query(state="recent", indexes=[1])
+        ids = [item["id"] for item in RemotePetition.unpack_query(query)]
+        assert ids == sorted(self.catalogue.petitions, reverse=True)[:self.per_page]
+
+    def test_detail_geographies_sum_to_signature_count(self):
+        results = RemotePetition.async_get(list(self.catalogue.petitions)[:5])
+        assert len(results["success"]) == 5
+        for response in results["success"]:
+            attributes = response.data["data"]["attributes"]
+            count = lambda key: sum(l["signature_count"] for l in attributes[key])
+            uk_count = next(c["signature_count"] for c in attributes["signatures_by_country"] if c["code"] == "GB")
+            assert count("signatures_by_country") == attributes["signature_count"]
+            assert count("signatures_by_region") == uk_count
+            assert count("signatures_by_constituency") == uk_count
+
+    def test_unchanged_petitions_return_not_modified(self):
+        with mock.patch.object(self.catalogue, "time_scale", 0):
+            ids = list(self.catalogue.petitions)[:5]
+            fetched = RemotePetition.async_get(ids)["success"]
+            petitions = [ObjDict(id=r.petition, url=RemotePetition.url_addr(r.petition), etag=r.etag) for r in fetched]
+            polled = RemotePetition.async_get(petitions)["success"]
+
+        assert [r.modified for r in polled] == [False] * 5
+        assert self.server.stats["detail:304"] == 5
+
+    def test_signatures_grow_over_time(self):
+        id = list(self.catalogue.petitions)[0]
+        elapsed = mock.PropertyMock(side_effect=[0, 10_000_000])
+        with mock.patch.object(FakeCatalogue, "elapsed", elapsed):
+            first, second = self.catalogue.signature_count(id), self.catalogue.signature_count(id)
+        assert second > first
+
+    def test_error_rate_fails_requests(self):
+        self.server.error_rate = 1
+        results = RemotePetition.async_get(list(self.catalogue.petitions)[:5], max_retries=1, backoff=0)
+        assert len(results["failed"]) == 5
+        assert sum(v for k, v in self.server.stats.items() if k.startswith("detail:")) == 10
+
+    @pytest.mark.parametrize("spec,bounds", [("fixed:0.01", (0.01, 0.01)), ("uniform:0.01:0.02", (0.01, 0.02))])
+    def test_latency_samples_within_bounds(self, spec, bounds):
+        latency = Latency.parse(spec)
+        assert all(bounds[0] <= latency.sample() <= bounds[1] for i in range(20))
+
+    def test_compressed_fetches_count_wire_and_content_bytes(self):
+        self.server.compress = True
+        ids = list(self.catalogue.petitions)[:5]
+        results = RemotePetition.async_get(ids)
+        stats = results["stats"]
+
+        assert stats["responses"] == stats["decoded"] == 5
+        assert 0 < stats["wire_bytes"] < stats["content_bytes"]
+        for response in results["success"]:
+            assert response.headers["Content-Encoding"] == "gzip"
+            assert response.data["data"]["id"] in ids
@@ -0,0 +1,135 @@
+import pytest
+from munch import Munch as ObjDict
+from unittest.mock import MagicMock
+from unittest import mock
+from application.lib.throttle import Throttle, CircuitOpen, RateLimitExceeded
+import redis, time, uuid, asyncio, logging
+
+logger = logging.getLogger(__name__)
+
+
+class TestRemoteThrottle():
+
+    @pytest.fixture(autouse=True, scope="function")
+    def context(self, app):
+        self.client = app.redis
+        self.config = ObjDict(
+            REMOTE_THROTTLE_ENABLED=True,
+            REMOTE_RATE_LIMIT=10,
+            REMOTE_RATE_BURST=5,
+            REMOTE_THROTTLE_MAX_WAIT=1,
+            REMOTE_BREAKER_THRESHOLD=3,
+            REMOTE_BREAKER_WINDOW=60,
+            REMOTE_BREAKER_RESET=60,
+        )
+        self.name = f"testing-{uuid.uuid4().hex}"
+
+        yield
+
+        keys = self.client.keys(f"throttle:{self.name}:*")
+        if keys: self.client.delete(*keys)
+
+    def make(self, **overrides):
+        self.config.update(overrides)
+        return Throttle.make(name=self.name, config=self.config, client=self.client)
+
+    def test_reserve_is_free_untill_burst_spent(self):
+        throttle = self.make()
+        waits = [throttle.reserve() for i in range(self.config.REMOTE_RATE_BURST)]
+        assert waits == [0] * self.config.REMOTE_RATE_BURST
+
+        wait = throttle.reserve()
+        assert 0 < wait <= (1 / self.config.REMOTE_RATE_LIMIT)
+
+    def test_bucket_is_shared_between_throttles(self):
+        first, second = self.make(), self.make()
+        for i in range(self.config.REMOTE_RATE_BURST):
+            first.reserve()
+
+        assert second.reserve() > 0
+        assert first.metrics()["tokens"] < 0
+
+    def test_reserve_raises_when_wait_exceeds_max(self):
+        throttle = self.make(REMOTE_RATE_LIMIT=1, REMOTE_RATE_BURST=1, REMOTE_THROTTLE_MAX_WAIT=0.5)
+        assert throttle.reserve() == 0
+        with pytest.raises(RateLimitExceeded):
+            throttle.reserve()
+
+    def test_breaker_opens_after_threshold_failures(self):
+        throttle = self.make()
+        for status_code in [503, 429, None]:
+            throttle.reserve()
+            throttle.record(status_code)
+
+        assert throttle.metrics()["breaker"] == "open"
+        with pytest.raises(CircuitOpen):
+            throttle.reserve()
+
+    def test_breaker_ignores_non_overload_errors(self):
+        throttle = self.make()
+        for status_code in [404, 304, 200, 404]:
+            throttle.reserve()
+            throttle.record(status_code)
+
+        metrics = throttle.metrics()
+        assert metrics["breaker"] == "closed"
+        assert metrics["failures"] == 0
+
+    def test_half_open_breaker_allows_single_trial(self):
+        throttle = self.make(REMOTE_BREAKER_RESET=0.1)
+        throttle.breaker.open()
+        time.sleep(0.2)
+
+        assert throttle.metrics()["breaker"] == "half_open"
+        assert throttle.reserve() == 0
+        with pytest.raises(CircuitOpen):
+            throttle.reserve()
+
+        throttle.record(200)
+        assert throttle.metrics()["breaker"] == "closed"
+
+    def test_failed_trial_reopens_breaker(self):
+        throttle = self.make(REMOTE_BREAKER_RESET=0.1)
+        throttle.breaker.open()
+        time.sleep(0.2)
+
+        throttle.reserve()
+        throttle.record(502)
+        assert throttle.metrics()["breaker"] == "open"
+
+    def test_breakers_sharing_redis_agree_on_transitions(self):
+        first, second = self.make(), self.make()
+        transitions = []
+        for throttle in [first, second, first, second]:
+            transitions.append(throttle.breaker.record(False))
+
+        assert transitions == [None, None, "opened", None]
+        assert second.breaker.record(True) == "closed"
+        assert first.breaker.record(True) is None
+
+    def test_async_acquire_and_record(self):
+        throttle = self.make()
+
+        async def run():
+            await throttle.async_acquire()
+            await throttle.async_record(503)
+
+        asyncio.get_event_loop().run_until_complete(run())
+        assert throttle.metrics()["failures"] == 1
+
+    def test_disabled_throttle_does_nothing(self):
+        throttle = self.make(REMOTE_THROTTLE_ENABLED=False, REMOTE_RATE_BURST=1)
+        assert [throttle.reserve() for i in range(5)] == [0] * 5
+        throttle.record(503)
+        assert self.client.keys(f"throttle:{self.name}:*") == []
+
+    def test_redis_errors_fail_open(self):
+        throttle = self.make()
+        throttle.bucket.script = MagicMock(side_effect=redis.ConnectionError("down"))
+        throttle.breaker.allow_script = MagicMock(side_effect=redis.ConnectionError("down"))
+        throttle.breaker.record_script = MagicMock(side_effect=redis.ConnectionError("down"))
+        throttle.breaker.client = MagicMock(hmget=MagicMock(side_effect=redis.ConnectionError("down")))
+
+        assert throttle.reserve() == 0
+        throttle.record(503)
+        assert "error" in throttle.metrics()
@@ -36,6 +36,7 @@ from application.tests.tracker.factories.petition import (
 from application.tests.tracker.factories.signatures import SignaturesByFactory
 from application.tests.tracker.factories.query import QueryFactory
 from application.tracker.remote import RemotePetition
+from application.tracker.utils import ResponseCache
 from unittest import mock
 from copy import deepcopy
 from datetime import timedelta
@@ -50,8 +51,9 @@ class TestTrackerViews():
         self.base_import_path = "application.tracker.models"
 
     @pytest.fixture(autouse=True, scope="function")
-    def context(self):
+    def context(self, app):
         self.configure()
+        ResponseCache.clear()
         yield
         for p in self.patches.values(): p.stop()
 
@@ -3,6 +3,7 @@ from application.tests import FROZEN_DATETIME, FROZEN_TIME_STR
 from application.tests.tracker.tests.views.conftest import TestTrackerViews
 from application.tracker.models import Petition, Record
 from freezegun import freeze_time
+from werkzeug.http import http_date
 from unittest import mock
 from copy import deepcopy
 from datetime import timedelta
@@ -64,6 +65,50 @@ class TestGetPetitionData(TestGetPetition):
         response = app.test_client().get(f"/petition/{petition_id}")
         assert self.validate_status(response, 404)
 
+    def test_conditional_request_returns_304_until_polled(self, app, petition_id=1):
+        response = app.test_client().get(f"/petition/{petition_id}")
+        assert self.validate_status(response, 200)
+        etag, last_modified = response.headers["ETag"], response.headers["Last-Modified"]
+
+        with mock.patch.object(Petition, "query") as query:
+            not_modified = app.test_client().get(f"/petition/{petition_id}", headers={"If-None-Match": etag})
+            since = app.test_client().get(f"/petition/{petition_id}", headers={"If-Modified-Since": last_modified})
+        assert self.validate_status(not_modified, 304) and self.validate_status(since, 304)
+        assert not_modified.headers["ETag"] == etag and not query.called
+
+        other = app.test_client().get(f"/petition/{petition_id}?signatures=true", headers={"If-None-Match": etag})
+        assert self.validate_status(other, 200)
+
+        polled = mock.Mock(id=petition_id, polled_at=self.time_now + timedelta(minutes=5))
+        Petition.bump_response_versions([polled])
+        response = app.test_client().get(f"/petition/{petition_id}", headers={"If-None-Match": etag})
+        assert self.validate_status(response, 200)
+        assert response.headers["ETag"] != etag
+
+    # last-modified is rounded up, a copy from earlier in the second the version moved is stale
+    def test_last_modified_rounds_up_version(self, app, petition_id=1):
+        with mock.patch.object(Petition, "response_version", return_value="1600000000.5"):
+            response = app.test_client().get(f"/petition/{petition_id}")
+            since = {"If-Modified-Since": http_date(1600000000)}
+            stale = app.test_client().get(f"/petition/{petition_id}", headers=since)
+
+        assert response.headers["Last-Modified"] == http_date(1600000001)
+        assert self.validate_status(stale, 200)
+
+    # rescheduled without a new record (304 and heartbeat polls, trend and growth updates)
+    def test_conditional_request_returns_200_after_rescheduled(self, app, petition_id=2):
+        response = app.test_client().get(f"/petition/{petition_id}")
+        etag = response.headers["ETag"]
+
+        with freeze_time(self.time_now + timedelta(minutes=5)):
+            Petition.query.get(petition_id).next_poll_at = self.time_now + timedelta(minutes=10)
+            self.session.commit()
+            Petition.bump_response_versions(ids=[petition_id])
+            response = app.test_client().get(f"/petition/{petition_id}", headers={"If-None-Match": etag})
+
+        assert self.validate_status(response, 200)
+        assert response.headers["ETag"] != etag
+
 
 
 @pytest.mark.parametrize(
@@ -100,4 +100,28 @@ class TestGetSignaturesByGeography(TestTrackerViews):
     def test_invalid_geography_returns_400(self, app, geography="invalid"):
         route = self.base_route + geography
         response = app.test_client().get(route)
-        assert self.validate_status(response, 400)
\ No newline at end of file
+        assert self.validate_status(response, 400)
+
+    @pytest.mark.parametrize("geography", ["region", "constituency"])
+    def test_get_by_geography_columnar(self, app, geography):
+        route, geo_key = self.base_route + geography, f"signatures_by_{geography}"
+        records = app.test_client().get(route)
+        columnar = app.test_client().get(route, query_string={"format": "columnar"})
+        assert self.validate_status(records, 200) and self.validate_status(columnar, 200)
+
+        expected, columns = records.json["signatures"], columnar.json["signatures"]
+        assert columns["timestamp"] == [r["timestamp"] for r in expected]
+        assert columns["total"] == [r["total"] for r in expected]
+
+        matrix = columns[geo_key]
+        assert len(matrix["code"]) == len(matrix["name"]) == len(matrix["count"])
+        for index, record in enumerate(expected):
+            counts = {c: row[index] for c, row in zip(matrix["code"], matrix["count"]) if row[index] is not None}
+            assert counts == {s["code"]: s["count"] for s in record[geo_key]}
+
+        assert columnar.json["meta"]["latest_data"] == records.json["meta"]["latest_data"]
+        assert len(columnar.data) < len(records.data)
+
+    def test_invalid_format_returns_400(self, app, geography="region"):
+        response = app.test_client().get(self.base_route + geography, query_string={"format": "rows"})
+        assert self.validate_status(response, 400)
@@ -191,6 +191,37 @@ class TestGetPetitionsWhereText(TestGetPetitionsWhere):
 
         assert self.validate_query(petitions, expected, order_by)
 
+    def test_get_where_text_ranked_without_order(self, app, state="open"):
+        marker = self.mark_text("action")
+        repeated = self.managers["action"][0].petition
+        repeated.update(action=f"{repeated.action} {marker} {marker} {marker}")
+        self.session.commit()
+
+        params = {"text": {"action": marker}}
+        response = app.test_client().get(f"/petitions/{state}", query_string=self.to_qs(params))
+        assert self.validate_status(response, 200)
+
+        petitions = response.json["petitions"]
+        assert sorted(p["id"] for p in petitions) == sorted(m.petition_id for m in self.managers["action"])
+        assert petitions[0]["id"] == repeated.id
+
+    def test_get_autocomplete(self, app, state="open"):
+        marker = self.mark_text("action")
+        managers = self.managers["action"]
+        params = {"q": marker[:8], "limit": len(managers), "state": state}
+        response = app.test_client().get("/petitions/autocomplete", query_string=params)
+        assert self.validate_status(response, 200)
+
+        petitions = response.json["petitions"]
+        assert sorted(p["id"] for p in petitions) == sorted(m.petition_id for m in managers)
+        assert all(set(p.keys()) == {"id", "action", "signatures"} for p in petitions)
+
+        short = app.test_client().get("/petitions/autocomplete", query_string={"q": marker[:2]})
+        assert self.validate_status(short, 200) and short.json["petitions"] == []
+
+        invalid = app.test_client().get("/petitions/autocomplete", query_string={"q": marker, "limit": 1000})
+        assert self.validate_status(invalid, 400)
+
 
 
 def configure_test_get_where_expressions(cls, **kwargs):
@@ -4,6 +4,8 @@ from application.tests.tracker.factories.petition import PetitionFactory, Petiti
 from application.tests.tracker.tests.views.conftest import TestTrackerViews
 from application.tests.tracker.conftest import uk_locale
 from application.tracker.models import Petition, Record, RecordSchema
+from application.tracker.utils import ResponseCache
+from application.lib import keyset
 from freezegun import freeze_time
 from unittest import mock
 from datetime import timedelta
@@ -90,4 +92,83 @@ class TestGetSignatureTotals(TestTrackerViews):
     def test_petition_not_found_returns_404(self, app, petition_id=999):
         route = f"/petition/{petition_id}/signatures"
         response = app.test_client().get(route)
-        assert self.validate_status(response, 404)
\ No newline at end of file
+        assert self.validate_status(response, 404)
+
+    def cached_keys(self, app, version):
+        pattern = f"{ResponseCache.KEY_PREFIX}:{self.petition_id}:{version}:*"
+        return list(app.redis.scan_iter(match=pattern))
+
+    def test_response_cached_until_recorded(self, app):
+        response = app.test_client().get(self.route)
+        assert self.validate_status(response, 200)
+        version = Petition.response_version(self.petition_id)
+        assert len(self.cached_keys(app, version)) == 1
+
+        with mock.patch.object(Petition, "record_query", side_effect=AssertionError("not cached")):
+            cached = app.test_client().get(self.route)
+        assert self.validate_status(cached, 200)
+        assert cached.json == response.json
+
+        polled = mock.Mock(id=self.petition_id, polled_at=self.time_now + timedelta(minutes=5))
+        Petition.bump_response_versions([polled])
+        bumped = Petition.response_version(self.petition_id)
+        assert bumped != version and not self.cached_keys(app, bumped)
+
+        response = app.test_client().get(self.route)
+        assert self.validate_status(response, 200)
+        assert len(self.cached_keys(app, bumped)) == 1
+
+    def test_response_cache_keyed_on_host(self, app):
+        first = app.test_client().get(self.route, base_url="http://first.example")
+        second = app.test_client().get(self.route, base_url="http://second.example")
+        assert self.validate_status(first, 200) and self.validate_status(second, 200)
+
+        version = Petition.response_version(self.petition_id)
+        assert len(self.cached_keys(app, version)) == 2
+
+    # the cached body embeds the petition, so trend/growth updates and unrecorded polls invalidate it
+    def test_response_cache_invalidated_by_petition_updates(self, app):
+        response = app.test_client().get(self.route)
+        version = Petition.response_version(self.petition_id)
+
+        with freeze_time(self.time_now + timedelta(minutes=5)):
+            Petition.query.get(self.petition_id).trend_index = 1
+            self.session.commit()
+            Petition.bump_response_versions(ids=[self.petition_id])
+            updated = app.test_client().get(self.route)
+
+        assert Petition.response_version(self.petition_id) != version
+        assert self.validate_status(updated, 200)
+        assert updated.json["petition"]["trend_index"] == 1
+
+    def test_get_total_signatures_by_cursor(self, app, items=7):
+        expected_records = self.ordered_records(geographic=True).all()
+        params, pages = {"items": items, "cursor": "", "count": True}, []
+        while params.get("cursor") is not None:
+            response = app.test_client().get(self.route, query_string=self.to_qs(params))
+            assert self.validate_status(response, 200)
+            meta = response.json["meta"]
+            assert meta["items"]["total"] == len(expected_records)
+            pages.append(response.json["signatures"])
+            params["cursor"] = meta["links"]["next"]["cursor"]
+
+        assert len(pages) == -(-len(expected_records) // items)
+        assert self.validate_signatures(expected_records, [s for page in pages for s in page])
+
+        params["cursor"] = meta["links"]["prev"]["cursor"]
+        response = app.test_client().get(self.route, query_string=self.to_qs(params))
+        assert self.validate_status(response, 200)
+        assert response.json["signatures"] == pages[-2]
+
+        params["cursor"] = "invalid"
+        response = app.test_client().get(self.route, query_string=self.to_qs(params))
+        assert self.validate_status(response, 400)
+
+        params["cursor"] = keyset.encode_cursor("next", [{"dt": "invalid"}, 1])
+        response = app.test_client().get(self.route, query_string=self.to_qs(params))
+        assert self.validate_status(response, 400)
+
+    @pytest.mark.parametrize("timestamp", [(dt(2020, 1, 1, 12, 30)), (dt(2020, 1, 1, 12, 30, 15, 250))])
+    def test_cursor_round_trips_timestamps(self, timestamp):
+        cursor = keyset.encode_cursor("prev", [timestamp, 7])
+        assert keyset.decode_cursor(cursor) == ("prev", [timestamp, 7])
@@ -1,7 +1,8 @@
 import sqlalchemy
 from flask import current_app
 from sqlalchemy_utils import *
-from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy import SQLAlchemy, Pagination
+from sqlalchemy_utils.types.choice import Choice
 from sqlalchemy import func as sqlfuncgen
 from sqlalchemy.sql import functions as sqlfunc
 from sqlalchemy.dialects import postgresql
@@ -11,17 +12,27 @@ from sqlalchemy.orm import (
     validates,
     reconstructor,
     joinedload,
-    eagerload
+    eagerload,
+    deferred,
+    undefer,
+    undefer_group,
+    aliased,
+    load_only,
+    foreign,
+    remote
 )
 from sqlalchemy import (
     and_,
+    event,
     inspect,
     Integer,
     Float,
+    Numeric,
     Boolean,
     String,
     ForeignKey,
     DateTime,
+    DDL,
     UniqueConstraint
 )
 
@@ -37,25 +48,46 @@ from application.tracker.geographies.choices.regions import REGIONS
 from application.tracker.geographies.choices.countries import COUNTRIES
 from application.tracker.geographies.choices.constituencies import CONSTITUENCIES
 from application.tracker.exceptions import PetitionsNotFound, RecordsNotFound
+from application.lib.pgcopy import copy_rows
+from application.lib import pgpartition, keyset
 
 from math import ceil, floor
 from datetime import datetime as dt
 from datetime import timedelta
 from copy import deepcopy
 from collections.abc import Iterable
+from collections import Counter
 import operator as py_operator
-import datetime, json, sys, logging
+import datetime, json, sys, time, random, itertools, redis, logging
 
 logger = logging.getLogger(__name__)
 get_operator =  lambda opr: getattr(py_operator, opr)
 plainto_tsquery = lambda qs: sqlfuncgen.plainto_tsquery("english", qs)
 
 
+# text columns are searched through stored generated tsvector columns (<column>_search)
 def match_text(_cls, column, value):
-    column = getattr(_cls, column)
+    column = getattr(_cls, f"{column}_search")
     text_query = plainto_tsquery(value)
     return column.op("@@")(text_query)
 
+def rank_text(_cls, column, value):
+    return sqlfuncgen.ts_rank(getattr(_cls, f"{column}_search"), plainto_tsquery(value))
+
+# weighted tsvector of a text column, weights rank action matches above background etc.
+def search_vector(column, weight):
+    return sqlalchemy.Computed(
+        f"setweight(to_tsvector('english', coalesce({column}, '')), '{weight}')",
+        persisted=True
+    )
+
+# petition -> record join on a latest_*_id/_at column pair (the record primary key)
+def latest_record_join(prefix):
+    return lambda: and_(
+        foreign(getattr(Petition, f"{prefix}_id")) == remote(Record.id),
+        foreign(getattr(Petition, f"{prefix}_at")) == remote(Record.timestamp)
+    )
+
 
 class Petition(db.Model):
     __tablename__ = "petition"
@@ -67,6 +99,25 @@ class Petition(db.Model):
     ]
 
     TEXT_COLS = ["action", "background", "additional_details", "creator_name"]
+    TEXT_WEIGHTS = {"action": "A", "background": "B", "additional_details": "C", "creator_name": "D"}
+    __table_args__ = tuple(
+        db.Index(f"ix_petition_{column}_search", f"{column}_search", postgresql_using="gin")
+        for column in TEXT_COLS
+    ) + (
+        db.Index("ix_petition_action_trgm", "action", postgresql_using="gin", postgresql_ops={"action": "gin_trgm_ops"}),
+    )
+    KNOWN_IDS_KEY = "petition:known_ids"
+    TRENDING_KEY = "petition:trending"
+    RESPONSE_VERSION_KEY = "petition:response_version"
+    ALL_VERSION = "all"
+    TRENDING_ORDER = {"trend_index": "ASC"}
+    VOLATILITY_SMOOTHING = 0.3
+    GROWTH_WINDOWS = {
+        "growth_5m": {"minutes": 5},
+        "growth_1h": {"hours": 1},
+        "growth_24h": {"hours": 24},
+        "growth_7d": {"days": 7}
+    }
     STATE_VALUES = [v for v in dict(STATE_CHOICES).values()]
     STATE_LOOKUP = LazyDict({v: k for k, v in dict(STATE_CHOICES).items()})
     record_relation_attributes = {"lazy": "dynamic", "back_populates": "petition", "cascade": "all,delete-orphan"}
@@ -80,7 +131,13 @@ class Petition(db.Model):
     background = db.Column(String)
     creator_name = db.Column(String)
     additional_details = db.Column(String)
-    pt_created_at logger = logging.getLogger(__name__)= db.Column(DateTime)
+    action_search = db.Column(postgresql.TSVECTOR, search_vector("action", TEXT_WEIGHTS["action"]))
+    background_search = db.Column(postgresql.TSVECTOR, search_vector("background", TEXT_WEIGHTS["background"]))
+    creator_name_search = db.Column(postgresql.TSVECTOR, search_vector("creator_name", TEXT_WEIGHTS["creator_name"]))
+    additional_details_search = db.Column(
+        postgresql.TSVECTOR, search_vector("additional_details", TEXT_WEIGHTS["additional_details"])
+    )
+    pt_created_at = db.Column(DateTime)
     pt_updated_at = db.Column(DateTime)
     pt_rejected_at = db.Column(DateTime)
     pt_closed_at = db.Column(DateTime)
@@ -91,13 +148,30 @@ class Petition(db.Model):
     scheduled_debate_date = db.Column(DateTime)
     debate_outcome_at = db.Column(DateTime)
     polled_at = db.Column(DateTime)
+    etag = db.Column(String)
+    last_modified = db.Column(String)
     db_created_at = db.Column(DateTime, default=sqlfunc.now())
     db_updated_at = db.Column(DateTime, default=sqlfunc.now(), onupdate=sqlfunc.now())
     initial_data = db.Column(JSONType)
     latest_data = db.Column(JSONType)
     trend_index = db.Column(Integer, default=None)
     growth_rate = db.Column(Float, default=0)
+    poll_volatility = db.Column(Float, default=0)
+    next_poll_at = db.Column(DateTime, index=True)
+    growth_5m = db.Column(Float, default=0)
+    growth_1h = db.Column(Float, default=0)
+    growth_24h = db.Column(Float, default=0)
+    growth_7d = db.Column(Float, default=0)
+    growth_acceleration = db.Column(Float, default=0)
+    latest_record_id = db.Column(Integer)
+    latest_record_at = db.Column(DateTime)
+    latest_record_signatures = db.Column(Integer)
+    latest_geo_record_id = db.Column(Integer)
+    latest_geo_record_at = db.Column(DateTime)
+    latest_geo_record_signatures = db.Column(Integer)
     records = relationship(lambda: Record, **record_relation_attributes)
+    latest_record = relationship(lambda: Record, primaryjoin=latest_record_join("latest_record"), viewonly=True)
+    latest_geo_record = relationship(lambda: Record, primaryjoin=latest_record_join("latest_geo_record"), viewonly=True)
     date = synonym("pt_created_at")
 
     remote = RemotePetition
@@ -118,6 +192,12 @@ class Petition(db.Model):
         column, direction = list(order_by.items())[0]
         return getattr(getattr(cls, column), direction.lower())
 
+    # keyset pagination keys for an order_by, id breaks ties between equal values
+    @classmethod
+    def keyset_keys(cls, order_by=None):
+        column, direction = list((order_by or {"date": "DESC"}).items())[0]
+        return [(column, getattr(cls, column), direction.upper()), ("id", cls.id, direction.upper())]
+
     @classmethod
     def validate_state(cls, state):
         try:
@@ -142,100 +222,450 @@ class Petition(db.Model):
             filters.append(expression)
         return filters
 
+    # open petitions in trending order are read from the trending zset when it is populated
     @classmethod
     def where(cls, state=None, archived=False, text=None, order_by=None, expressions=None):
-        filters = []
+        if state == "open" and archived is False and not (text or expressions) and order_by == cls.TRENDING_ORDER:
+            trending = TrendingQuery.load()
+            if trending:
+                return trending
+
+        filters, ordering = [], []
         if state and state != "all":
             filters.append(cls.state == cls.STATE_LOOKUP[state])
         if archived is not None:
             filters.append(cls.archived == archived)
         if text:
-            filters += [match_text(cls, c, text[c]) for c in cls.TEXT_COLS if text.get(c)]
+            searched = [c for c in cls.TEXT_COLS if text.get(c)]
+            filters += [match_text(cls, c, text[c]) for c in searched]
+            if searched and not order_by:
+                ordering.append(sum(rank_text(cls, c, text[c]) for c in searched).desc())
         if expressions:
             filters += cls.filter_expression(**expressions)
 
-        ordering = cls.order_attr(order_by or {"date": "DESC"})
-        return cls.query.filter(*filters).order_by(ordering())
+        ordering.append(cls.order_attr(order_by or {"date": "DESC"})())
+        return cls.query.filter(*filters).order_by(*ordering)
+
+    def is_trendable(self):
+        return getattr(self.state, "code", self.state) == self.STATE_LOOKUP["open"] and not self.archived
+
+    # score polled open petitions by their growth rate, as cache_trending does, so a poll never
+    # reorders the leaderboard on a different measure. closed and archived petitions leave it
+    @classmethod
+    def push_trending(cls, petitions):
+        trending = {p.id: p.growth_rate or 0 for p in petitions if p.is_trendable()}
+        removed = [p.id for p in petitions if not p.is_trendable()]
+        if not current_app.config["TRENDING_CACHE_ENABLED"] or not (trending or removed):
+            return trending
+
+        try:
+            pipe = current_app.redis.pipeline()
+            if trending:
+                pipe.zadd(cls.TRENDING_KEY, trending)
+            if removed:
+                pipe.zrem(cls.TRENDING_KEY, *removed)
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"could not update trending scores, error: {e}")
+        return trending
+
+    # rebuild the leaderboard from the open petitions' growth rates, swapped in atomically
+    @classmethod
+    def cache_trending(cls, chunk_size=10_000):
+        building = f"{cls.TRENDING_KEY}:building"
+        query = cls.query.filter(cls.state == cls.STATE_LOOKUP["open"], cls.archived == False)
+        scores = {id: growth or 0 for id, growth in query.with_entities(cls.id, cls.growth_rate)}
+        logger.info(f"caching trending petitions, count: {len(scores)}")
+
+        try:
+            pipe = current_app.redis.pipeline()
+            pipe.delete(building)
+            items = list(scores.items())
+            for i in range(0, len(items), chunk_size):
+                pipe.zadd(building, dict(items[i:i + chunk_size]))
+            if scores:
+                pipe.rename(building, cls.TRENDING_KEY)
+            else:
+                pipe.delete(cls.TRENDING_KEY)
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"could not cache trending petitions, error: {e}")
+        return len(scores)
+
+    # typeahead matches for text anywhere in the action (served by the action trigram index)
+    # closest matches first, then by signatures, as (id, action, signatures) rows
+    @classmethod
+    def autocomplete(cls, text, limit=10, state=None):
+        text = (text or "").strip()
+        if len(text) < current_app.config["AUTOCOMPLETE_MIN_LENGTH"]:
+            return []
+
+        escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        query = cls.query.with_entities(cls.id, cls.action, cls.signatures)
+        query = query.filter(cls.action.ilike(f"%{escaped}%"))
+        if state and state != "all":
+            query = query.filter(cls.state == cls.STATE_LOOKUP[state])
+
+        ordering = [sqlfuncgen.word_similarity(text, cls.action).desc(), cls.signatures.desc()]
+        return query.order_by(*ordering).limit(limit).all()
 
     # onboard multiple remote petitions from the result of a query
+    # listing pages and petition details share one request stream: new IDs are queued for
+    # fetching as each page lands and onboarded in batches of batch_size as their details arrive
     @classmethod
-    def populate(cls, state="open", ids=None):
+    def populate(cls, state="open", ids=None, batch_size=250, incremental=False, max_retries=3, backoff=1):
         logger.info("executing petition populate")
-        discovered = ids or cls.discover(state=state)
-        if not discovered:
-            return discovered
+        state = cls.listing_state(state, incremental)
+        calls = cls.remote.get_calls(ids) if ids else cls.remote.query_calls(state, [1])
+        stream = cls.remote.async_stream(calls, max_retries=max_retries, backoff=backoff)
+
+        seen, batch, populated_ids, counts = set(), [], [], Counter()
+        for response in stream:
+            kind = "pages" if hasattr(response, "index") else "petitions"
+            counts[f"{kind}_{'success' if response.success else 'failed'}"] += 1
+            if not response.success:
+                continue
+
+            if kind == "pages":
+                discovered = cls.discover_page(stream, response, state, seen, incremental)
+                counts["discovered"] += len(discovered)
+                stream.submit(*cls.remote.get_calls(discovered))
+            else:
+                batch.append(response)
+                if len(batch) >= batch_size:
+                    populated_ids += cls.onboard(batch)
+                    batch = []
+
+        if batch:
+            populated_ids += cls.onboard(batch)
+
+        logger.info(f"populate stream completed, responses: {dict(counts)}")
+        if not ids and not counts["pages_success"]:
+            raise RuntimeError(f"query response empty, failed indexes: '{counts['pages_failed']}'")
+        if (ids or counts["discovered"]) and not populated_ids:
+            raise RuntimeError(f"failed to fetch detailed remote data for IDs: {ids or 'discovered'}")
 
-        logger.info("fetching remote petitions")
-        responses = cls.remote.async_get(petitions=discovered, max_retries=3)
-        if not responses["success"]:
-            raise RuntimeError(f"failed to fetch detailed remote data for IDs: {discovered}")
+        populated = list(cls.query.filter(cls.id.in_(populated_ids)).all())
+        logger.info(f"populate completed, IDs: {populated_ids}")
+        return populated
 
-        populated, populated_ids = [], []
-        logger.info("initializing local petitions")
-        trend_index = cls.query.count() + len(responses["success"]) + 1
-        for r in responses["success"]:
+    # save a batch of fetched remote petitions, returns their IDs
+    @classmethod
+    def onboard(cls, responses):
+        logger.info(f"initializing local petitions, batch size: {len(responses)}")
+        populated = []
+        trend_index = cls.query.count() + len(responses) + 1
+        for r in responses:
             petition = cls(id=r.data["data"]["id"], initial_data=r.data)
             petition.trend_index = trend_index
-            petition.sync(r.data, r.timestamp)
+            petition.sync(r.data, r.timestamp, r.etag, r.last_modified)
             populated.append(petition)
-            populated_ids.append(petition.id)
 
         logger.info("saving local petitions")
         db.session.bulk_save_objects(populated)
         db.session.commit()
 
-        populated = list(cls.query.filter(cls.id.in_(populated_ids)).all())
-        logger.info(f"populate completed, IDs: {populated_ids}")
-        return populated
+        populated_ids = [p.id for p in populated]
+        cls.cache_onboarded(populated_ids)
+        cls.bump_response_versions()
+        return populated_ids
 
     # find remote petitions that have yet to be onboarded
     @classmethod
-    def discover(cls, state="open"):
+    def discover(cls, state="open", incremental=False, max_retries=3, backoff=1):
         logger.info("executing petition discovery")
-        query = cls.remote.async_query(state=state, max_retries=3)
-        if not any(query["success"]):
-            raise RuntimeError(f"query response empty, failed indexes: '{len(query['failed'])}'")
+        state = cls.listing_state(state, incremental)
+        calls = cls.remote.query_calls(state, [1])
+        stream = cls.remote.async_stream(calls, max_retries=max_retries, backoff=backoff)
+
+        seen, discovered, counts = set(), set(), Counter()
+        for response in stream:
+            counts["success" if response.success else "failed"] += 1
+            if response.success:
+                discovered |= cls.discover_page(stream, response, state, seen, incremental)
 
-        logger.info("comparing queried IDs against existing IDs")
-        query = cls.remote.unpack_query(query)
-        queried = {item["id"] for item in query}
-        existing = {p[0] for p in cls.query.with_entities(Petition.id).all()}
-        discovered = (queried - existing)
+        if not counts["success"]:
+            raise RuntimeError(f"query response empty, failed indexes: '{counts['failed']}'")
 
         logger.info(f"{len(discovered)} petitions discovered, IDs: {discovered}")
         return discovered
 
+    # incremental discovery walks the newest first listing (open petitions only)
+    @classmethod
+    def listing_state(cls, state, incremental):
+        if not incremental:
+            return state
+        if state != "open":
+            raise ValueError(f"incremental discovery only supports open petitions, got: '{state}'")
+        return cls.remote.newest_first_state
+
+    # compare the IDs on a listing page against existing IDs, the first page queues the rest
+    # incremental: the next page is only queued while pages contain unknown IDs, since the
+    # listing is newest first a fully known page means every later page is known as well
+    @classmethod
+    def discover_page(cls, stream, response, state, seen, incremental=False):
+        queried = {item["id"] for item in response.data["data"]} - seen
+        seen |= queried
+        discovered = cls.unknown_ids(queried) if incremental else cls.new_ids(queried)
+
+        if incremental and discovered and response.data["links"].get("next"):
+            stream.submit(*cls.remote.query_calls(state, [response.index + 1]))
+        elif not incremental and response.index == 1:
+            last_page_num = cls.remote.last_page_num(response.data["links"])
+            stream.submit(*cls.remote.query_calls(state, range(2, last_page_num + 1)))
+
+        return discovered
+
+    # IDs not in the petition table
+    @classmethod
+    def new_ids(cls, ids):
+        if not ids:
+            return set()
+
+        existing = cls.query.with_entities(cls.id).filter(cls.id.in_(list(ids)))
+        return set(ids) - {p[0] for p in existing}
+
+    # IDs not in the known IDs cache (built from the petition table when missing or expired)
+    @classmethod
+    def unknown_ids(cls, ids):
+        ids = list(ids)
+        if not current_app.redis.exists(cls.KNOWN_IDS_KEY):
+            cls.cache_known_ids()
+
+        pipe = current_app.redis.pipeline(transaction=False)
+        for id in ids:
+            pipe.sismember(cls.KNOWN_IDS_KEY, id)
+        return {id for id, known in zip(ids, pipe.execute()) if not known}
+
+    # rebuild the known IDs set under a temporary key then swap it in atomically
+    # 0 (never a petition ID) is always added so an empty table still counts as cached
+    @classmethod
+    def cache_known_ids(cls, chunk_size=10_000):
+        building = f"{cls.KNOWN_IDS_KEY}:building"
+        ids = [p[0] for p in cls.query.with_entities(cls.id)]
+        logger.info(f"caching known petition IDs, count: {len(ids)}")
+
+        pipe = current_app.redis.pipeline()
+        pipe.delete(building)
+        pipe.sadd(building, 0)
+        for i in range(0, len(ids), chunk_size):
+            pipe.sadd(building, *ids[i:i + chunk_size])
+        pipe.rename(building, cls.KNOWN_IDS_KEY)
+        pipe.expire(cls.KNOWN_IDS_KEY, current_app.config["PETITION_KNOWN_IDS_TTL"])
+        pipe.execute()
+        return len(ids)
+
+    # a missing cache is left to be rebuilt in full rather than started partially
+    @classmethod
+    def cache_onboarded(cls, ids):
+        if ids and current_app.redis.exists(cls.KNOWN_IDS_KEY):
+            current_app.redis.sadd(cls.KNOWN_IDS_KEY, *ids)
+
     # poll all petitions which match where param and kwargs opts (or provide list)
     # signatures_by = True for full geo records, signatures_by = False for basic total records
+    # heartbeat (seconds): petitions whose signature count has not moved are only recorded once
+    # per heartbeat, None uses POLL_HEARTBEAT and 0 records every poll
+    # due: only poll petitions whose next_poll_at has passed (or was never scheduled)
+    # geographic polls are unconditional, a base poll may have taken the change a 304 would hide
     @classmethod
-    def poll(cls, geographic=False, petitions=None, where=None, min_growth=0, max_retries=3):
+    def poll(cls, geographic=False, petitions=None, where=None, due=False, min_growth=0, max_retries=3, heartbeat=None):
         logger.info("executing petition poll")
-        petitions = petitions or cls.where(state="open", expressions=where).all()
+        petitions = petitions or cls.poll_query(where, due).all()
         logger.info(f"polling petitions: {petitions}")
         if not petitions:
             return []
 
-        responses = cls.remote.async_get(petitions=petitions, max_retries=max_retries)
+        polled_at = dt.now()
+        conditional = not geographic
+        responses = cls.remote.async_get(petitions=petitions, max_retries=max_retries, conditional=conditional)
         logger.info(f"petitions returned from async poll: {len(responses['success'])} ")
         if not responses["success"]:
             raise RuntimeError(f"no poll responses, failures: {len(responses['failed'])}")
 
-        polled = [r.petition.sync(r.data, r.timestamp) for r in responses["success"]]
+        modified = [r for r in responses["success"] if r.modified]
+        logger.info(f"petitions unmodified since last poll: {len(responses['success']) - len(modified)}")
+
+        # unmodified (304) petitions keep their count but are still polled, so they go on
+        # to the heartbeat check the same as an unchanged 200
+        polled = []
+        for response in responses["success"]:
+            petition = response.petition
+            previous = {"signatures": petition.signatures, "polled_at": petition.polled_at}
+            if response.modified:
+                petition.sync(response.data, response.timestamp, response.etag, response.last_modified)
+            else:
+                petition.polled_at = response.timestamp
+            petition.observe_growth(now=polled_at, **previous)
+            polled.append(petition)
+
+        # every responding petition is rescheduled, so all of their versions move
+        polled_ids = [p.id for p in polled]
+        cls.push_trending(polled)
+        cls.schedule_polls(polled, polled_at)
         db.session.flush()
-        return cls.save_poll_data(polled, geographic, min_growth)
 
+        changed = cls.detect_changes(polled, geographic, heartbeat)
+        logger.info(f"petitions unchanged since last record: {len(polled) - len(changed)}")
+        if not changed:
+            db.session.commit()
+            cls.bump_response_versions(ids=polled_ids)
+            return []
+
+        return cls.save_poll_data(changed, geographic, min_growth, polled_ids)
+
+    # polled_ids: petitions polled alongside those recorded, their response versions move too
     @classmethod
-    def save_poll_data(cls, petitions, geographic, min_growth):
+    def save_poll_data(cls, petitions, geographic, min_growth, polled_ids=()):
         logger.info("executing save poll data")
-        recorded = cls.save_base_data(petitions)
+        base_records = cls.save_base_data(petitions)
+        recorded = base_records
         if geographic:
-            recorded = cls.save_geo_data(recorded, min_growth)
+            recorded = cls.save_geo_data(base_records, min_growth)
 
         logger.info("commiting poll!")
         db.session.commit()
+        cls.remember_recorded(base_records)
+        cls.bump_response_versions(ids=[*polled_ids, *[p.id for p in petitions]])
         logger.info("completed poll!")
         return recorded
 
+    @classmethod
+    def poll_query(cls, where=None, due=False):
+        query = cls.where(state="open", expressions=where)
+        if due:
+            is_due = sqlalchemy.or_(cls.next_poll_at == None, cls.next_poll_at <= dt.now())
+            query = query.filter(is_due).order_by(cls.next_poll_at.asc().nullsfirst())
+        return query
+
+    @classmethod
+    def schedule_polls(cls, petitions, polled_at):
+        config = current_app.config
+        for petition in petitions:
+            petition.next_poll_at = polled_at + timedelta(seconds=petition.poll_interval(config))
+
+    # seconds until the next poll: long enough for ~POLL_TARGET_SIGNATURES new signatures at the
+    # current growth rate, capped for top trending petitions and shortened by volatility.
+    # jittered down by up to 10% so petitions polled together drift apart
+    def poll_interval(self, config):
+        min_interval, max_interval = config["POLL_MIN_INTERVAL"], config["POLL_MAX_INTERVAL"]
+        per_second = max(self.growth_rate or 0, 0) / 60.0
+        interval = (config["POLL_TARGET_SIGNATURES"] / per_second) if per_second else max_interval
+
+        if self.trend_index and self.trend_index <= config["POLL_HOT_TREND_INDEX"]:
+            interval = min(interval, config["POLL_HOT_INTERVAL"])
+
+        interval *= 1 - (min(self.poll_volatility or 0, 1) / 2)
+        interval *= random.uniform(0.9, 1)
+        return max(min_interval, min(interval, max_interval))
+
+    # volatility: smoothed relative difference between the growth seen since the last
+    # poll and the hourly growth rate, 0 = steady, 1 = bursting or stalling
+    def observe_growth(self, signatures, polled_at, now=None):
+        observed = self.observed_growth(signatures, polled_at, now)
+        if observed is None:
+            return self.poll_volatility
+
+        expected = max(self.growth_rate or 0, 0)
+        deviation = abs(observed - expected) / max(observed, expected, 1)
+
+        smoothing = self.VOLATILITY_SMOOTHING
+        self.poll_volatility = round(((1 - smoothing) * (self.poll_volatility or 0)) + (smoothing * deviation), 3)
+        return self.poll_volatility
+
+    # signatures/minute since the previous poll, None without a previous poll
+    def observed_growth(self, signatures, polled_at, now=None):
+        now = now or dt.now()
+        if signatures is None or not isinstance(polled_at, dt):
+            return None
+
+        elapsed = (now - polled_at).total_seconds() / 60.0
+        if elapsed <= 0:
+            return None
+        return max(self.signatures - signatures, 0) / elapsed
+
+    # last recorded "signatures:epoch" per petition, base and geographic series are kept apart
+    @classmethod
+    def last_recorded_key(cls, geographic):
+        return f"petition:last_recorded:{'geographic' if geographic else 'base'}"
+
+    # petitions to record: count moved since the last record of the series, heartbeat due,
+    # or no last record known (redis errors record everything)
+    @classmethod
+    def detect_changes(cls, petitions, geographic, heartbeat=None):
+        heartbeat = current_app.config["POLL_HEARTBEAT"] if heartbeat is None else heartbeat
+        if not heartbeat or not petitions:
+            return petitions
+
+        try:
+            last_recorded = current_app.redis.hmget(cls.last_recorded_key(geographic), [p.id for p in petitions])
+        except redis.RedisError as e:
+            logger.warning(f"last recorded counts unavailable, recording all petitions, error: {e}")
+            return petitions
+
+        changed, now = [], time.time()
+        for petition, last in zip(petitions, last_recorded):
+            signatures, recorded_at = last.decode().split(":") if last else (None, 0)
+            if signatures is None or int(signatures) != petition.signatures:
+                changed.append(petition)
+            elif (now - float(recorded_at)) >= heartbeat:
+                changed.append(petition)
+
+        return changed
+
+    @classmethod
+    def remember_recorded(cls, records):
+        mappings, now = {True: {}, False: {}}, time.time()
+        for record in records:
+            mappings[bool(record.geographic)][record.petition_id] = f"{record.signatures}:{now}"
+
+        try:
+            pipe = current_app.redis.pipeline()
+            for geographic, mapping in mappings.items():
+                if mapping:
+                    pipe.hset(cls.last_recorded_key(geographic), mapping=mapping)
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"could not store last recorded counts, error: {e}")
+
+    # cached api responses and etags are keyed on the version of the petition they were built from,
+    # anything that changes a serialized column (polls, trend indexes, growth metrics) moves the
+    # versions of the petitions it touched on to now (or polled_at when later). listings of
+    # petitions share the ALL_VERSION field, moved on by anything that changes many petitions
+    @classmethod
+    def bump_response_versions(cls, petitions=(), ids=(), chunk_size=10_000):
+        now = time.time()
+        versions = {id: now for id in ids}
+        versions.update({p.id: max(now, p.polled_at.timestamp()) for p in petitions if p.polled_at})
+        versions[cls.ALL_VERSION] = now
+
+        try:
+            pipe = current_app.redis.pipeline()
+            items = list(versions.items())
+            for i in range(0, len(items), chunk_size):
+                pipe.hset(cls.RESPONSE_VERSION_KEY, mapping=dict(items[i:i + chunk_size]))
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"could not bump response versions, error: {e}")
+        return versions
+
+    # version for a petition id (or ALL_VERSION when None), a missing version starts at now so it
+    # never falls back behind one already issued (None if the petition does not exist)
+    @classmethod
+    def response_version(cls, petition_id=None):
+        field = cls.ALL_VERSION if petition_id is None else petition_id
+        version = current_app.redis.hget(cls.RESPONSE_VERSION_KEY, field)
+        if version:
+            return version.decode()
+
+        if petition_id is not None:
+            exists = cls.query.filter(cls.id == petition_id).exists()
+            if not db.session.query(exists).scalar():
+                return None
+
+        version = str(time.time())
+        current_app.redis.hsetnx(cls.RESPONSE_VERSION_KEY, field, version)
+        return version
+
     # save basic record without detailed geographic signatures
     @classmethod
     def save_base_data(cls, petitions):
@@ -243,88 +673,237 @@ class Petition(db.Model):
         record_values = [Record.get_insert_map(p) for p in petitions]
 
         logger.info("bulk saving base records!")
-        statement = postgresql.insert(Record).values(record_values).returning(Record.id)
+        statement = postgresql.insert(Record).values(record_values).returning(Record.id, Record.timestamp)
         inserted = db.session.execute(statement).fetchall()
         db.session.flush()
 
-        records = Record.query.filter(Record.id.in_([id[0] for id in inserted])).all()
+        ids, timestamps = [id for id, ts in inserted], {ts for id, ts in inserted}
+        records = Record.query.filter(Record.id.in_(ids), Record.timestamp.in_(timestamps)).all()
+        for record in records:
+            record.petition.track_latest(record)
         logger.info(f"base records saved: {len(records)}")
         return records
 
     # upgrade basic record to detailed geographic signatures record
+    # method: "copy" streams rows with COPY, "orm" builds and bulk saves model instances
+    # storage: "rows" (signatures_by_* tables) or "packed" (count arrays on the record)
     @classmethod
-    def save_geo_data(cls, records, min_growth=0):
+    def save_geo_data(cls, records, min_growth=0, method=None, storage=None):
         logger.info("executing save geo data")
+        method = method or current_app.config["GEO_WRITE_METHOD"]
+        storage = storage or current_app.config["GEO_STORAGE"]
 
-        signatures_by = []
         if min_growth:
             records = Record.filter_growth(records, min_growth, geographic=True)
-        for r in records:
-            signatures_by += r.build(r.petition.latest_data["data"]["attributes"])
 
-        logger.info("bulk saving geo records")
-        db.session.bulk_save_objects(signatures_by)
-        db.session.flush()
+        logger.info(f"bulk saving geo records, storage: {storage}, method: {method}")
+        if storage == "packed":
+            for r in records:
+                r.pack(r.petition.latest_data["data"]["attributes"])
+        elif storage == "delta":
+            cls.save_geo_deltas(records)
+        elif storage != "rows":
+            raise ValueError(f"Invalid geo storage: '{storage}', valid: ['rows', 'packed', 'delta']")
+        elif method == "copy":
+            cls.copy_geo_data(records)
+        elif method == "orm":
+            signatures_by = []
+            for r in records:
+                signatures_by += r.build(r.petition.latest_data["data"]["attributes"])
+            db.session.bulk_save_objects(signatures_by)
+        else:
+            raise ValueError(f"Invalid geo write method: '{method}', valid: ['copy', 'orm']")
+
+        for record in records:
+            record.petition.track_latest(record)
 
+        db.session.flush()
         logger.info(f"geo records saved {len(records)}")
         return records
 
+    # packed records stored as deltas against the petition's latest keyframe, a new keyframe
+    # is written once GEO_KEYFRAME_INTERVAL deltas reference the current one (or a locale is dropped)
+    @classmethod
+    def save_geo_deltas(cls, records):
+        interval = current_app.config["GEO_KEYFRAME_INTERVAL"]
+        petition_ids = [r.petition_id for r in records]
+        keyframes = Record.latest_keyframes(petition_ids, exclude=[r.id for r in records])
+
+        written = Counter()
+        for record in records:
+            record.pack(record.petition.latest_data["data"]["attributes"])
+            keyframe, deltas = keyframes.get(record.petition_id, (None, 0))
+            if keyframe and deltas < interval and not record.drops_locales(keyframe):
+                record.encode_delta(keyframe)
+                written["delta"] += 1
+            else:
+                written["keyframe"] += 1
+
+        logger.info(f"geo records encoded: {dict(written)}")
+        return records
+
+    # one COPY per geography table, rows are generated per record as the copy reads them
+    @classmethod
+    def copy_geo_data(cls, records):
+        for record in records:
+            record.geographic = True
+
+        connection = db.session.connection().connection
+        copied = {}
+        for geo in Record.GEOGRAPHIES:
+            model = Record.model_for(geo)
+            columns = ["record_id", "timestamp", Record.code_column_for(geo), "count"]
+            rows = itertools.chain.from_iterable(Record.signature_rows(r, geo) for r in records)
+            copied[geo] = copy_rows(connection, model.__tablename__, columns, rows)
+
+        logger.info(f"geo rows copied: {copied}")
+        return copied
+
+    # growth rates and trend indexes are computed in the database: one UPDATE ... FROM for the
+    # growth of petitions with a record in the window, one ranking the open petitions with row_number
     @classmethod
     def update_trend_indexes(cls, since={"hours": 1}, margin={"minutes": 5}, handle_missing="reindex"):
         logger.info("updating petition trend indexes")
-        found_petitions = cls.update_growth_rates(since, margin)
-        found_ids = [p.id for p in found_petitions]
+        found_ids = cls.update_growth_rates(since, margin)
+        missing_query = cls.where(state="open", archived=False).filter(~cls.id_in(found_ids))
+        missing_ids = [id for id, in missing_query.with_entities(Petition.id).order_by(None)]
 
-        missing_query = cls.where(state="open", archived=False).filter(cls.id.notin_(found_ids))
-        missing_petitions = missing_query.order_by(Petition.growth_rate.desc()).all()
-        missing_ids = [p.id for p in missing_petitions]
+        ordering = cls.handle_trending_query(found_ids, missing_ids, handle_missing)
+        rank = sqlfunc.row_number().over(order_by=ordering).label("trend_index")
+        ranked = cls.where(state="open", archived=False).with_entities(Petition.id, rank).order_by(None)
+        ranked = ranked.statement.correlate(None).alias("ranked")
 
-        petitions = cls.handle_trending_query(found_petitions, missing_petitions, handle_missing)
         logger.info("updating trend index")
-        for index, petition in enumerate(petitions):
-            petition.trend_index = index + 1
-
+        statement = Petition.__table__.update().where(Petition.id == ranked.c.id)
+        db.session.execute(statement.values(trend_index=ranked.c.trend_index))
         db.session.commit()
+        if current_app.config["TRENDING_CACHE_ENABLED"]:
+            cls.cache_trending()
+        cls.bump_response_versions(ids=found_ids + missing_ids)
+
         logger.info("succesfully updated trend indexes")
-        return {"found": found_petitions, "missing": missing_petitions}
+        return {"found": cls.load_trending(found_ids), "missing": cls.load_trending(missing_ids)}
 
+    # ORDER BY for the trend index, concat ranks petitions found in the window before missing ones
     @classmethod
-    def handle_trending_query(cls, found, missing, action):
-        sort_growth = lambda items: sorted(items, key=lambda p: p.growth_rate, reverse=True)
-        if not missing:
-            return sort_growth(found)
+    def handle_trending_query(cls, found_ids, missing_ids, action):
+        sort_growth = [Petition.growth_rate.desc().nullslast(), Petition.id]
+        if not missing_ids:
+            return sort_growth
 
         if action == "concat":
-            return sort_growth(found) + sort_growth(missing)
+            return [cls.id_in(found_ids).desc()] + sort_growth
         if action == "reindex":
-            return sort_growth(found + missing)
+            return sort_growth
         else:
+            found, missing = cls.load_trending(found_ids), cls.load_trending(missing_ids)
             raise PetitionsNotFound("trend index update", missing=missing, found=found)
 
+    # growth since the window start for each open petition's latest base record in the window
+    # returns the ids of petitions found, others keep their previous growth rate
     @classmethod
     def update_growth_rates(cls, since, margin):
         logger.info(f"updating petition growth rates since: {since}, margin: {margin}")
 
         since = dt.now() - timedelta(**since)
         margin = timedelta(**margin)
-        timestamp = {"lt": since + margin, "gt": since - margin}
+        lookback = timedelta(seconds=current_app.config["POLL_HEARTBEAT"])
+        timestamp = {"lt": since + margin, "gt": since - margin - lookback}
         opts = {"state": "open", "archived": False, "geographic": False}
-        distinct_records = Record.distinct_on(timestamp=timestamp, opts=opts, order_by="DESC").all()
-        if not distinct_records:
-            raise RecordsNotFound("growth rate update", found=[])
+        latest = Record.distinct_on(timestamp=timestamp, opts=opts, order_by="DESC")
+        latest = latest.with_entities(Record.petition_id, Record.timestamp, Record.signatures)
+        latest = latest.statement.correlate(None).alias("latest")
+
+        started_at = sqlfuncgen.greatest(latest.c.timestamp, since)
+        minutes = sqlalchemy.extract("epoch", Petition.polled_at - started_at) / 60
+        growth = sqlalchemy.cast((Petition.signatures - latest.c.signatures) / sqlfuncgen.nullif(minutes, 0), Numeric)
+        growth = sqlfunc.coalesce(sqlfuncgen.round(growth, 3), 0)
 
-        petitions = []
         logger.info("comparing petition growth rates")
-        for record in distinct_records:
-            record.petition.growth_rate = record.avg_growth_since()
-            petitions.append(record.petition)
+        statement = Petition.__table__.update().where(Petition.id == latest.c.petition_id)
+        statement = statement.values(growth_rate=growth).returning(Petition.id)
+        found_ids = [id for id, in db.session.execute(statement)]
+        if not found_ids:
+            raise RecordsNotFound("growth rate update", found=[])
+
+        db.session.commit()
+        return found_ids
 
+    # growth rate (signatures/minute) over each of GROWTH_WINDOWS, and acceleration (the change in
+    # the 1 hour rate from the hour before), for all open petitions in one UPDATE ... FROM
+    @classmethod
+    def update_growth_metrics(cls):
+        now = dt.now()
+        lookback = timedelta(seconds=current_app.config["POLL_HEARTBEAT"])
+        windows = {column: timedelta(**window) for column, window in cls.GROWTH_WINDOWS.items()}
+        windows["previous_1h"] = timedelta(hours=2)
+        logger.info(f"updating petition growth metrics, windows: {list(windows)}")
+
+        starts = cls.growth_window_starts(now, windows, since=now - max(windows.values()) - lookback)
+        offset = lambda window: -window.total_seconds()
+        polled_at = sqlalchemy.extract("epoch", Petition.polled_at - now)
+        rate = lambda signatures, start, until, window: cls.growth_expression(
+            signatures - start[2], until - sqlfuncgen.greatest(start[1], offset(window))
+        )
+
+        metrics = {}
+        for column, window in cls.GROWTH_WINDOWS.items():
+            metrics[column] = rate(Petition.signatures, starts.c[column], polled_at, windows[column])
+
+        hour, previous = starts.c["growth_1h"], starts.c["previous_1h"]
+        until = sqlfuncgen.greatest(hour[1], offset(windows["growth_1h"]))
+        previous_rate = rate(hour[2], previous, until, windows["previous_1h"])
+        metrics["growth_acceleration"] = metrics["growth_1h"] - previous_rate
+
+        statement = Petition.__table__.update().where(Petition.id == starts.c.petition_id)
+        statement = statement.values(**metrics).returning(Petition.id)
+        updated = [id for id, in db.session.execute(statement)]
         db.session.commit()
-        return petitions
+        cls.bump_response_versions(ids=updated)
+
+        logger.info(f"growth metrics updated for petitions: {len(updated)}")
+        return updated
+
+    # one scan of the open petitions' records since the longest window, grouped by petition
+    # each window start is the latest [seconds before now, signatures] point at or before it
+    # (the first point if the petition's records start after it), max over arrays is ordered
+    @classmethod
+    def growth_window_starts(cls, now, windows, since):
+        seconds = sqlalchemy.cast(sqlalchemy.extract("epoch", Record.timestamp - now), Float)
+        point = postgresql.array([seconds, sqlalchemy.cast(Record.signatures, Float)])
+        first = sqlfunc.min(point)
+
+        columns = [Record.petition_id]
+        for column, window in windows.items():
+            carried = sqlfunc.max(point).filter(Record.timestamp <= now - window)
+            columns.append(sqlfunc.coalesce(carried, first).label(column))
+
+        query = db.session.query(*columns).join(Petition)
+        query = query.filter(Petition.state == cls.STATE_LOOKUP["open"], Petition.archived == False)
+        query = query.filter(Record.timestamp > since).group_by(Record.petition_id)
+        return query.statement.correlate(None).alias("starts")
+
+    @classmethod
+    def growth_expression(cls, growth, seconds):
+        growth = sqlalchemy.cast(growth / sqlfuncgen.nullif(seconds / 60, 0), Numeric)
+        return sqlfunc.coalesce(sqlfuncgen.round(growth, 3), 0)
+
+    # id filter with the ids sent as one array parameter
+    @classmethod
+    def id_in(cls, ids):
+        return cls.id == sqlalchemy.any_(sqlalchemy.literal(list(ids), postgresql.ARRAY(Integer)))
+
+    @classmethod
+    def load_trending(cls, ids):
+        query = cls.query.filter(cls.id_in(ids)).options(load_only("id", "growth_rate", "trend_index"))
+        return query.populate_existing().all()
 
     # sync remote petition data with petition columns and updated latest_data
-    def sync(self, data, timestamp):
+    # etag/last_modified are the validators sent with the next conditional poll
+    def sync(self, data, timestamp, etag=None, last_modified=None):
         self.polled_at = timestamp
+        self.etag = etag
+        self.last_modified = last_modified
         self.latest_data = deepcopy(data)
         self.archived = data["data"]["type"] == "archived-petition"
         self.url = self.remote.url_addr(self.id, self.archived)
@@ -339,7 +918,10 @@ class Petition(db.Model):
         self.update(**attributes)
         return self
 
-    def record_query(self, timestamp=None, geographic=None, filter_on=None, join_on=None, order="DESC"):
+    # unchanged polls are not recorded, carry_forward includes the last record before
+    # timestamp gt so a window starts from the count carried into it. join_on loads a geography
+    # with the records, its signatures_by rows are left out when not load_rows (read separately)
+    def record_query(self, timestamp=None, geographic=None, filter_on=None, join_on=None, order="DESC", carry_forward=False, load_rows=True):
         filter_on = filter_on or {}
         timestamp = timestamp or {}
         filters = []
@@ -348,19 +930,44 @@ class Petition(db.Model):
             filters.append(Record.geographic == geographic)
         if timestamp.get("lt"):
             filters.append(Record.timestamp <  self.lazy_strptime(timestamp["lt"]))
-        if timestamp.get("gt"):
-            filters.append(Record.timestamp > self.lazy_strptime(timestamp["gt"]))
         if filter_on.get("geography") and filter_on.get("locale"):
             geography, locale = filter_on["geography"], filter_on["locale"]
             filters.append(Record.get_locale_filter(geography, locale))
+        if timestamp.get("gt"):
+            after = self.lazy_strptime(timestamp["gt"])
+            filters.append(self.carry_forward_filter(filters, after) if carry_forward else Record.timestamp > after)
 
         query = self.records.filter(*filters)
         if join_on:
-            query = query.options(joinedload(Record.relation_for(join_on)))
+            packed = Record.packed_for(join_on)
+            query = query.options(undefer(packed), joinedload(Record.keyframe).undefer(packed))
+            if load_rows:
+                query = query.options(joinedload(Record.relation_for(join_on)))
 
         ordering = getattr(Record.timestamp, order.lower())
         return query.order_by(ordering())
 
+    # latest record (any) and latest geographic record are denormalised onto the petition as
+    # they are saved, so a latest lookup is a primary key fetch instead of a DISTINCT ON sort
+    def track_latest(self, record):
+        prefixes = ["latest_record"] + (["latest_geo_record"] if record.geographic else [])
+        for prefix in prefixes:
+            latest_at = getattr(self, f"{prefix}_at")
+            if latest_at is None or record.timestamp >= latest_at:
+                setattr(self, f"{prefix}_id", record.id)
+                setattr(self, f"{prefix}_at", record.timestamp)
+                setattr(self, f"{prefix}_signatures", record.signatures)
+        return self
+
+    def latest_record_for(self, geographic=None):
+        return self.latest_geo_record if geographic else self.latest_record
+
+    def carry_forward_filter(self, filters, after):
+        carried = self.records.filter(*filters, Record.timestamp <= after)
+        carried = carried.order_by(Record.timestamp.desc()).limit(1).with_entities(Record.id)
+        carried = carried.statement.correlate(None).as_scalar()
+        return sqlalchemy.or_(Record.timestamp > after, Record.id == carried)
+
     def populate_self(self):
         return self.populate(ids=[self.id])
 
@@ -378,19 +985,30 @@ class Petition(db.Model):
 
 
 
+# record and signatures_by_* are range partitioned by month on timestamp (see Record.create_partitions)
+# the partition key is part of each primary/foreign key, geo rows carry their record's timestamp
 class Record(db.Model):
     __tablename__ = "record"
+    __table_args__ = {"postgresql_partition_by": "RANGE (timestamp)"}
 
     signatures_relation_attributes = {"back_populates": "record", "cascade": "all,delete-orphan"}
     signatures_query_attributes = {"passive_deletes": True, "lazy": "dynamic", **signatures_relation_attributes}
     signatures_select_attributes = {"lazy": "select", **signatures_relation_attributes}
+    GEOGRAPHIES = ["country", "region", "constituency"]
+    CHOICE_CODES = {}
+    CHOICE_POSITIONS = {}
 
-    id = db.Column(Integer, primary_key=True)
+    id = db.Column(Integer, primary_key=True, autoincrement=True)
     petition_id = db.Column(Integer, ForeignKey(Petition.id, ondelete="CASCADE"), index=True, nullable=False)
-    timestamp = db.Column(DateTime, index=True, nullable=False)
+    timestamp = db.Column(DateTime, primary_key=True, index=True, nullable=False)
     db_created_at = db.Column(DateTime, default=sqlfunc.now(), nullable=False)
     signatures = db.Column(Integer, nullable=False)
     geographic = db.Column(Boolean, default=False)
+    country_counts = deferred(db.Column(postgresql.ARRAY(Integer)), group="packed")
+    region_counts = deferred(db.Column(postgresql.ARRAY(Integer)), group="packed")
+    constituency_counts = deferred(db.Column(postgresql.ARRAY(Integer)), group="packed")
+    keyframe_id = db.Column(Integer, index=True)
+    keyframe = relationship(lambda: Record, primaryjoin=lambda: foreign(Record.keyframe_id) == remote(Record.id), viewonly=True)
     petition = relationship(Petition, back_populates="records")
     signatures_by_country = relationship(lambda: SignaturesByCountry, **signatures_select_attributes)
     signatures_by_region = relationship(lambda: SignaturesByRegion, **signatures_select_attributes)
@@ -417,6 +1035,10 @@ class Record(db.Model):
     def code_for(cls, geo):
         return "code" if geo == "country" else "ons_code"
 
+    @classmethod
+    def code_column_for(cls, geo):
+        return "iso_code" if geo == "country" else "ons_code"
+
     @classmethod
     def model_for(cls, geo):
         return getattr(sys.modules[__name__], ("SignaturesBy" + geo.capitalize()))
@@ -458,21 +1080,58 @@ class Record(db.Model):
     def get_locale_filter(cls, geography, locale):
         locale = cls.locale_choice(geography, locale) if type(locale) is str else locale
         equals_locale = cls.model_for(geography).code == locale["code"]
-        return cls.relation_for(geography).any(equals_locale)
+        packed_locale = cls.packed_for(geography)[cls.choice_position(geography, locale["code"]) + 1] != None
+        return sqlalchemy.or_(cls.relation_for(geography).any(equals_locale), packed_locale)
 
+    # packed records are read with one array element select, merged with any row records
     @classmethod
     def signatures_query(cls, records, geography, locale, order=None):
         model = cls.model_for(geography)
         locale = cls.locale_choice(geography, locale)
-        query = model.query.filter(Record.id.in_([r.id for r in records]))
+        ids = [r.id for r in records]
+        pruned = cls.timestamp_bounds(records)
+        query = model.query.filter(Record.id.in_(ids), model.timestamp.between(*pruned))
         query = query.filter(model.code == locale["code"])
         ordering = getattr(Record.timestamp, (order or "DESC").lower())
-        return query.join(cls).order_by(ordering())
+        query = query.join(cls).order_by(ordering())
+
+        keyframe, position = aliased(Record), cls.choice_position(geography, locale["code"]) + 1
+        element = cls.packed_for(geography)[position]
+        keyframe_element = getattr(keyframe, f"{geography}_counts")[position]
+        count, is_packed = sqlfunc.coalesce(element, keyframe_element), sqlalchemy.true()
+        packed = db.session.query(Record.id.label("record_id"), Record.timestamp, count.label("signatures"), is_packed.label("packed"))
+        packed = packed.outerjoin(keyframe, Record.keyframe_id == keyframe.id)
+        packed = packed.filter(Record.id.in_(ids), Record.timestamp.between(*pruned))
+        packed = packed.filter(sqlalchemy.or_(element != None, keyframe_element != None))
+        if not packed.first():
+            return query
+
+        is_packed = sqlalchemy.false()
+        rows = query.with_entities(model.record_id, model.timestamp, model.count.label("signatures"), is_packed.label("packed"))
+        union = sqlalchemy.union_all(rows.order_by(None).statement, packed.statement).subquery("locale_signatures")
+        return PackedLocaleQuery(query, union, geography, locale["code"], order)
+
+    # keyset pagination keys for records (or a geography's signatures) in timestamp order
+    @classmethod
+    def keyset_keys(cls, order=None, geography=None):
+        order = (order or "DESC").upper()
+        unique = ("record_id", cls.model_for(geography).record_id) if geography else ("id", cls.id)
+        return [("timestamp", cls.timestamp, order), (*unique, order)]
+
+    # timestamp range covering records, filtering on the partition key lets postgres
+    # prune partitions outside it (record id lookups alone scan every partition)
+    @classmethod
+    def timestamp_bounds(cls, records):
+        timestamps = [r.timestamp for r in records]
+        return (min(timestamps), max(timestamps)) if timestamps else (None, None)
 
     # query for a single (distinct) record for each petition
+    # the newest record, when unbounded, is read from the petition's latest record columns
     @classmethod
     def distinct_on(cls, petitions=None, timestamp=None, filters=None, opts=None, order_by="DESC"):
         timestamp, filters, opts = timestamp or {}, filters or [], opts or {}
+        if order_by.upper() == "DESC" and not timestamp and opts.get("geographic") is not False:
+            return cls.latest_query(petitions, filters, opts)
 
         filters.append(Petition.archived == opts.get("archived", False))
         if petitions:
@@ -496,20 +1155,63 @@ class Record(db.Model):
         query = query.distinct(distinct_on)
         return query
 
+    # latest record for each petition, joined on the petition's latest record columns
+    @classmethod
+    def latest_query(cls, petitions=None, filters=None, opts=None):
+        filters, opts = filters or [], opts or {}
+        prefix = "latest_geo_record" if opts.get("geographic") else "latest_record"
+
+        filters.append(Petition.archived == opts.get("archived", False))
+        if petitions:
+            petition_ids = [p.id if type(p) is Petition else p for p in petitions]
+            filters.append(Petition.id.in_(petition_ids))
+        if opts.get("state"):
+            filters.append(Petition.state == Petition.STATE_LOOKUP[opts["state"]])
+
+        query = Record.query.join(Petition, latest_record_join(prefix)())
+        return query.filter(*filters).order_by(Record.petition_id)
+
+    # compares records against the latest tracked before them, so runs before they are tracked
+    # petitions without a previous record always pass the filter
     @classmethod
     def filter_growth(cls, records, threshold, geographic=None):
         logger.info(f"executing growth filter. records: {len(records)}, threshold: {threshold}")
-        petitions = [r.petition for r in records]
-        query = Record.distinct_on(petitions=petitions, opts={"geographic": geographic})
-
-        previous = query.order_by(Record.petition_id.desc()).all()
-        current = sorted(records, key=lambda r: r.petition_id)
-        has_grown = lambda p, c: (c.signatures - p.signatures) >= threshold
+        column = "latest_geo_record_signatures" if geographic else "latest_record_signatures"
+        previous = lambda r: getattr(r.petition, column)
+        has_grown = lambda r: previous(r) is None or (r.signatures - previous(r)) >= threshold
 
-        result = [curr for prev, curr in zip(previous, current) if has_grown(prev, curr)]
+        result = [r for r in records if has_grown(r)]
         logger.info(f"records remaining after filter: {len(result)}")
         return result
 
+    # (record_id, timestamp, code, count) rows for a geography straight from the remote attributes,
+    # codes are checked against the choice lookups without building model instances
+    @classmethod
+    def signature_rows(cls, record, geo):
+        attributes = record.petition.latest_data["data"]["attributes"]
+        locations = attributes.get(f"signatures_by_{geo}")
+        if locations is None:
+            raise ValueError(f"no signatures_by_{geo} key found for record: {record}")
+
+        code_key = cls.code_for(geo)
+        for locale in locations:
+            yield (record.id, record.timestamp, cls.choice_code(geo, locale[code_key]), locale["signature_count"])
+
+    # code -> code and name -> code lookup for a geography, case insensitive like CODE_LOOKUP
+    @classmethod
+    def choice_codes(cls, geo):
+        if geo not in cls.CHOICE_CODES:
+            model = cls.model_for(geo)
+            cls.CHOICE_CODES[geo] = LazyDict({**model.CODE_LOOKUP, **{c: c for c in dict(model.CODE_CHOICES)}})
+        return cls.CHOICE_CODES[geo]
+
+    @classmethod
+    def choice_code(cls, geo, code):
+        try:
+            return cls.choice_codes(geo)[code]
+        except KeyError:
+            raise ValueError(f"Invalid {geo} locale: '{code}', not a known code or name") from None
+
     def build(self, attributes):
         filter_attrs = lambda d, p: {k.replace(p, ""): v for k, v in d.items() if k.startswith(p)}
         geographies = filter_attrs(attributes, "signatures_by_")
@@ -521,46 +1223,287 @@ class Record(db.Model):
         for geo, locations in list(geographies.items()):
             model, code_key = Record.model_for(geo), self.code_for(geo)
             params = lambda x: {"code": x[code_key], "count": x["signature_count"]}
-            built += [model(record_id=self.id, **params(locale)) for locale in locations]
+            built += [model(record_id=self.id, timestamp=self.timestamp, **params(locale)) for locale in locations]
 
         self.geographic = True
         return built
 
-    def avg_growth_since(self):
+    # since: start of the growth window, a record carried forward from before the window
+    # held its count until then, so growth is measured from the window start
+    def avg_growth_since(self, since=None):
         growth = (self.petition.signatures - self.signatures)
-        period = (self.petition.polled_at - self.timestamp).total_seconds()
+        started_at = max(self.timestamp, since) if since else self.timestamp
+        period = (self.petition.polled_at - started_at).total_seconds()
         return round(growth / (period / 60.0), 3)
 
     def query_by(self, geo):
         return getattr(self, f"{geo}_query")
 
+    # packed snapshots are read through the same accessor as signatures_by_* rows
     def signatures_by(self, geo):
+        if self.is_packed(geo):
+            return self.unpack(geo)
         return getattr(self, f"signatures_by_{geo}")
 
+    @classmethod
+    def packed_for(cls, geo):
+        return getattr(cls, f"{geo}_counts")
+
+    # array position of each locale code, in CODE_CHOICES order
+    @classmethod
+    def choice_position(cls, geo, code):
+        if geo not in cls.CHOICE_POSITIONS:
+            choices = cls.model_for(geo).CODE_CHOICES
+            cls.CHOICE_POSITIONS[geo] = {code: i for i, (code, name) in enumerate(choices)}
+        return cls.CHOICE_POSITIONS[geo][cls.choice_code(geo, code)]
+
+    def is_packed(self, geo):
+        return getattr(self, f"{geo}_counts") is not None
+
+    # store each geography as a fixed order count array, locales missing remotely are null
+    def pack(self, attributes):
+        for geo in Record.GEOGRAPHIES:
+            locations = attributes.get(f"signatures_by_{geo}")
+            if locations is None:
+                raise ValueError(f"no signatures_by_{geo} key found for record: {self}")
+
+            code_key = Record.code_for(geo)
+            counts = [None] * len(Record.model_for(geo).CODE_CHOICES)
+            for locale in locations:
+                counts[Record.choice_position(geo, locale[code_key])] = locale["signature_count"]
+            setattr(self, f"{geo}_counts", counts)
+
+        self.geographic = True
+        return self
+
+    def unpack(self, geo):
+        choices = Record.model_for(geo).CODE_CHOICES
+        counts = self.counts_for(geo)
+        return [PackedSignatures(self, geo, choices[i][0], c) for i, c in enumerate(counts) if c is not None]
+
+    # full count array for a geography, deltas are applied over their keyframe and
+    # row records are packed from their signatures_by_* rows
+    def counts_for(self, geo):
+        counts = getattr(self, f"{geo}_counts")
+        if counts is None:
+            counts = [None] * len(Record.model_for(geo).CODE_CHOICES)
+            for signature in getattr(self, f"signatures_by_{geo}"):
+                counts[Record.choice_position(geo, signature.code.code)] = signature.count
+            return counts
+
+        if self.keyframe_id:
+            keyframe = self.keyframe.counts_for(geo)
+            return [key if count is None else count for count, key in zip(counts, keyframe)]
+        return list(counts)
+
+    # a locale counted in the keyframe but missing from the snapshot can't be a delta,
+    # null already means unchanged, so these records are written as keyframes
+    @classmethod
+    def dropped_locales(cls, snapshot, keyframe_snapshot):
+        for geo in Record.GEOGRAPHIES:
+            if any(c is None and k is not None for c, k in zip(snapshot[geo], keyframe_snapshot[geo])):
+                return True
+        return False
+
+    def drops_locales(self, keyframe):
+        snapshot = {geo: getattr(self, f"{geo}_counts") for geo in Record.GEOGRAPHIES}
+        return Record.dropped_locales(snapshot, {geo: keyframe.counts_for(geo) for geo in Record.GEOGRAPHIES})
+
+    # deltas keep the counts that changed since the keyframe (unchanged are null)
+    # each delta is against its keyframe, so a read never needs more than two records
+    def encode_delta(self, keyframe, snapshot=None, keyframe_snapshot=None):
+        for geo in Record.GEOGRAPHIES:
+            counts = snapshot[geo] if snapshot else getattr(self, f"{geo}_counts")
+            keyed = keyframe_snapshot[geo] if keyframe_snapshot else keyframe.counts_for(geo)
+            setattr(self, f"{geo}_counts", [None if c == k else c for c, k in zip(counts, keyed)])
+
+        self.keyframe_id = keyframe.id
+        return self
+
+    def encode_keyframe(self, snapshot):
+        for geo in Record.GEOGRAPHIES:
+            setattr(self, f"{geo}_counts", snapshot[geo])
+
+        self.keyframe_id = None
+        return self
+
+    # latest keyframe for each petition, with the number of deltas written against it
+    @classmethod
+    def latest_keyframes(cls, petition_ids, exclude=None):
+        query = Record.query.filter(
+            Record.petition_id.in_(petition_ids),
+            Record.keyframe_id == None,
+            Record.constituency_counts != None,
+            Record.id.notin_(exclude or [])
+        )
+        query = query.order_by(Record.petition_id, Record.timestamp.desc()).distinct(Record.petition_id)
+        keyframes = {r.petition_id: r for r in query.options(undefer_group("packed")).all()}
+
+        counts = db.session.query(Record.keyframe_id, sqlfunc.count(Record.id))
+        counts = counts.filter(Record.keyframe_id.in_([k.id for k in keyframes.values()]))
+        if keyframes:
+            counts = counts.filter(Record.timestamp >= cls.timestamp_bounds(keyframes.values())[0])
+        deltas = dict(counts.group_by(Record.keyframe_id).all())
+        return {pid: (keyframe, deltas.get(keyframe.id, 0)) for pid, keyframe in keyframes.items()}
+
+    # re-encode a petition's geographic history with a keyframe every interval records
+    # row records are packed and their signatures_by_* rows deleted
+    @classmethod
+    def compact_geo(cls, older_than={"days": 7}, interval=None, petitions=None):
+        cutoff = dt.now() - timedelta(**older_than)
+        interval = interval or current_app.config["GEO_COMPACT_INTERVAL"]
+        logger.info(f"compacting geo records before: {cutoff}, keyframe interval: {interval}")
+
+        if petitions is None:
+            query = db.session.query(Record.petition_id).filter(Record.geographic == True, Record.timestamp < cutoff)
+            petitions = [pid for pid, in query.distinct().all()]
+
+        compacted = {}
+        for petition_id in [p.id if type(p) is Petition else p for p in petitions]:
+            records = cls.compaction_window(petition_id, cutoff)
+            if len(records) > 1:
+                compacted[petition_id] = cls.rekeyframe(records, interval)
+                db.session.commit()
+
+        logger.info(f"compacted geo records for petitions: {len(compacted)}")
+        return compacted
+
+    # records before the petition's last keyframe prior to the cutoff, later deltas may
+    # depend on that keyframe so it and everything after are left as they are
+    @classmethod
+    def compaction_window(cls, petition_id, cutoff):
+        last_keyframe = db.session.query(sqlfunc.max(Record.timestamp)).filter(
+            Record.petition_id == petition_id,
+            Record.keyframe_id == None,
+            Record.constituency_counts != None,
+            Record.timestamp < cutoff
+        ).scalar()
+
+        query = Record.query.filter(
+            Record.petition_id == petition_id,
+            Record.geographic == True,
+            Record.timestamp < (last_keyframe or cutoff)
+        )
+        return query.order_by(Record.timestamp.asc()).options(undefer_group("packed")).all()
+
+    @classmethod
+    def rekeyframe(cls, records, interval):
+        snapshots = [{geo: r.counts_for(geo) for geo in Record.GEOGRAPHIES} for r in records]
+        row_ids = [r.id for r in records if not r.is_packed("constituency")]
+
+        keyframe, keyframe_snapshot, deltas = None, None, 0
+        for record, snapshot in zip(records, snapshots):
+            if keyframe is None or deltas >= interval or cls.dropped_locales(snapshot, keyframe_snapshot):
+                keyframe, keyframe_snapshot, deltas = record.encode_keyframe(snapshot), snapshot, 0
+            else:
+                record.encode_delta(keyframe, snapshot, keyframe_snapshot)
+                deltas += 1
+
+        db.session.flush()
+        pruned = cls.timestamp_bounds(records)
+        for geo in Record.GEOGRAPHIES:
+            model = Record.model_for(geo)
+            query = model.query.filter(model.record_id.in_(row_ids), model.timestamp.between(*pruned))
+            query.delete(synchronize_session=False)
+
+        return {"records": len(records), "unpacked": len(row_ids)}
+
+    # geo tables reference record, so they are created after and retired before it
+    @classmethod
+    def partitioned_tables(cls):
+        return [cls.__tablename__] + [cls.table_for(geo).name for geo in cls.GEOGRAPHIES]
+
+    # monthly partitions from the start month (default: current) to months_ahead after it
+    # a month with rows already in a default partition is skipped and must be moved manually
+    @classmethod
+    def create_partitions(cls, months_ahead=None, start=None):
+        if months_ahead is None:
+            months_ahead = current_app.config["PARTITION_MONTHS_AHEAD"]
+
+        connection = db.session.connection()
+        start = pgpartition.month_start(start or dt.now())
+        tables = cls.partitioned_tables()
+        existing = set(pgpartition.list_partitions(connection, cls.__tablename__).values())
+
+        created = []
+        for month in [pgpartition.add_months(start, n) for n in range(months_ahead + 1)]:
+            if month in existing:
+                continue
+            if any(pgpartition.default_has_rows(connection, table, month) for table in tables):
+                logger.warning(f"default partitions hold rows for month: {month:%Y-%m}, skipping")
+                continue
+            created += [pgpartition.create_partition(connection, table, month) for table in tables]
+
+        db.session.commit()
+        logger.info(f"partitions created: {created}")
+        return created
+
+    # detach (or drop) monthly partitions that ended before the cutoff, a metadata operation
+    # instead of a delete. deltas after the cutoff are re-encoded as keyframes first so none
+    # reference a keyframe in a retired month
+    @classmethod
+    def retire_partitions(cls, older_than=None, action="detach"):
+        if older_than is None:
+            older_than = current_app.config["PARTITION_RETENTION_MONTHS"]
+        if not older_than:
+            logger.info("partition retention disabled, no partitions retired")
+            return []
+
+        cutoff = pgpartition.add_months(pgpartition.month_start(dt.now()), -older_than)
+        cls.promote_deltas(cutoff)
+        db.session.flush()
+
+        connection = db.session.connection()
+        retired = []
+        for table in reversed(cls.partitioned_tables()):
+            partitions = pgpartition.list_partitions(connection, table)
+            expired = [name for name, month in partitions.items() if pgpartition.add_months(month, 1) <= cutoff]
+            retired += [pgpartition.retire_partition(connection, table, name, action) for name in expired]
+
+        db.session.commit()
+        logger.info(f"partitions retired before: {cutoff:%Y-%m}, action: {action}, partitions: {retired}")
+        return retired
+
+    # re-encode deltas from the cutoff on whose keyframe is before it as keyframes
+    @classmethod
+    def promote_deltas(cls, cutoff):
+        keyframe = aliased(Record)
+        query = Record.query.join(keyframe, Record.keyframe_id == keyframe.id)
+        query = query.filter(Record.timestamp >= cutoff, keyframe.timestamp < cutoff)
+        deltas = query.options(undefer_group("packed"), joinedload(Record.keyframe).undefer_group("packed")).all()
+
+        for delta in deltas:
+            delta.encode_keyframe({geo: delta.counts_for(geo) for geo in Record.GEOGRAPHIES})
+
+        logger.info(f"deltas promoted to keyframes: {len(deltas)}")
+        return deltas
+
 
 class SignaturesByCountry(db.Model):
     __tablename__ = "signatures_by_country"
     __table_args__ = (
         db.UniqueConstraint(
-            "record_id", "iso_code",
+            "record_id", "timestamp", "iso_code",
             name="uniq_sig_country_for_record"
         ),
+        db.ForeignKeyConstraint(
+            ["record_id", "timestamp"], [Record.id, Record.timestamp],
+            ondelete="CASCADE"
+        ),
+        {"postgresql_partition_by": "RANGE (timestamp)"}
     )
 
     CODE_CHOICES = COUNTRIES
     CODE_LOOKUP = LazyDict({v: k for k, v in dict(CODE_CHOICES).items()})
 
-    id = db.Column(Integer, primary_key=True)
-    record_id = db.Column(Integer, ForeignKey(Record.id, ondelete="CASCADE"), index=True, nullable=False)
+    id = db.Column(Integer, primary_key=True, autoincrement=True)
+    record_id = db.Column(Integer, index=True, nullable=False)
+    timestamp = db.Column(DateTime, primary_key=True, nullable=False)
     iso_code = db.Column(ChoiceType(CODE_CHOICES), index=True, nullable=False)
     count = db.Column(Integer, default=0)
     record = relationship(Record, back_populates="signatures_by_country")
     code = synonym("iso_code")
 
-    @reconstructor
-    def init_on_load(self):
-        self.timestamp = self.record.timestamp
-
     @validates("iso_code")
     def validate_code_choice(self, key, value):
         return Record.validate_locale_choice(self, key, value)
@@ -575,24 +1518,26 @@ class SignaturesByRegion(db.Model):
     __tablename__ = "signatures_by_region"
     __table_args__ = (
         db.UniqueConstraint(
-            "record_id", "ons_code",
+            "record_id", "timestamp", "ons_code",
             name="uniq_sig_region_for_record"
         ),
+        db.ForeignKeyConstraint(
+            ["record_id", "timestamp"], [Record.id, Record.timestamp],
+            ondelete="CASCADE"
+        ),
+        {"postgresql_partition_by": "RANGE (timestamp)"}
     )
     CODE_CHOICES = REGIONS
     CODE_LOOKUP = LazyDict({v: k for k, v in dict(CODE_CHOICES).items()})
 
-    id = db.Column(Integer, primary_key=True)
-    record_id = db.Column(Integer, ForeignKey(Record.id, ondelete="CASCADE"), index=True, nullable=False)
+    id = db.Column(Integer, primary_key=True, autoincrement=True)
+    record_id = db.Column(Integer, index=True, nullable=False)
+    timestamp = db.Column(DateTime, primary_key=True, nullable=False)
     ons_code = db.Column(ChoiceType(CODE_CHOICES), index=True, nullable=False)
     count = db.Column(Integer, default=0)
     record = relationship(Record, back_populates="signatures_by_region")
     code = synonym("ons_code")
 
-    @reconstructor
-    def init_on_load(self):
-        self.timestamp = self.record.timestamp
-
     @validates("ons_code")
     def validate_code_choice(self, key, value):
         return Record.validate_locale_choice(self, key, value)
@@ -607,24 +1552,26 @@ class SignaturesByConstituency(db.Model):
     __tablename__ = "signatures_by_constituency"
     __table_args__ = (
         db.UniqueConstraint(
-            "record_id", "ons_code",
+            "record_id", "timestamp", "ons_code",
             name="uniq_sig_constituency_for_record"
         ),
+        db.ForeignKeyConstraint(
+            ["record_id", "timestamp"], [Record.id, Record.timestamp],
+            ondelete="CASCADE"
+        ),
+        {"postgresql_partition_by": "RANGE (timestamp)"}
     )
     CODE_CHOICES = CONSTITUENCIES
     CODE_LOOKUP = LazyDict({v: k for k, v in dict(CODE_CHOICES).items()})
 
-    id = db.Column(Integer, primary_key=True)
-    record_id = db.Column(Integer, ForeignKey(Record.id, ondelete="CASCADE"), index=True, nullable=False)
+    id = db.Column(Integer, primary_key=True, autoincrement=True)
+    record_id = db.Column(Integer, index=True, nullable=False)
+    timestamp = db.Column(DateTime, primary_key=True, nullable=False)
     ons_code = db.Column(ChoiceType(CODE_CHOICES), index=True,  nullable=False)
     count = db.Column(Integer, default=0)
     record = relationship(Record, back_populates="signatures_by_constituency")
     code = synonym("ons_code")
 
-    @reconstructor
-    def init_on_load(self):
-        self.timestamp = self.record.timestamp
-
     @validates("ons_code")
     def validate_code_choice(self, key, value):
         return Record.validate_locale_choice(self, key, value)
@@ -635,6 +1582,134 @@ class SignaturesByConstituency(db.Model):
 
 
 
+# the action trigram index needs pg_trgm before the petition table is created
+event.listen(Petition.__table__, "before_create", DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+
+# create_all only builds the partitioned parents, a default partition keeps them writable
+# until monthly partitions exist (created by migration and Record.create_partitions)
+for model in [Record, SignaturesByCountry, SignaturesByRegion, SignaturesByConstituency]:
+    event.listen(model.__table__, "after_create", DDL(pgpartition.default_partition_ddl(model.__tablename__)))
+
+
+# read only stand-in for a signatures_by_* row, built from a packed record
+class PackedSignatures():
+
+    def __init__(self, record, geography, code, count):
+        self.record = record
+        self.record_id = record.id
+        self.timestamp = record.timestamp
+        self.geography = geography
+        self.count = count
+        self.code = Choice(code, dict(Record.model_for(geography).CODE_CHOICES)[code])
+        setattr(self, Record.code_column_for(geography), self.code)
+
+    def __repr__(self):
+        template = "<record_id: {}, code: {}, count: {}>"
+        return template.format(self.record_id, self.code.code, self.count)
+
+
+# locale signatures from row and packed records, ordered by record timestamp
+# supports the query methods used by the views (all, first, paginate, keyset)
+# union: (record_id, timestamp, signatures, packed) of both, ordered and limited in the database
+# so only a page of row signatures and packed records is loaded
+class PackedLocaleQuery():
+
+    def __init__(self, rows_query, union, geography, code, order=None):
+        self.rows_query = rows_query
+        self.union = union
+        self.geography = geography
+        self.code = code
+        self.order = (order or "DESC").lower()
+
+    def ordered(self):
+        columns = [self.union.c.timestamp, self.union.c.record_id]
+        return db.session.query(self.union).order_by(*[getattr(c, self.order)() for c in columns])
+
+    # union rows -> signatures, each side loaded with one query bounded to the page's timestamps
+    def hydrate(self, entries):
+        model, bounds = Record.model_for(self.geography), Record.timestamp_bounds(entries)
+        row_ids = [e.record_id for e in entries if not e.packed]
+        packed_ids = [e.record_id for e in entries if e.packed]
+
+        rows, records = {}, {}
+        if row_ids:
+            rows = {s.record_id: s for s in self.rows_query.filter(model.record_id.in_(row_ids))}
+        if packed_ids:
+            query = Record.query.filter(Record.id.in_(packed_ids), Record.timestamp.between(*bounds))
+            records = {r.id: r for r in query}
+
+        packed = lambda e: PackedSignatures(records[e.record_id], self.geography, self.code, e.signatures)
+        return [packed(e) if e.packed else rows[e.record_id] for e in entries]
+
+    def all(self):
+        return self.hydrate(self.ordered().all())
+
+    def first(self):
+        entry = self.ordered().first()
+        return self.hydrate([entry])[0] if entry else None
+
+    def paginate(self, page=1, per_page=20, error_out=True):
+        query = self.ordered()
+        entries = query.offset((page - 1) * per_page).limit(per_page).all()
+        return Pagination(None, page, per_page, query.order_by(None).count(), self.hydrate(entries))
+
+    def keyset(self, keys, cursor=None, per_page=20, count=False):
+        keys = [(name, self.union.c[name], direction) for name, column, direction in keys]
+        page = keyset.paginate(db.session.query(self.union), keys, cursor, per_page, count)
+        page.items = self.hydrate(page.items)
+        return page
+
+
+# open petitions read from the trending zset (highest score first) and hydrated with one
+# IN query, supports the query methods used by the views (all, first, paginate, keyset)
+class TrendingQuery():
+
+    def __init__(self, client, key=None):
+        self.client = client
+        self.key = key or Petition.TRENDING_KEY
+
+    def __repr__(self):
+        return f"<TrendingQuery key: {self.key}>"
+
+    # None when disabled, empty or unavailable, so callers fall back to the trend_index query
+    @classmethod
+    def load(cls):
+        if not current_app.config["TRENDING_CACHE_ENABLED"]:
+            return None
+        try:
+            query = cls(current_app.redis)
+            return query if query.total() else None
+        except redis.RedisError as e:
+            logger.warning(f"trending leaderboard unavailable, error: {e}")
+            return None
+
+    def total(self):
+        return self.client.zcard(self.key)
+
+    def ids(self, start=0, end=-1):
+        return [int(id) for id in self.client.zrevrange(self.key, start, end)]
+
+    def hydrate(self, ids):
+        petitions = {p.id: p for p in Petition.query.filter(Petition.id.in_(ids))} if ids else {}
+        return [petitions[id] for id in ids if id in petitions]
+
+    def all(self):
+        return self.hydrate(self.ids())
+
+    def first(self):
+        items = self.hydrate(self.ids(0, 0))
+        return items[0] if items else None
+
+    def paginate(self, page=1, per_page=20, error_out=True):
+        start = (page - 1) * per_page
+        items = self.hydrate(self.ids(start, start + per_page - 1))
+        return Pagination(None, page, per_page, self.total(), items)
+
+    # zset ranks move between requests, cursors page the trend_index order in the database
+    def keyset(self, keys, cursor=None, per_page=20, count=False):
+        query = Petition.query.filter(Petition.state == Petition.STATE_LOOKUP["open"], Petition.archived == False)
+        return keyset.paginate(query, keys, cursor, per_page, count)
+
 
 # model serialization schemas
 class SignaturesBySchema(SQLAlchemyAutoSchema):
@@ -678,7 +1753,7 @@ class SignaturesByRegionSchema(SignaturesBySchema):
 class RecordSchema(SQLAlchemyAutoSchema):
     class Meta:
         model = Record
-        exclude = ["db_created_at", "geographic", "signatures"]
+        exclude = ["db_created_at", "geographic", "signatures", "country_counts", "region_counts", "constituency_counts"]
 
     @classmethod
     def schema_for(cls, geography):
@@ -725,9 +1800,16 @@ class RecordSchema(SQLAlchemyAutoSchema):
     total = ma_fields.Method("rename_sig_key")
     timestamp = ma_fields.Method("format_timestamp")
 
+# nested signatures read through Record.signatures_by, so packed records dump like row records
+class SignaturesByNested(Nested):
+
+    def get_value(self, obj, attr, *args, **kwargs):
+        return obj.signatures_by(attr.replace("signatures_by_", ""))
+
 class RecordNestedSchema(RecordSchema):
     class Meta(RecordSchema.Meta):
         include_relationships = True
+        exclude = RecordSchema.Meta.exclude + ["keyframe"]
 
     relations = {
         "signatures_by_country",
@@ -736,20 +1818,25 @@ class RecordNestedSchema(RecordSchema):
     }
 
     total = ma_fields.Method("rename_sig_key")
-    signatures_by_country = Nested(SignaturesByCountrySchema, many=True, exclude=["country"])
-    signatures_by_region = Nested(SignaturesByRegionSchema, many=True, exclude=["region"])
-    signatures_by_constituency = Nested(SignaturesByConstituencySchema, many=True, exclude=["constituency"])
+    signatures_by_country = SignaturesByNested(SignaturesByCountrySchema, many=True, exclude=["country"])
+    signatures_by_region = SignaturesByNested(SignaturesByRegionSchema, many=True, exclude=["region"])
+    signatures_by_constituency = SignaturesByNested(SignaturesByConstituencySchema, many=True, exclude=["constituency"])
+
 
 
+# latest record and text search columns are internal lookups, not part of the petition representation
+LATEST_COLUMNS = [f"latest_{kind}_{column}" for kind in ["record", "geo_record"] for column in ["id", "at", "signatures"]]
+SEARCH_COLUMNS = [f"{column}_search" for column in Petition.TEXT_COLS]
 
 class PetitionSchema(SQLAlchemyAutoSchema):
     class Meta:
         model = Petition
-        exclude = ["initial_data", "latest_data", "db_updated_at"]
+        exclude = ["initial_data", "latest_data", "db_updated_at", "etag", "last_modified"] + LATEST_COLUMNS + SEARCH_COLUMNS
 
 class PetitionNestedSchema(SQLAlchemyAutoSchema):
     class Meta:
         model = Petition
         include_relationships = True
+        exclude = ["latest_record", "latest_geo_record", "etag", "last_modified"] + LATEST_COLUMNS + SEARCH_COLUMNS
 
     records = Nested(RecordSchema, many=True)
@@ -8,7 +8,22 @@ from concurrent.futures import as_completed
 from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlparse, parse_qs
 from datetime import datetime as dt
-import requests, json, itertools, time, datetime, traceback, logging
+from collections import Counter, deque
+from math import ceil
+from application.config import Config
+from application.lib.throttle import Throttle, ThrottleError
+from application.lib.fastjson import JSONCodec
+import requests, redis, json, itertools, time, datetime, traceback, random, heapq, queue, asyncio, logging
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
 
 def get_traceback(e):
     exc_fmt = dict(etype=type(e), value=e, tb=e.__traceback__)
@@ -21,37 +36,368 @@ logger = logging.getLogger(__name__)
 class SessionMaker():
 
     @classmethod
-    def make(cls, future=False, timeout=5, max_workers=10):
+    def make(cls, future=False, timeout=5, max_workers=10, throttle=None):
         if future:
             executor = ThreadPoolExecutor(max_workers=max_workers)
             session = FuturesSession(executor=executor)
         else:
             session = StandardSession()
 
-        adapter = TimeoutHTTPAdapter(timeout=timeout)
+        session.headers["Accept-Encoding"] = cls.accept_encoding()
+        adapter = TimeoutHTTPAdapter(timeout=timeout, throttle=throttle)
         session.mount(prefix="http://", adapter=adapter)
         session.mount(prefix="https://", adapter=adapter)
 
         return session
 
+    # brotli is only offered when a decoder is installed (urllib3 and aiohttp both use it)
+    @classmethod
+    def accept_encoding(cls):
+        return ", ".join(["gzip", "deflate"] + (["br"] if brotli else []))
+
 class TimeoutHTTPAdapter(HTTPAdapter):
 
     SANE_TIMEOUT = 5
 
     def __init__(self, *args, **kwargs):
         self.timeout = kwargs.pop("timeout", TimeoutHTTPAdapter.SANE_TIMEOUT)
+        self.throttle = kwargs.pop("throttle", None)
         super().__init__(*args, **kwargs)
 
+    # throttled sends wait for a token and report their outcome to the circuit breaker
     def send(self, request, **kwargs):
         kwargs["timeout"] = kwargs.pop("timeout", self.timeout)
-        return super().send(request, **kwargs)
+        if not self.throttle:
+            return super().send(request, **kwargs)
+
+        self.throttle.acquire()
+        try:
+            response = super().send(request, **kwargs)
+        except requests.RequestException:
+            self.throttle.record(None)
+            raise
+
+        self.throttle.record(response.status_code)
+        return response
+
+
+# minimal stand-in for requests.Response, so response hooks can be shared between engines
+class AsyncResponse():
+
+    def __init__(self, url, status_code=None, headers=None, content=b""):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.content = content
+
+    def __repr__(self):
+        return f"<AsyncResponse [{self.status_code}], url: {self.url}>"
+
+    def json(self, **kwargs):
+        return json.loads(self.content, **kwargs)
+
+
+# asyncio based alternative to FuturesSession, each stream runs on its own event loop
+# connections are pooled (keep-alive) per stream and in flight requests capped by max_concurrency
+class AsyncSession():
+
+    def __init__(self, max_concurrency=100, timeout=5, keepalive_timeout=30, throttle=None):
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.keepalive_timeout = keepalive_timeout
+        self.throttle = throttle
+
+    def stream(self, scheduler=None):
+        if not aiohttp:
+            raise RuntimeError("asyncio fetch engine requires aiohttp to be installed")
+
+        return AsyncStream(self, scheduler or RetryScheduler())
+
+    # the semaphore is only held while a request is in flight, not during its backoff
+    async def fetch_with_retry(self, client, semaphore, scheduler, call):
+        attempt = 1
+        while True:
+            response = await self.fetch(client, semaphore, **call)
+            response.shed = getattr(response, "shed", False)
+            response.attempts = attempt
+            if not scheduler.will_retry(response):
+                return scheduler.complete(response)
+
+            await asyncio.sleep(scheduler.delay(attempt))
+            attempt += 1
+
+    def make_client(self):
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        connector = aiohttp.TCPConnector(
+            limit=self.max_concurrency,
+            keepalive_timeout=self.keepalive_timeout
+        )
+        headers = {"Accept-Encoding": SessionMaker.accept_encoding()}
+        return aiohttp.ClientSession(connector=connector, timeout=timeout, headers=headers)
+
+    async def fetch(self, client, semaphore, url, hooks=None, headers=None):
+        async with semaphore:
+            try:
+                if self.throttle:
+                    await self.throttle.async_acquire()
+                response = await self.request(client, url, headers)
+            except ThrottleError as e:
+                response = AsyncResponse(url=url)
+                response.shed, response.error = True, get_traceback(e)
+                logger.warning(f"async request shed for: {url}, reason: {e}")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                response = AsyncResponse(url=url)
+                response.error = get_traceback(e)
+                logger.error(f"async request failed for: {url}, error: {e}")
+
+            if self.throttle and not getattr(response, "shed", False):
+                await self.throttle.async_record(response.status_code)
+
+        for hook in (hooks or {}).values():
+            hook(response)
+        return response
+
+    async def request(self, client, url, headers=None):
+        async with client.get(url, headers=headers) as r:
+            content = await r.read()
+            return AsyncResponse(url=url, status_code=r.status, headers=r.headers, content=content)
+
+
+# request streams yield each response as soon as it completes (after any retries),
+# further calls can be submitted while a stream is being consumed
+
+class FuturesStream():
+
+    def __init__(self, session, scheduler):
+        self.session = session
+        self.scheduler = scheduler
+        self.pending, self.waiting = 0, []
+        self.completed = queue.Queue()
+        self.sequence = itertools.count()
+
+    def submit(self, *calls):
+        self.scheduler.extend(len(calls))
+        for call in calls:
+            self.dispatch(call, 1)
+
+    # completed futures are queued by their callback, so each wait is O(1) however many are pending
+    def dispatch(self, call, attempt):
+        self.pending += 1
+        future = self.session.get(**call)
+        future.add_done_callback(lambda f: self.completed.put((f, call, attempt)))
+
+    # wait on whichever request finishes or retry becomes due first
+    def __iter__(self):
+        while self.pending or self.waiting:
+            while self.waiting and self.waiting[0][0] <= time.monotonic():
+                due_at, seq, call, attempt = heapq.heappop(self.waiting)
+                self.dispatch(call, attempt)
+
+            timeout = max(0, self.waiting[0][0] - time.monotonic()) if self.waiting else None
+            if not self.pending:
+                time.sleep(timeout)
+                continue
+
+            try:
+                future, call, attempt = self.completed.get(timeout=timeout)
+            except queue.Empty:
+                continue
+
+            self.pending -= 1
+            try:
+                response = future.result()
+            except (requests.RequestException, ThrottleError) as e:
+                response = self.scheduler.failed_response(call, e)
+
+            response.shed = getattr(response, "shed", False)
+            response.attempts = attempt
+            if self.scheduler.will_retry(response):
+                due_at = time.monotonic() + self.scheduler.delay(attempt)
+                heapq.heappush(self.waiting, (due_at, next(self.sequence), call, attempt + 1))
+            else:
+                yield self.scheduler.complete(response)
+
+
+# the event loop only runs while the stream is being iterated
+class AsyncStream():
+
+    def __init__(self, session, scheduler):
+        self.session = session
+        self.scheduler = scheduler
+        self.tasks, self.completed = set(), deque()
+        self.loop = asyncio.new_event_loop()
+        self.client, self.semaphore, self.ready = self.loop.run_until_complete(self.open())
+
+    async def open(self):
+        semaphore = asyncio.Semaphore(self.session.max_concurrency)
+        return self.session.make_client(), semaphore, asyncio.Event()
+
+    def submit(self, *calls):
+        self.scheduler.extend(len(calls))
+        for call in calls:
+            fetch = self.session.fetch_with_retry(self.client, self.semaphore, self.scheduler, call)
+            task = self.loop.create_task(fetch)
+            task.add_done_callback(self.on_completed)
+            self.tasks.add(task)
+
+    def on_completed(self, task):
+        self.completed.append(task)
+        self.ready.set()
+
+    def __iter__(self):
+        try:
+            while self.tasks:
+                if not self.completed:
+                    self.ready.clear()
+                    self.loop.run_until_complete(self.ready.wait())
+
+                task = self.completed.popleft()
+                self.tasks.discard(task)
+                yield task.result()
+        finally:
+            self.close()
+
+    def close(self):
+        if self.loop.is_closed():
+            return
+
+        for task in self.tasks:
+            task.cancel()
+        if self.tasks:
+            self.loop.run_until_complete(asyncio.wait(self.tasks))
+
+        self.loop.run_until_complete(self.client.close())
+        self.loop.close()
+
+
+# per request retries with exponential backoff + jitter, failed calls are requeued
+# individually while the rest of the batch keeps running. budget caps retries per batch
+class RetryScheduler():
+
+    max_backoff = Config.REMOTE_MAX_BACKOFF
+    budget_ratio = Config.REMOTE_RETRY_BUDGET_RATIO
+    budget_minimum = Config.REMOTE_RETRY_BUDGET_MIN
+
+    def __init__(self, max_retries=0, backoff=0, budget=None):
+        self.max_retries = max_retries or 0
+        self.backoff = backoff or 0
+        self.budget = budget
+        self.size = 0
+        self.attempts = Counter()
+        self.stats = FetchStats()
+
+    def __repr__(self):
+        return f"<RetryScheduler max_retries: {self.max_retries}, budget: {self.budget}>"
+
+    @classmethod
+    def make(cls, size, max_retries=0, backoff=0):
+        scheduler = cls(max_retries=max_retries, backoff=backoff, budget=cls.size_budget(size))
+        scheduler.size = size
+        return scheduler
+
+    @classmethod
+    def size_budget(cls, size):
+        if cls.budget_ratio is not None:
+            return max(cls.budget_minimum, ceil(size * cls.budget_ratio))
+
+    # calls submitted to a running stream grow the budget in proportion
+    def extend(self, size):
+        if self.budget is not None and self.budget_ratio is not None:
+            self.budget += self.size_budget(self.size + size) - self.size_budget(self.size)
+        self.size += size
+
+    # equal jitter, half the exponential ceiling is fixed and half random
+    def delay(self, attempt):
+        ceiling = min(self.max_backoff, self.backoff * (2 ** (attempt - 1)))
+        return (ceiling / 2) + random.uniform(0, ceiling / 2)
+
+    # shed requests (circuit open/rate limit wait too long) are not retried
+    def will_retry(self, response):
+        if response.success or response.shed or response.attempts > self.max_retries:
+            return False
+        if self.budget is not None:
+            if self.budget < 1:
+                logger.warning(f"retry budget exhausted, not retrying: {response.url}")
+                return False
+            self.budget -= 1
+
+        return True
+
+    def complete(self, response):
+        self.attempts[response.attempts] += 1
+        self.stats.add(response)
+        return response
+
+    def failed_response(self, call, error):
+        response = requests.Response()
+        response.url = call["url"]
+        for hook in call.get("hooks", {}).values():
+            hook(response)
+        response.error = get_traceback(error)
+        response.shed = isinstance(error, ThrottleError)
+        return response
+
+
+# transfer and decode counters for completed responses, wire bytes are the compressed
+# Content-Length (chunked responses without one count their decompressed size)
+# batch counters are added to running totals in redis, see RemotePetition.async_exec
+class FetchStats():
+
+    key = "remote:fetch_stats"
+    fields = ["responses", "decoded", "wire_bytes", "content_bytes", "decode_seconds"]
+
+    def __init__(self):
+        self.counts = Counter()
+
+    def __repr__(self):
+        return f"<FetchStats {self.summary()}>"
+
+    def add(self, response):
+        self.counts["responses"] += 1
+        if getattr(response, "decode_time", None) is not None:
+            self.counts["decoded"] += 1
+            self.counts["wire_bytes"] += response.wire_bytes
+            self.counts["content_bytes"] += response.content_bytes
+            self.counts["decode_seconds"] += response.decode_time
+
+    # decode_ms is the mean decode time per decoded response
+    def summary(self):
+        summary = {field: self.counts[field] for field in self.fields}
+        summary["decode_seconds"] = round(summary["decode_seconds"], 6)
+        summary["decode_ms"] = round((self.counts["decode_seconds"] * 1000) / max(self.counts["decoded"], 1), 3)
+        return summary
+
+    def publish(self, client):
+        try:
+            pipe = client.pipeline()
+            for field in self.fields:
+                pipe.hincrbyfloat(self.key, field, self.counts[field])
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"could not publish fetch stats, error: {e}")
+
+    @classmethod
+    def totals(cls, client):
+        totals = {k.decode(): float(v) for k, v in client.hgetall(cls.key).items()}
+        return {field: totals.get(field, 0) for field in cls.fields}
 
 
 class RemotePetition():
 
-    base_url = "https://petition.parliament.uk"
-    future_session = SessionMaker.make(future=True, timeout=2)
-    standard_session = SessionMaker.make(future=False, timeout=3)
+    base_url = Config.REMOTE_BASE_URL
+    engines = ["futures", "asyncio"]
+    engine = Config.REMOTE_FETCH_ENGINE
+    codec = JSONCodec(Config.REMOTE_JSON_BACKEND)
+    redis_client = redis.Redis(host=Config.REDIS_HOST, port=Config.REDIS_PORT, db=0)
+    throttle = Throttle.make(name="petition.parliament.uk", config=Config, client=redis_client)
+    future_session = SessionMaker.make(future=True, timeout=2, throttle=throttle)
+    standard_session = SessionMaker.make(future=False, timeout=3, throttle=throttle)
+    asyncio_session = AsyncSession(
+        max_concurrency=Config.REMOTE_MAX_CONCURRENCY,
+        timeout=Config.REMOTE_TIMEOUT,
+        keepalive_timeout=Config.REMOTE_KEEPALIVE_TIMEOUT,
+        throttle=throttle
+    )
 
     query_states = [
         "rejected",
@@ -62,9 +408,13 @@ class RemotePetition():
         "awaiting_response",
         "with_response",
         "awaiting_debate",
+        "recent",
         "all"
     ]
 
+    # open petitions ordered by opening date (newest first)
+    newest_first_state = "recent"
+
     petition_states = ["closed", "rejected", "open"]
 
     @classmethod
@@ -85,14 +435,11 @@ class RemotePetition():
         if not state in cls.query_states:
             raise ValueError(f"Invalid state param: '{state}', valid: {cls.query_states}")
 
-    @classmethod
-    def retry_msg(cls, func, failed, retries, max_retries, backoff, **kwargs):
-        return f"retrying {func} ({retries}/{max_retries} in {backoff}s, for: {failed}"
-
     @classmethod
     def completed_msg(cls, func, results):
-        results = {k: len(v) for k, v in results.items()}
-        return f"{func} completed, results: {results}"
+        counts = {k: len(results[k]) for k in ["success", "failed"]}
+        counts["shed"] = len([r for r in results["failed"] if getattr(r, "shed", False)])
+        return f"{func} completed, results: {counts}, attempts: {results.get('attempts')}, stats: {results.get('stats')}"
 
     @classmethod
     def find_page_nums(cls, links):
@@ -108,7 +455,7 @@ class RemotePetition():
 
         if (response.status_code == 200):
             response.timestamp = dt.now().isoformat()
-            response.data = response.json()
+            response.data = cls.decode(response)
             return response
         elif (response.status_code == 404):
             if not raise_404:
@@ -118,28 +465,65 @@ class RemotePetition():
         response.raise_for_status()
 
     @classmethod
-    def handle_async_responses(cls, futures):
+    def validate_engine(cls, engine):
+        if not engine in cls.engines:
+            raise ValueError(f"Invalid fetch engine: '{engine}', valid: {cls.engines}")
+
+    # open a request stream using the configured engine, yields responses as they complete
+    # calls can be submitted to the stream while it is consumed
+    @classmethod
+    def async_stream(cls, calls=None, max_retries=0, backoff=0):
+        cls.validate_engine(cls.engine)
+        scheduler = RetryScheduler.make(0, max_retries, backoff)
+        if cls.engine == "asyncio":
+            stream = cls.asyncio_session.stream(scheduler)
+        else:
+            stream = FuturesStream(cls.future_session, scheduler)
+
+        stream.submit(*(calls or []))
+        return stream
+
+    # dispatch a batch of get calls and wait for all of them
+    @classmethod
+    def async_exec(cls, calls, max_retries=0, backoff=0):
+        stream = cls.async_stream(calls, max_retries, backoff)
+        results = cls.sort_responses(list(stream), stream.scheduler)
+        stream.scheduler.stats.publish(cls.redis_client)
+        return results
+
+    # decode with the configured json codec, recording decode time and transfer size
+    @classmethod
+    def decode(cls, response):
+        data, response.decode_time = cls.codec.decode(response.content)
+        response.content_bytes = len(response.content)
+        response.wire_bytes = int(response.headers.get("Content-Length") or response.content_bytes)
+        return data
+
+    # validators from the previous fetch (etag/last_modified), petition ids have none
+    @classmethod
+    def conditional_headers(cls, petition):
+        headers = {}
+        if getattr(petition, "etag", None):
+            headers["If-None-Match"] = petition.etag
+        if getattr(petition, "last_modified", None):
+            headers["If-Modified-Since"] = petition.last_modified
+        return headers
+
+    # attempts: {number of attempts: responses completed on that attempt}
+    @classmethod
+    def sort_responses(cls, responses, scheduler=None):
         results = {"success": [], "failed": []}
-        for f in futures:
-            response = f.result()
+        for response in responses:
             if response.success:
                 results["success"].append(response)
             else:
                 results["failed"].append(response)
 
+        if scheduler:
+            results["attempts"] = dict(scheduler.attempts)
+            results["stats"] = scheduler.stats.summary()
         return results
 
-    @classmethod
-    def eval_async_retry(cls, results, max_retries, backoff, retries):
-        setup = {}
-        if ((max_retries or 0) > retries) and results["failed"]:
-            setup["retries"] = retries + 1
-            setup["backoff"] = (backoff or 0) ** setup["retries"]
-            setup["max_retries"] = max_retries
-            setup["completed"] = results["success"]
-
-        return setup or False
-
     @classmethod
     def async_callback(cls, func, obj, *args, **kwargs):
         def response_hook(response, *args, **kwargs):
@@ -150,13 +534,23 @@ class RemotePetition():
             if response.status_code == 200:
                 try:
                     response.func = func
-                    response.data = response.json()
+                    response.data = cls.decode(response)
                     response.timestamp = dt.now().isoformat()
+                    response.etag = response.headers.get("ETag")
+                    response.last_modified = response.headers.get("Last-Modified")
+                    response.modified = True
                     response.success = True
                 except Exception as e:
                     response.error = get_traceback(e)
                     print(f"error during {func} callback for: {obj}, error: {response.error}")
 
+            # conditional get, remote data unchanged since the validators were issued
+            elif response.status_code == 304:
+                response.func = func
+                response.timestamp = dt.now().isoformat()
+                response.modified = False
+                response.success = True
+
         return response_hook
 
     ## async_get + async_query could be simplified in the future
@@ -165,71 +559,62 @@ class RemotePetition():
     ## url could be handled via a lambda kwarg or looked up from a class dict of lambdas
 
     # poll existing petitions or fetch new ones
+    # polled petitions send their cached validators, unchanged petitions return a 304
+    # conditional = False fetches in full, validators are shared by every kind of poll
     @classmethod
-    def async_get(cls, petitions, max_retries=0, backoff=0, retries=0, completed=None):
+    def async_get(cls, petitions, max_retries=0, backoff=1, conditional=True):
         logger.info(f"executing async_get for petitions: {petitions}")
-
-        futures = [
-            cls.future_session.get(
-                url=cls.url_addr(id=p) if type(p) is int else p.url,
-                hooks={"response": cls.async_callback(func="async_get", obj={"petition": p})}
-            )
-            for p in petitions
-        ]
-
-        results = cls.handle_async_responses(futures)
-        results["success"] += completed or []
-        retrying = cls.eval_async_retry(results, max_retries, backoff, retries)
-
-        if retrying:
-            failed = [r.petition for r in results["failed"]]
-            logger.error(cls.retry_msg("async_get", failed, **retrying))
-            time.sleep(backoff)
-            return cls.async_get(petitions=failed, **retrying)
-
+        results = cls.async_exec(cls.get_calls(petitions, conditional), max_retries, backoff)
         logger.info(cls.completed_msg("async_get", results))
         return results
 
     # query pages of petitions by state
     @classmethod
-    def async_query(cls, indexes=None, state="open", max_retries=0, backoff=0, retries=0, completed=None):
+    def async_query(cls, indexes=None, state="open", max_retries=0, backoff=1):
         cls.validate_state(state)
-        template_url = cls.page_url_template(state)
-        indexes = indexes or cls.get_page_range(template_url)
+        indexes = indexes or cls.get_page_range(cls.page_url_template(state))
         logger.info(f"executing async_query for indexes: {indexes}")
 
-        futures = [
-            cls.future_session.get(
-                url=(template_url % {"page": i}),
-                hooks={"response": cls.async_callback(func="async_query", obj={"index": i})}
-            )
-            for i in indexes
-        ]
-
-        results = cls.handle_async_responses(futures)
-        results["success"] += completed or []
-        retrying = cls.eval_async_retry(results, max_retries, backoff, retries)
-
-        if retrying:
-            failed = [r.index for r in results["failed"]]
-            logger.error(cls.retry_msg("async_query", failed, **retrying))
-            time.sleep(backoff)
-            return cls.async_query(indexes=failed, **retrying)
-
+        results = cls.async_exec(cls.query_calls(state, indexes), max_retries, backoff)
         logger.info(cls.completed_msg("async_query", results))
         return results
 
+    @classmethod
+    def get_calls(cls, petitions, conditional=True):
+        return [
+            {
+                "url": cls.url_addr(id=p) if type(p) is int else p.url,
+                "hooks": {"response": cls.async_callback(func="async_get", obj={"petition": p})},
+                "headers": cls.conditional_headers(p) if conditional else {}
+            }
+            for p in petitions
+        ]
+
+    @classmethod
+    def query_calls(cls, state, indexes):
+        template_url = cls.page_url_template(state)
+        return [
+            {
+                "url": (template_url % {"page": i}),
+                "hooks": {"response": cls.async_callback(func="async_query", obj={"index": i})}
+            }
+            for i in indexes
+        ]
+
     @classmethod
     def get_page_range(cls, template_url):
         response = cls.standard_session.get(template_url % {"page": 1})
         response.raise_for_status()
 
-        first_page = response.json()
-        page_nums = cls.find_page_nums(first_page["links"])
-        last_page_num = int(page_nums["last"]) if page_nums["next"] else 1
-        page_indexes = list(range(1, last_page_num + 1))
+        first_page = cls.decode(response)
+        page_indexes = list(range(1, cls.last_page_num(first_page["links"]) + 1))
         return page_indexes
 
+    @classmethod
+    def last_page_num(cls, links):
+        page_nums = cls.find_page_nums(links)
+        return int(page_nums["last"]) if page_nums["next"] else 1
+
     @classmethod
     def unpack_query(cls, results):
         return [item for page in results["success"] for item in page.data["data"]]
@@ -0,0 +1,132 @@
+from application import db
+from application.tracker.models import Record, RecordSchema
+from marshmallow import fields as ma_fields
+from sqlalchemy import select
+from collections import defaultdict, namedtuple
+from functools import lru_cache
+from datetime import datetime as dt
+import logging
+
+logger = logging.getLogger(__name__)
+
+TIMESTAMP_FORMAT = "%d-%m-%YT%H:%M:%S"
+
+# values of the schemas' Method fields (see RecordSchema and SignaturesBySchema)
+METHOD_FIELDS = {
+    "timestamp": lambda obj: obj.timestamp.strftime(TIMESTAMP_FORMAT),
+    "total": lambda obj: obj.signatures,
+    "code": lambda obj: obj.code.code,
+    "name": lambda obj: obj.code.value,
+}
+
+# select rows are copied into these, a Row's count attribute is the tuple method
+SignatureRow = namedtuple("SignatureRow", ["record_id", "code", "count"])
+
+def attribute_getter(attribute):
+    def get(obj):
+        value = getattr(obj, attribute)
+        return value.isoformat() if isinstance(value, dt) else value
+    return get
+
+# (key, getter) pairs for the fields a schema would dump, read from the schema once per exclude
+@lru_cache(maxsize=None)
+def compile_fields(schema, exclude=()):
+    compiled = []
+    for name, field in schema(exclude=exclude).dump_fields.items():
+        get = METHOD_FIELDS[name] if isinstance(field, ma_fields.Method) else attribute_getter(field.attribute or name)
+        compiled.append((field.data_key or name, get))
+    return tuple(compiled)
+
+def dump(obj, fields):
+    return {key: get(obj) for key, get in fields}
+
+
+# compiled serialiser for the payloads of the signatures views, output is identical to
+# RecordSchema / RecordSchema.dump_query. signatures_by rows of a geography are read with one
+# Core select for the page of records instead of loading and dumping ORM objects, packed
+# records are unpacked as they are for the schemas
+class SignaturesSerializer():
+
+    def __init__(self, geography=None, locale=None):
+        self.geography = geography
+        self.locale = locale
+        self.record_fields = compile_fields(RecordSchema, ("id",))
+        if geography:
+            exclude = ("id", "record", "timestamp", geography)
+            self.signature_fields = compile_fields(RecordSchema.schema_for(geography), exclude)
+            self.geo_key = f"signatures_by_{geography}"
+
+    def __repr__(self):
+        return f"<SignaturesSerializer geography: {self.geography}, locale: {bool(self.locale)}>"
+
+    # records, or a locale's signatures when locale is set
+    def dump_many(self, results):
+        if self.locale:
+            return [self.dump_locale(signature) for signature in results]
+        if not self.geography:
+            return [dump(record, self.record_fields) for record in results]
+
+        rows = self.select_signatures([r for r in results if not r.is_packed(self.geography)])
+        return [self.dump_geographic(record, rows[record.id]) for record in results]
+
+    def dump_one(self, result):
+        return self.dump_many([result])[0]
+
+    def dump_geographic(self, record, rows):
+        signatures = record.unpack(self.geography) if record.is_packed(self.geography) else rows
+        dumped = dump(record, self.record_fields)
+        dumped[self.geo_key] = [dump(signature, self.signature_fields) for signature in signatures]
+        return dumped
+
+    def dump_locale(self, signature):
+        dumped = dump(signature.record, self.record_fields)
+        dumped[self.geo_key] = dump(signature, self.signature_fields)
+        return dumped
+
+    # parallel arrays instead of an object per record: timestamps and totals, then a locale's counts
+    # or a geography's codes, names and locale x time matrix of counts (null where a locale has none)
+    def columnar(self, results):
+        records = [s.record for s in results] if self.locale else results
+        columns = {
+            "timestamp": [r.timestamp.strftime(TIMESTAMP_FORMAT) for r in records],
+            "total": [r.signatures for r in records]
+        }
+
+        if self.locale:
+            code = results[0].code if results else None
+            columns[self.geo_key] = {"code": getattr(code, "code", None), "name": getattr(code, "value", None)}
+            columns[self.geo_key]["count"] = [s.count for s in results]
+        elif self.geography:
+            columns[self.geo_key] = self.locale_matrix(records)
+        return columns
+
+    def locale_matrix(self, records):
+        rows = self.select_signatures([r for r in records if not r.is_packed(self.geography)])
+        positions, matrix = {}, {"code": [], "name": [], "count": []}
+        for index, record in enumerate(records):
+            packed = record.is_packed(self.geography)
+            for signature in (record.unpack(self.geography) if packed else rows[record.id]):
+                position = positions.get(signature.code.code)
+                if position is None:
+                    position = positions[signature.code.code] = len(matrix["code"])
+                    matrix["code"].append(signature.code.code)
+                    matrix["name"].append(signature.code.value)
+                    matrix["count"].append([None] * len(records))
+                matrix["count"][position][index] = signature.count
+        return matrix
+
+    # {record id: [(record_id, code, count)]} for row stored records, in insertion order
+    def select_signatures(self, records):
+        grouped = defaultdict(list)
+        if not records:
+            return grouped
+
+        model = Record.model_for(self.geography)
+        code = model.__table__.c[Record.code_column_for(self.geography)].label("code")
+        statement = select(model.record_id, code, model.count)
+        statement = statement.where(model.record_id.in_([r.id for r in records]))
+        statement = statement.where(model.timestamp.between(*Record.timestamp_bounds(records)))
+
+        for row in db.session.execute(statement.order_by(model.id)):
+            grouped[row.record_id].append(SignatureRow(*row))
+        return grouped
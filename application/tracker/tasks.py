@@ -53,10 +53,41 @@ def populate_task(self, *args, **kwargs):
         logger.info(f"Petitions onboarded: {petitions}")
         return handler.commit(result=[p.id for p in petitions])
 
+@celery.task(name='compact_geo_task', **celery_opts, **once_opts)
+def compact_geo_task(self, *args, **kwargs):
+    with TaskHandler.execute(bind=self) as handler:
+        kwargs = handler.getcallkwargs(Record.compact_geo, kwargs)
+        compacted = Record.compact_geo(**kwargs)
+        logger.info(f"Petitions geo records compacted: {len(compacted)}")
+        return handler.commit(result=list(compacted.keys()))
+
+@celery.task(name='create_partitions_task', **celery_opts, **once_opts)
+def create_partitions_task(self, *args, **kwargs):
+    with TaskHandler.execute(bind=self) as handler:
+        kwargs = handler.getcallkwargs(Record.create_partitions, kwargs)
+        created = Record.create_partitions(**kwargs)
+        logger.info(f"Record partitions created: {created}")
+        return handler.commit(result=created)
+
+@celery.task(name='retire_partitions_task', **celery_opts, **once_opts)
+def retire_partitions_task(self, *args, **kwargs):
+    with TaskHandler.execute(bind=self) as handler:
+        kwargs = handler.getcallkwargs(Record.retire_partitions, kwargs)
+        retired = Record.retire_partitions(**kwargs)
+        logger.info(f"Record partitions retired: {retired}")
+        return handler.commit(result=retired)
+
+@celery.task(name='update_growth_metrics_task', **celery_opts, **once_opts)
+def update_growth_metrics_task(self, *args, **kwargs):
+    with TaskHandler.execute(bind=self) as handler:
+        petitions = Petition.update_growth_metrics()
+        logger.info(f"Petitions growth metrics updated: {len(petitions)}")
+        return handler.commit(result=petitions)
+
 @celery.task(name='update_trending_pos_task', **celery_opts, **once_opts)
 def update_trend_indexes_task(self, *args, **kwargs):
     with TaskHandler.execute(bind=self) as handler:
         kwargs = handler.getcallkwargs(Petition.update_trend_indexes, kwargs)
         petitions = Petition.update_trend_indexes(**kwargs)
         logger.info(f"Petitions trend indexes updated: {petitions}")
-        return handler.commit(result=[p.id for p in petitions])
+        return handler.commit(result=[p.id for p in petitions["found"] + petitions["missing"]])
@@ -6,10 +6,16 @@ from .models import (
     RecordSchema,
     RecordNestedSchema,
 )
-from flask import url_for, jsonify, make_response, request, abort
+from flask import url_for, jsonify, make_response, request, abort, current_app
 from json.decoder import JSONDecodeError
+from werkzeug.http import is_resource_modified
 from urllib.parse import urlencode
-import requests, json, datetime, logging
+from functools import wraps
+from math import ceil
+from application.lib import keyset
+from application.lib.fastjson import JSONCodec
+from application.tracker.serializers import SignaturesSerializer
+import requests, redis, hashlib, json, datetime, logging
 
 blueprint = "tracker_bp"
 logger = logging.getLogger(__name__)
@@ -19,11 +25,13 @@ logger = logging.getLogger(__name__)
 class ViewUtils():
 
     REQUEST_WHITELIST = {
-        "pagination": ["index", "items"],
+        "pagination": ["index", "items", "cursor", "count"],
         "record": ["timestamp", "order"],
         "petition": ["archived", "text", "expressions", "order_by"],
     }
 
+    RESPONSE_FORMATS = ["records", "columnar"]
+
     @classmethod
     def url_for(cls, func, index, values, **params):
         url = url_for(f"{blueprint}.{func.__name__}", index=index, **values)
@@ -53,15 +61,21 @@ class ViewUtils():
         keys = cls.REQUEST_WHITELIST[whitelist] + list(manual)
         return cls.parse_params(request, *keys, **merge)
 
+    # index pagination (page numbers, COUNT + OFFSET) or, given a cursor param and the keys of
+    # the query's order, keyset pagination continuing from an opaque cursor (empty for the first page)
     @classmethod
-    def handle(cls, context, query, request, func):
+    def handle(cls, context, query, request, func, keys=None):
         pagination_params = ViewUtils.get_params(request, "pagination")
 
         params = context["meta"]["query"]
         values = context["meta"]["values"]
         params.update(**pagination_params)
         will_paginate = params.get("items")
-        if will_paginate:
+        if will_paginate and keys and "cursor" in params:
+            page = cls.keyset_paginate(query, keys, params)
+            context["meta"].update(cls.keyset_meta(page, func, values, params))
+            result = page.items
+        elif will_paginate:
             index = params.pop("index", 1)
             page = query.paginate(index, params["items"], False)
             pagination = cls.paginate(index, page, func, values,**params)
@@ -76,12 +90,19 @@ class ViewUtils():
 
 
     @classmethod
-    def serialize(cls, context, petition, results, latest, geography=None, locale=None, petition_id=None):
+    def serialize(cls, context, petition, results, latest, geography=None, locale=None, petition_id=None, format=None):
         if not results:
             template = "No matching results found for petition id: {}"
             cls.abort(404, template.format(petition_id))
 
-        if geography:
+        if format == "columnar":
+            serializer = SignaturesSerializer(geography, locale)
+            latest_data = serializer.dump_one(latest) if latest is not None else None
+            signatures = serializer.columnar(results)
+        elif cls.compiled_serializer() and latest is not None:
+            serializer = SignaturesSerializer(geography, locale)
+            signatures, latest_data = serializer.dump_many(results), serializer.dump_one(latest)
+        elif geography:
             exclude = ["id", "record", "timestamp"]
             signatures = RecordSchema.dump_query(results, geography, locale, exclude)
             latest_data = RecordSchema.dump_query(latest, geography, locale, exclude)
@@ -93,11 +114,24 @@ class ViewUtils():
         context["signatures"] = signatures
         context["meta"]["latest_data"] = latest_data
 
+    @classmethod
+    def compiled_serializer(cls):
+        return current_app.config["SIGNATURES_SERIALIZER"] == "compiled"
+
+    # json bytes encoded by RESPONSE_JSON_BACKEND, laid out as jsonify would
+    @classmethod
+    def respond(cls, context):
+        config = current_app.config
+        codec = JSONCodec(config["RESPONSE_JSON_BACKEND"])
+        body = codec.encode(context, pretty=config["JSONIFY_PRETTYPRINT_REGULAR"] or current_app.debug)
+        return current_app.response_class(body, mimetype=config["JSONIFY_MIMETYPE"])
+
     @classmethod
     def get_latest_data(cls, petition, geography=None, locale=None):
-        geographic = True if geography else None
-        record = petition.record_query(geographic=geographic).first()
-        return Record.signatures_query([record], geography, locale).first() if locale else record
+        record = petition.latest_record_for(geographic=bool(geography))
+        if locale and record:
+            return Record.signatures_query([record], geography, locale).first()
+        return record
 
     @classmethod
     def paginate(cls, index, page, func, values, **params):
@@ -115,6 +149,40 @@ class ViewUtils():
         links = cls.build_links(page, func, values, params)
         return {"links": links, "items": items}
 
+    @classmethod
+    def keyset_paginate(cls, query, keys, params):
+        opts = {"cursor": params["cursor"] or None, "per_page": params["items"], "count": bool(params.get("count"))}
+        try:
+            if hasattr(query, "keyset"):
+                return query.keyset(keys, **opts)
+            return keyset.paginate(query, keys, **opts)
+        except keyset.CursorError as e:
+            cls.abort(400, str(e))
+
+    @classmethod
+    def keyset_meta(cls, page, func, values, params):
+        items = {"on_page": len(page.items), "per_page": page.per_page}
+        if page.total is not None:
+            items["total"] = page.total
+        return {"links": cls.build_keyset_links(page, func, values, params), "items": items}
+
+    @classmethod
+    def build_keyset_links(cls, page, func, values, params):
+        cursors = {"curr": params["cursor"], "prev": page.prev, "next": page.next}
+        links = {}
+        for key, cursor in cursors.items():
+            url = cls.cursor_url(func, values, cursor, **params) if cursor is not None else None
+            links[key] = {"url": url, "cursor": cursor}
+
+        return links
+
+    @classmethod
+    def cursor_url(cls, func, values, cursor, **params):
+        url = url_for(f"{blueprint}.{func.__name__}", **values)
+        params = {k: json.dumps(v) for k, v in params.items() if k != "cursor"}
+        separator = "&" if "?" in url else "?"
+        return f"{url}{separator}{urlencode({**params, 'cursor': cursor})}"
+
     @classmethod
     def build_links(cls, page, func, values, params):
         has_page = lambda k: getattr(page, f"has_{k}")
@@ -153,9 +221,123 @@ class ViewUtils():
             template = "Invalid state: '{}', valid states: '{}'"
             cls.abort(400, template.format(state, Petition.STATE_VALUES))
 
+    @classmethod
+    def get_limit_or_400(cls, request, maximum, default=10):
+        try:
+            limit = int(request.args.get("limit", default))
+        except ValueError:
+            cls.abort(400, "Invalid limit: '{}'".format(request.args.get("limit")))
+        if not 0 < limit <= maximum:
+            template = "Invalid limit: '{}', allowed: 1-{}"
+            cls.abort(400, template.format(limit, maximum))
+        return limit
+
+    # formats other than the default are kept in the view values, so page links carry them
+    @classmethod
+    def get_format_or_400(cls, request):
+        format = request.args.get("format", "records")
+        if format not in cls.RESPONSE_FORMATS:
+            template = "Invalid format: '{}', allowed: {}"
+            cls.abort(400, template.format(format, cls.RESPONSE_FORMATS))
+        return {} if format == "records" else {"format": format}
+
     @classmethod
     def validate_geography_or_400(cls, geography):
         valid = ["region", "country", "constituency"]
         if geography not in valid:
             template = "Invalid geographic type: '{}', Allowed: '{}'"
             cls.abort(400, template.format(geography, valid))
+
+
+
+# redis cache of serialized responses for petition views, keyed on the host url, endpoint, request
+# args and the petition's response version (bumped whenever its serialized columns change).
+# stale versions are never read again and expire after RESPONSE_CACHE_TTL seconds
+class ResponseCache():
+
+    KEY_PREFIX = "response"
+
+    @classmethod
+    def digest(cls, *parts):
+        args = urlencode(sorted(request.args.items(multi=True)))
+        url = f"{request.host_url}{request.path.lstrip('/')}?{args}"
+        return hashlib.sha1(":".join([*parts, url]).encode()).hexdigest()
+
+    @classmethod
+    def key(cls, petition_id, version):
+        return f"{cls.KEY_PREFIX}:{petition_id}:{version}:{cls.digest()}"
+
+    @classmethod
+    def cached(cls, func):
+        @wraps(func)
+        def wrapper(petition_id, **values):
+            if not current_app.config["RESPONSE_CACHE_ENABLED"]:
+                return func(petition_id, **values)
+
+            try:
+                version = Petition.response_version(petition_id)
+                key = cls.key(petition_id, version) if version else None
+                body = current_app.redis.get(key) if key else None
+            except redis.RedisError as e:
+                logger.warning(f"response cache unavailable, error: {e}")
+                return func(petition_id, **values)
+
+            if body:
+                return current_app.response_class(body, mimetype="application/json")
+
+            response = make_response(func(petition_id, **values))
+            if key:
+                cls.store(key, response.get_data())
+            return response
+
+        return wrapper
+
+    @classmethod
+    def store(cls, key, body):
+        try:
+            current_app.redis.set(key, body, ex=current_app.config["RESPONSE_CACHE_TTL"])
+        except redis.RedisError as e:
+            logger.warning(f"could not cache response, error: {e}")
+
+    @classmethod
+    def clear(cls):
+        keys = list(current_app.redis.scan_iter(match=f"{cls.KEY_PREFIX}:*"))
+        keys.append(Petition.RESPONSE_VERSION_KEY)
+        current_app.redis.delete(*keys)
+
+
+
+# strong etags and last-modified for tracker views, from the response version of the petition
+# (or of all petitions for listings) and the request. conditional requests are answered with a
+# 304 before the view runs any queries
+class ConditionalResponse():
+
+    @classmethod
+    def validators(cls, version):
+        last_modified = datetime.datetime.fromtimestamp(ceil(float(version)), tz=datetime.timezone.utc)
+        return ResponseCache.digest(version), last_modified
+
+    @classmethod
+    def conditional(cls, func):
+        @wraps(func)
+        def wrapper(**values):
+            try:
+                version = Petition.response_version(values.get("petition_id"))
+            except redis.RedisError as e:
+                logger.warning(f"response version unavailable, error: {e}")
+                version = None
+
+            if not version:
+                return func(**values)
+
+            etag, last_modified = cls.validators(version)
+            if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(func(**values))
+
+            response.set_etag(etag)
+            response.last_modified = last_modified
+            return response
+
+        return wrapper
@@ -5,9 +5,10 @@ from application.tracker.models import (
     RecordNestedSchema,
 )
 
-from application.tracker.utils import ViewUtils
+from application.tracker.utils import ViewUtils, ResponseCache, ConditionalResponse
+from application.tracker.remote import RemotePetition, FetchStats
 from application.tracker import bp
-from flask import request, abort
+from flask import request, abort, current_app
 from datetime import datetime as dt
 import json, logging
 
@@ -15,6 +16,7 @@ logger = logging.getLogger(__name__)
 
 # get a petition for a given id, optional signature date for given timestamp
 @bp.route("/petition/<petition_id>", methods=["GET"])
+@ConditionalResponse.conditional
 def get_petition(petition_id):
     petition = ViewUtils.get_petition_or_404(petition_id)
     context = {"petition": PetitionSchema().dump(petition)}
@@ -29,8 +31,10 @@ def get_petition(petition_id):
     return context
 
 # get a list of petitions for a given state state and query on action
+# cursor pages follow order_by (date by default), text rank ordering only applies to index pages
 @bp.route("/petitions", methods=["GET"])
 @bp.route("/petitions/<state>", methods=["GET"])
+@ConditionalResponse.conditional
 def get_petitions_where(state="all"):
     values = {"state": state}
     ViewUtils.validate_state_or_400(state)
@@ -39,57 +43,89 @@ def get_petitions_where(state="all"):
     query = Petition.where(state=state, **params)
     context = {"meta": {"query": params, "values": values}}
 
-    petitions = ViewUtils.handle(context, query, request, get_petitions_where)
+    keys = Petition.keyset_keys(params.get("order_by"))
+    petitions = ViewUtils.handle(context, query, request, get_petitions_where, keys)
     serialized_petitions = PetitionSchema(many=True).dump(petitions)
     context.update(petitions=serialized_petitions)
     return context
 
+# typeahead for petition actions, a small payload of the top matches for text param q
+@bp.route("/petitions/autocomplete", methods=["GET"])
+@ConditionalResponse.conditional
+def get_petitions_autocomplete():
+    state = request.args.get("state", "all")
+    ViewUtils.validate_state_or_400(state)
+    limit = ViewUtils.get_limit_or_400(request, current_app.config["AUTOCOMPLETE_MAX_LIMIT"])
+
+    matches = Petition.autocomplete(request.args.get("q"), limit=limit, state=state)
+    petitions = [{"id": id, "action": action, "signatures": signatures} for id, action, signatures in matches]
+    return {"petitions": petitions}
+
 # returns timestamped list of total signatures for a given petition
 @bp.route("/petition/<petition_id>/signatures", methods=["GET"])
+@ConditionalResponse.conditional
+@ResponseCache.cached
 def get_signature_totals_for(petition_id):
-    values = {"petition_id": petition_id}
+    values = {"petition_id": petition_id, **ViewUtils.get_format_or_400(request)}
     petition = ViewUtils.get_petition_or_404(petition_id)
 
     params = ViewUtils.get_params(request, whitelist="record")
-    query = petition.record_query(geographic=None, **params)
+    query = petition.record_query(geographic=None, carry_forward=True, **params)
     context = {"meta": {"query": params, "values": values}}
 
-    records = ViewUtils.handle(context, query, request, get_petitions_where)
+    keys = Record.keyset_keys(params.get("order"))
+    records = ViewUtils.handle(context, query, request, get_signature_totals_for, keys)
     latest_record = ViewUtils.get_latest_data(petition)
     ViewUtils.serialize(context, petition, records, latest_record, **values)
-    return context
+    return ViewUtils.respond(context)
 
 # returns a timestamped list of signatures for a given petition/geography
 @bp.route("/petition/<petition_id>/signatures_by/<geography>", methods=["GET"])
+@ConditionalResponse.conditional
+@ResponseCache.cached
 def get_signatures_by_geography_for(petition_id, geography):
-    values = {"petition_id": petition_id, "geography": geography}
+    values = {"petition_id": petition_id, "geography": geography, **ViewUtils.get_format_or_400(request)}
     ViewUtils.validate_geography_or_400(geography)
     petition = ViewUtils.get_petition_or_404(petition_id)
 
     params = ViewUtils.get_params(request, whitelist="record")
-    query = petition.record_query(geographic=True, join_on=geography, **params)
+    load_rows = not ViewUtils.compiled_serializer()
+    query = petition.record_query(geographic=True, join_on=geography, carry_forward=True, load_rows=load_rows, **params)
     context = {"meta": {"query": params, "values": values}}
 
-    records = ViewUtils.handle(context, query, request, get_signatures_by_geography_for)
+    keys = Record.keyset_keys(params.get("order"))
+    records = ViewUtils.handle(context, query, request, get_signatures_by_geography_for, keys)
     latest_record = ViewUtils.get_latest_data(petition, geography)
     ViewUtils.serialize(context, petition, records, latest_record, **values)
-    return context
+    return ViewUtils.respond(context)
 
 # returns timestamped list of signatures for a given petition/locale
 @bp.route("/petition/<petition_id>/signatures_by/<geography>/<locale>", methods=["GET"])
+@ConditionalResponse.conditional
+@ResponseCache.cached
 def get_signatures_by_locale_for(petition_id, geography, locale):
-    values = {"petition_id": petition_id, "geography": geography, "locale": locale}
+    values = {"petition_id": petition_id, "geography": geography, "locale": locale, **ViewUtils.get_format_or_400(request)}
     ViewUtils.validate_geography_or_400(geography)
     locale = ViewUtils.get_locale_or_400(geography, locale)
     petition = ViewUtils.get_petition_or_404(petition_id)
 
     params = ViewUtils.get_params(request, whitelist="record")
-    records = petition.record_query(geographic=True, **params).all()
+    records = petition.record_query(geographic=True, carry_forward=True, **params).all()
     query = Record.signatures_query(records, geography, locale, params.get("order"))
     context = {"meta": {"query": params, "values": values, "locale": locale}}
 
-    signatures_by = ViewUtils.handle(context, query, request, get_signatures_by_locale_for)
+    keys = Record.keyset_keys(params.get("order"), geography)
+    signatures_by = ViewUtils.handle(context, query, request, get_signatures_by_locale_for, keys)
     latest_signatures_by = ViewUtils.get_latest_data(petition, geography, locale)
     ViewUtils.serialize(context, petition, signatures_by, latest_signatures_by, **values)
-    return context
+    return ViewUtils.respond(context)
+
+# current rate limit tokens and circuit breaker state for the remote petitions host
+@bp.route("/remote/throttle", methods=["GET"])
+def get_remote_throttle():
+    return {"throttle": RemotePetition.throttle.metrics()}
 
+# running totals of remote responses, transfer bytes and json decode time
+@bp.route("/remote/stats", methods=["GET"])
+def get_remote_stats():
+    return {"stats": FetchStats.totals(RemotePetition.redis_client)}
@@ -0,0 +1,35 @@
+"""empty message
+
+Revision ID: 0a7c5e2b9d14
+Revises: f6a2d4c9e317
+Create Date: 2026-10-18 15:48:36.702194
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlalchemy_utils
+from application.models import *
+from application.tracker.models import *
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '0a7c5e2b9d14'
+down_revision = 'f6a2d4c9e317'
+branch_labels = None
+depends_on = None
+
+TEXT_WEIGHTS = {'action': 'A', 'background': 'B', 'additional_details': 'C', 'creator_name': 'D'}
+
+
+def upgrade():
+    for column, weight in TEXT_WEIGHTS.items():
+        vector = f"setweight(to_tsvector('english', coalesce({column}, '')), '{weight}')"
+        op.add_column('petition', sa.Column(f'{column}_search', postgresql.TSVECTOR(), sa.Computed(vector, persisted=True), nullable=True))
+        op.create_index(f'ix_petition_{column}_search', 'petition', [f'{column}_search'], unique=False, postgresql_using='gin')
+
+
+def downgrade():
+    for column in TEXT_WEIGHTS:
+        op.drop_index(f'ix_petition_{column}_search', table_name='petition')
+        op.drop_column('petition', f'{column}_search')
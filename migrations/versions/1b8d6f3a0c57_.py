@@ -0,0 +1,28 @@
+"""empty message
+
+Revision ID: 1b8d6f3a0c57
+Revises: 0a7c5e2b9d14
+Create Date: 2026-10-18 16:32:10.215874
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlalchemy_utils
+from application.models import *
+from application.tracker.models import *
+
+
+# revision identifiers, used by Alembic.
+revision = '1b8d6f3a0c57'
+down_revision = '0a7c5e2b9d14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index('ix_petition_action_trgm', 'petition', ['action'], unique=False, postgresql_using='gin', postgresql_ops={'action': 'gin_trgm_ops'})
+
+
+def downgrade():
+    op.drop_index('ix_petition_action_trgm', table_name='petition')
@@ -0,0 +1,119 @@
+"""empty message
+
+Revision ID: d4e8b1a7c395
+Revises: c2d9a4f6e871
+Create Date: 2026-10-18 13:05:21.448310
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlalchemy_utils
+from application.models import *
+from application.tracker.models import *
+from application.lib import pgpartition
+from datetime import datetime as dt
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4e8b1a7c395'
+down_revision = 'c2d9a4f6e871'
+branch_labels = None
+depends_on = None
+
+# record and signatures_by_* are rebuilt as monthly range partitioned tables on timestamp,
+# geo rows copy their record's timestamp (the partition key is part of every key)
+GEO_TABLES = {
+    'signatures_by_country': 'iso_code',
+    'signatures_by_region': 'ons_code',
+    'signatures_by_constituency': 'ons_code'
+}
+
+
+def months_covering(first, months_ahead=2):
+    month, last = pgpartition.month_start(first), pgpartition.add_months(dt.now(), months_ahead)
+    while month <= last:
+        yield month
+        month = pgpartition.add_months(month, 1)
+
+
+def create_partitions(table, parent, months):
+    op.execute(f"CREATE TABLE {table}_default PARTITION OF {parent} DEFAULT")
+    for month in months:
+        name, end = pgpartition.partition_name(table, month), pgpartition.add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE {name} PARTITION OF {parent} "
+            f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')"
+        )
+
+
+def create_record_constraints(partitioned):
+    key = ['id', 'timestamp'] if partitioned else ['id']
+    op.create_primary_key('record_pkey', 'record', key)
+    op.create_foreign_key('record_petition_id_fkey', 'record', 'petition', ['petition_id'], ['id'], ondelete='CASCADE')
+    op.create_index(op.f('ix_record_petition_id'), 'record', ['petition_id'], unique=False)
+    op.create_index(op.f('ix_record_timestamp'), 'record', ['timestamp'], unique=False)
+    op.create_index(op.f('ix_record_keyframe_id'), 'record', ['keyframe_id'], unique=False)
+    if not partitioned:
+        op.create_foreign_key('record_keyframe_id_fkey', 'record', 'record', ['keyframe_id'], ['id'], ondelete='CASCADE')
+
+
+def create_geo_constraints(table, code, partitioned):
+    geo = table.replace('signatures_by_', '')
+    key = ['record_id', 'timestamp'] if partitioned else ['record_id']
+    references = ['id', 'timestamp'] if partitioned else ['id']
+    op.create_primary_key(f'{table}_pkey', table, ['id', 'timestamp'] if partitioned else ['id'])
+    op.create_unique_constraint(f'uniq_sig_{geo}_for_record', table, key + [code])
+    op.create_foreign_key(f'{table}_record_id_fkey', table, 'record', key, references, ondelete='CASCADE')
+    op.create_index(op.f(f'ix_{table}_record_id'), table, ['record_id'], unique=False)
+    op.create_index(op.f(f'ix_{table}_{code}'), table, [code], unique=False)
+
+
+# tables are copied into replacements then swapped, sequences move to the new id columns
+def swap_tables(tables):
+    for table in tables:
+        op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}_replacement.id")
+    for table in tables:
+        op.execute(f"DROP TABLE {table}")
+    for table in tables:
+        op.execute(f"ALTER TABLE {table}_replacement RENAME TO {table}")
+
+
+def upgrade():
+    first = op.get_bind().execute("SELECT min(timestamp) FROM record").scalar()
+    months = list(months_covering(first or dt.now()))
+
+    op.execute("CREATE TABLE record_replacement (LIKE record INCLUDING DEFAULTS) PARTITION BY RANGE (timestamp)")
+    create_partitions('record', 'record_replacement', months)
+    op.execute("INSERT INTO record_replacement SELECT * FROM record")
+
+    for table, code in GEO_TABLES.items():
+        op.execute(
+            f"CREATE TABLE {table}_replacement (LIKE {table} INCLUDING DEFAULTS, "
+            f"timestamp timestamp with time zone NOT NULL) PARTITION BY RANGE (timestamp)"
+        )
+        create_partitions(table, f'{table}_replacement', months)
+        op.execute(
+            f"INSERT INTO {table}_replacement (id, record_id, {code}, count, timestamp) "
+            f"SELECT geo.id, geo.record_id, geo.{code}, geo.count, record.timestamp "
+            f"FROM {table} geo JOIN record ON record.id = geo.record_id"
+        )
+
+    swap_tables(list(GEO_TABLES.keys()) + ['record'])
+    create_record_constraints(partitioned=True)
+    for table, code in GEO_TABLES.items():
+        create_geo_constraints(table, code, partitioned=True)
+
+
+def downgrade():
+    op.execute("CREATE TABLE record_replacement (LIKE record INCLUDING DEFAULTS)")
+    op.execute("INSERT INTO record_replacement SELECT * FROM record")
+
+    for table, code in GEO_TABLES.items():
+        op.execute(f"CREATE TABLE {table}_replacement (LIKE {table} INCLUDING DEFAULTS)")
+        op.execute(f"INSERT INTO {table}_replacement SELECT * FROM {table}")
+        op.execute(f"ALTER TABLE {table}_replacement DROP COLUMN timestamp")
+
+    swap_tables(list(GEO_TABLES.keys()) + ['record'])
+    create_record_constraints(partitioned=False)
+    for table, code in GEO_TABLES.items():
+        create_geo_constraints(table, code, partitioned=False)